@@ -1,13 +1,66 @@
-import React, { useMemo, useState } from 'react';
+import React, { useEffect, useMemo, useState } from 'react';
 import { Text } from '@react-three/drei';
 import * as THREE from 'three';
 import { useTerrainStore } from '../stores/terrainStore';
-import forecastData from '../../../predictions/forecast_nodes.json';
+import fallbackData from '../../../predictions/forecast_nodes.json';
+
+const PREDICTIONS_URL = '/predictions';
+
+// Node shards already fetched this session, keyed by content hash
+const shardCache = new Map();
+
+async function fetchJson(url) {
+  const response = await fetch(url);
+  if (!response.ok) {
+    throw new Error(`${url}: ${response.status}`);
+  }
+  return response.json();
+}
+
+// Load forecast nodes for the visible capabilities only. Uses the shard
+// manifest written by batch_forecaster.py --format sharded, and falls back
+// to the forecast_nodes.json bundled at build time when no manifest is published.
+async function loadForecastNodes(filterCategory) {
+  let manifest;
+  try {
+    manifest = await fetchJson(`${PREDICTIONS_URL}/shards/manifest.json`);
+  } catch (error) {
+    return { total: fallbackData.nodes.length, nodes: fallbackData.nodes };
+  }
+
+  const visible = manifest.shards.nodes.filter(
+    (entry) => entry.count > 0 && (!filterCategory || entry.name.toLowerCase().includes(filterCategory))
+  );
+
+  const shards = await Promise.all(
+    visible.map(async (entry) => {
+      if (!shardCache.has(entry.sha256)) {
+        shardCache.set(entry.sha256, await fetchJson(`${PREDICTIONS_URL}/shards/${entry.path}`));
+      }
+      return shardCache.get(entry.sha256);
+    })
+  );
+
+  return { total: manifest.total_nodes, nodes: shards.flat() };
+}
 
 function ForecastNodes() {
   const [hoveredNode, setHoveredNode] = useState(null);
+  const [forecastData, setForecastData] = useState({ total: 0, nodes: [] });
   const { filterCategory } = useTerrainStore();
 
+  useEffect(() => {
+    let cancelled = false;
+    loadForecastNodes(filterCategory)
+      .then((data) => {
+        if (!cancelled) setForecastData(data);
+      })
+      .catch((error) => console.error('Failed to load forecast nodes:', error));
+    return () => {
+      cancelled = true;
+    };
+  }, [filterCategory]);
+
   // Transform forecast data into 3D nodes
   const nodes = useMemo(() => {
     return forecastData.nodes
@@ -23,7 +76,7 @@ function ForecastNodes() {
       .map((node, idx) => {
       // Generate position based on capability and threshold
       // Spread nodes across the terrain
-      const angle = (idx / forecastData.nodes.length) * Math.PI * 2;
+      const angle = (idx / forecastData.total) * Math.PI * 2;
       const radius = 30 + (node.threshold / 100) * 20;
 
       const x = Math.cos(angle) * radius;
@@ -45,7 +98,7 @@ function ForecastNodes() {
         color: new THREE.Color(colorMap[node.color] || '#ffffff')
       };
     });
-  }, [filterCategory]);
+  }, [forecastData, filterCategory]);
 
   return (
     <group>
@@ -3,25 +3,51 @@ Batch Forecasting Script - Loads YOUR actual data
 Processes capabilities from combined_benchmarks_cleaned.csv
 """
 
+import argparse
 import json
+import logging
 import pandas as pd
-from capability_forecaster import CapabilityForecaster
+from capability_forecaster import CapabilityForecaster, FORECASTER_VERSION
+from forecast_cache import ForecastCache
+from pipeline_logging import SUMMARY, add_logging_args, configure_from_args, get_logger
+from pipeline_profiler import PipelineProfiler
+from forecast_writers import ShardedForecastWriter, StreamingForecastWriter, summary_rows
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 import os
 
+logger = get_logger('batch_forecaster')
+
 
 class BatchForecaster:
     """Generate forecasts for multiple capabilities at once."""
     
-    def __init__(self, data_path: str, output_dir: str = "predictions"):
+    def __init__(self, data_path: str, output_dir: str = "predictions",
+                 output_format: str = "json", use_cache: bool = True,
+                 profile_cpu: bool = False, profile_memory: bool = False,
+                 shard_dir: Optional[str] = None):
         """
         Args:
             data_path: Path to combined_benchmarks_cleaned.csv
             output_dir: Where to save predictions
+            output_format: 'json' writes indented files once all capabilities
+                are done; 'ndjson' streams compact output as each one completes;
+                'sharded' writes one file per capability plus a manifest
+            use_cache: Reuse results from output_dir/.cache for capabilities
+                whose data and settings are unchanged
+            profile_cpu: Capture a cProfile of the run into the run report
+            profile_memory: Capture tracemalloc peak/top allocations into
+                the run report
+            shard_dir: Where 'sharded' output is published (default
+                output_dir/shards); the previous shards there are replaced
         """
+        if output_format not in ('json', 'ndjson', 'sharded'):
+            raise ValueError(f"Unknown output format '{output_format}'")
+        
         self.data_path = data_path
         self.output_dir = output_dir
+        self.output_format = output_format
+        self.shard_dir = shard_dir or os.path.join(output_dir, 'shards')
         self.forecaster = CapabilityForecaster(saturation_point=100.0)
         self.results = {
             'metadata': {
@@ -35,35 +61,36 @@ class BatchForecaster:
         
         # Create output directory
         os.makedirs(output_dir, exist_ok=True)
+        
+        self.cache = ForecastCache(os.path.join(output_dir, '.cache')) if use_cache else None
+        self.profiler = PipelineProfiler(cpu=profile_cpu, memory=profile_memory)
     
     def load_data(self) -> pd.DataFrame:
         """Load your combined benchmarks data."""
-        print(f"\n{'='*60}")
-        print(f"Loading data from: {self.data_path}")
-        print(f"{'='*60}")
+        logger.info("Loading data from: %s", self.data_path)
         
         df = pd.read_csv(self.data_path)
         
-        print(f"\n✓ Loaded {len(df)} rows")
-        print(f"✓ Columns: {df.columns.tolist()}")
-        print(f"✓ Date range: {df['date'].min()} to {df['date'].max()}")
+        logger.info("✓ Loaded %d rows", len(df))
+        logger.debug("✓ Columns: %s", df.columns.tolist())
+        logger.debug("✓ Date range: %s to %s", df['date'].min(), df['date'].max())
         
         # Score range check
         if 'score' in df.columns:
             score_min = df['score'].min()
             score_max = df['score'].max()
-            print(f"✓ Score range: {score_min:.4f} to {score_max:.4f}")
+            logger.debug("✓ Score range: %.4f to %.4f", score_min, score_max)
             
             if score_max <= 1.0:
-                print(f"  ℹ️  Scores appear to be on 0-1 scale (will auto-convert to 0-100)")
+                logger.debug("  ℹ️  Scores appear to be on 0-1 scale (will auto-convert to 0-100)")
             elif score_max <= 100:
-                print(f"  ℹ️  Scores appear to be on 0-100 scale")
+                logger.debug("  ℹ️  Scores appear to be on 0-100 scale")
             else:
-                print(f"  ⚠️  Warning: Max score > 100, may need custom handling")
+                logger.warning("⚠️  Max score %.2f > 100, may need custom handling", score_max)
         
         if 'capability' in df.columns:
-            print(f"✓ Capabilities found: {df['capability'].nunique()}")
-            print(f"  {sorted(df['capability'].unique())}")
+            logger.info("✓ Capabilities found: %d", df['capability'].nunique())
+            logger.debug("  %s", sorted(df['capability'].unique()))
         
         return df
     
@@ -79,9 +106,7 @@ class BatchForecaster:
         Returns:
             Dictionary mapping capability names to {dates, scores}
         """
-        print(f"\n{'='*60}")
-        print("PREPARING CAPABILITY TIME SERIES")
-        print(f"{'='*60}\n")
+        logger.debug("Preparing capability time series")
         
         capabilities_data = {}
         
@@ -104,7 +129,8 @@ class BatchForecaster:
             
             # Check minimum points
             if len(cap_df) < min_points:
-                print(f"⚠️  Skipping {capability}: only {len(cap_df)} points (need {min_points})")
+                logger.info("⚠️  Skipping %s: only %d points (need %d)",
+                            capability, len(cap_df), min_points)
                 continue
             
             # Extract dates and scores
@@ -121,38 +147,42 @@ class BatchForecaster:
             
             if has_small and has_large:
                 # MIXED SCALES: Convert small values (<=1.0) to 0-100
-                print(f"  ⚠️  MIXED SCALES detected! Converting values <=1.0 to percentage")
+                logger.warning("⚠️  %s: mixed scales detected, converting values <=1.0 to percentage",
+                               capability)
                 scores = [s * 100 if s <= 1.0 else s for s in scores]
                 max_score = max(scores)
                 min_score = min(scores)
             elif max_score <= 1.0:
                 # All scores are 0-1 scale, convert to 0-100
                 scores = [s * 100 for s in scores]
-                print(f"  ℹ️  Normalized from 0-1 scale: {min_score:.3f}-{max_score:.3f} → {min_score*100:.1f}-{max_score*100:.1f}")
+                logger.debug("  ℹ️  Normalized from 0-1 scale: %.3f-%.3f → %.1f-%.1f",
+                             min_score, max_score, min_score * 100, max_score * 100)
                 max_score = max(scores)
                 min_score = min(scores)
             elif max_score <= 10.0 and min_score >= 1.0:
                 # Looks like 1-10 scale (e.g., rating), convert to 0-100
                 scores = [s * 10 for s in scores]
-                print(f"  ℹ️  Detected 1-10 rating scale: {min_score:.2f}-{max_score:.2f} → {min_score*10:.1f}-{max_score*10:.1f}")
+                logger.debug("  ℹ️  Detected 1-10 rating scale: %.2f-%.2f → %.1f-%.1f",
+                             min_score, max_score, min_score * 10, max_score * 10)
                 max_score = max(scores)
                 min_score = min(scores)
             elif max_score > 100:
-                print(f"⚠️  Warning: max score = {max_score:.2f} (>100), may need custom normalization")
+                logger.warning("⚠️  %s: max score = %.2f (>100), may need custom normalization",
+                               capability, max_score)
             
             # Show the data we'll use
-            print(f"  → {len(dates)} time points: {dates[0]} to {dates[-1]}")
-            print(f"  → Score range: {min(scores):.1f} to {max(scores):.1f}")
-            print(f"  → Trend: {scores[0]:.1f} → {scores[-1]:.1f} ({scores[-1]-scores[0]:+.1f})")
+            logger.debug("  → %d time points: %s to %s", len(dates), dates[0], dates[-1])
+            logger.debug("  → Score range: %.1f to %.1f", min(scores), max(scores))
+            logger.debug("  → Trend: %.1f → %.1f (%+.1f)", scores[0], scores[-1], scores[-1] - scores[0])
             
             capabilities_data[capability] = {
                 'dates': dates,
                 'scores': scores
             }
             
-            print(f"✓ {capability}: {len(dates)} points from {dates[0]} to {dates[-1]}")
+            logger.debug("✓ %s: %d points from %s to %s", capability, len(dates), dates[0], dates[-1])
         
-        print(f"\n✓ Prepared {len(capabilities_data)} capabilities for forecasting")
+        logger.info("✓ Prepared %d capabilities for forecasting", len(capabilities_data))
         
         return capabilities_data
     
@@ -164,49 +194,52 @@ class BatchForecaster:
         """
         Process a single capability: fit model and generate predictions.
         """
-        print(f"\n{'='*60}")
-        print(f"Processing: {capability_name}")
-        print(f"{'='*60}")
+        logger.debug("Processing: %s", capability_name)
         
         # Fit the model
-        fit_result = self.forecaster.fit_capability(dates, scores, capability_name)
+        with self.profiler.stage('fit', capability_name):
+            fit_result = self.forecaster.fit_capability(dates, scores, capability_name)
         
         if not fit_result['success']:
-            print(f"❌ Failed to fit: {fit_result.get('error', 'Unknown error')}")
+            logger.warning("❌ %s: failed to fit: %s", capability_name,
+                           fit_result.get('error', 'Unknown error'))
             return {
                 'success': False,
                 'error': fit_result.get('error'),
                 'capability': capability_name
             }
         
-        print(f"✓ Fitted successfully (R² = {fit_result['r_squared']:.4f})")
+        logger.debug("✓ Fitted successfully (R² = %.4f)", fit_result['r_squared'])
         
         # Generate predictions for each threshold
         predictions = []
-        for threshold in thresholds:
-            pred = self.forecaster.predict_threshold_date(capability_name, threshold)
-            
-            if pred['success']:
-                if pred.get('already_achieved'):
-                    print(f"  {threshold}%: Already achieved on {pred['date_achieved']}")
-                else:
-                    ci_range = (pd.to_datetime(pred['confidence_interval']['upper']) - 
-                               pd.to_datetime(pred['confidence_interval']['lower'])).days // 2
-                    print(f"  {threshold}%: {pred['predicted_date']} (±{ci_range} days)")
+        with self.profiler.stage('predict', capability_name):
+            for threshold in thresholds:
+                pred = self.forecaster.predict_threshold_date(capability_name, threshold)
                 
-                predictions.append(pred)
+                if pred['success']:
+                    if pred.get('already_achieved'):
+                        logger.debug("  %s%%: Already achieved on %s", threshold, pred['date_achieved'])
+                    elif logger.isEnabledFor(logging.DEBUG):
+                        ci_range = (pd.to_datetime(pred['confidence_interval']['upper']) - 
+                                   pd.to_datetime(pred['confidence_interval']['lower'])).days // 2
+                        logger.debug("  %s%%: %s (±%d days)", threshold, pred['predicted_date'], ci_range)
+                    
+                    predictions.append(pred)
         
         # Generate forecast curve for visualization
-        forecast_curve = self.forecaster.generate_forecast_curve(
-            capability_name, 
-            days_ahead=730
-        )
+        with self.profiler.stage('curve', capability_name):
+            forecast_curve = self.forecaster.generate_forecast_curve(
+                capability_name, 
+                days_ahead=730
+            )
         
         # Generate forecast nodes for 3D terrain
-        forecast_nodes = self.forecaster.export_forecast_nodes(
-            capability_name,
-            thresholds
-        )
+        with self.profiler.stage('nodes', capability_name):
+            forecast_nodes = self.forecaster.export_forecast_nodes(
+                capability_name,
+                thresholds
+            )
         
         return {
             'success': True,
@@ -234,45 +267,147 @@ class BatchForecaster:
             min_points: Minimum data points required per capability
             thresholds: Threshold percentages to predict
         """
+        self.profiler.start()
+        
         # Load data
-        df = self.load_data()
+        with self.profiler.stage('load'):
+            df = self.load_data()
         
         # Prepare capability time series
-        capabilities_data = self.prepare_capability_data(df, min_points)
+        with self.profiler.stage('prepare'):
+            capabilities_data = self.prepare_capability_data(df, min_points)
         
         if len(capabilities_data) == 0:
-            print("\n❌ No capabilities with sufficient data points!")
+            logger.warning("❌ No capabilities with sufficient data points!")
+            self.profiler.stop()
             return
         
         # Process each capability
-        print(f"\n{'='*60}")
-        print(f"FORECASTING {len(capabilities_data)} CAPABILITIES")
-        print(f"{'='*60}")
+        logger.info("Forecasting %d capabilities", len(capabilities_data))
         
-        for capability_name, data in capabilities_data.items():
-            result = self.process_capability(
-                capability_name,
-                data['dates'],
-                data['scores'],
-                thresholds=thresholds
-            )
+        if self.output_format == 'ndjson':
+            self._process_streaming(capabilities_data, thresholds)
+        else:
+            for capability_name, data in capabilities_data.items():
+                result = self._forecast_capability(capability_name, data, thresholds)
+                
+                self.results['capabilities'][capability_name] = result
             
-            self.results['capabilities'][capability_name] = result
+            # Save results
+            with self.profiler.stage('write'):
+                self.save_results(sharded=self.output_format == 'sharded')
+        
+        if self.cache is not None:
+            evicted = self.cache.evict(as_of=datetime.now().strftime('%Y-%m-%d'))
+            logger.info("✓ Cache: %d reused, %d recomputed, %d stale entries evicted",
+                        self.cache.hits, self.cache.misses, evicted)
         
-        # Save results
-        self.save_results()
+        self.profiler.stop()
+        report_path = os.path.join(self.output_dir, 'run_report.json')
+        report = self.profiler.write_report(report_path)
+        logger.info("✓ Saved run report (%.2fs total) to: %s", report['total_seconds'], report_path)
         
         # Print summary
         self.print_summary()
     
-    def save_results(self) -> None:
-        """Save all results to JSON files."""
+    def _forecast_capability(self, capability_name: str, data: Dict,
+                             thresholds: List[float]) -> Dict:
+        """
+        Return the forecast for one capability, from cache when possible.
+        """
+        self.profiler.record(capability_name, n_points=len(data['dates']), cached=False)
+        
+        if self.cache is None:
+            return self._compute_capability(capability_name, data, thresholds)
+        
+        key = ForecastCache.make_key(
+            capability_name,
+            data['dates'],
+            data['scores'],
+            thresholds,
+            saturation_point=self.forecaster.saturation_point,
+            ci_method=self.forecaster.ci_method,
+            n_samples=self.forecaster.n_samples,
+            version=FORECASTER_VERSION,
+            as_of=datetime.now().strftime('%Y-%m-%d')
+        )
+        
+        with self.profiler.stage('cache', capability_name):
+            result = self.cache.get(key)
+        if result is not None:
+            logger.debug("✓ %s: unchanged, using cached forecast", capability_name)
+            self.profiler.record(capability_name, cached=True)
+            return result
+        
+        result = self._compute_capability(capability_name, data, thresholds)
+        with self.profiler.stage('cache', capability_name):
+            self.cache.put(key, result)
+        return result
+    
+    def _compute_capability(self, capability_name: str, data: Dict,
+                            thresholds: List[float]) -> Dict:
+        """Run process_capability and attach the forecaster's work counters."""
+        result = self.process_capability(
+            capability_name, data['dates'], data['scores'], thresholds=thresholds
+        )
+        
+        stats = self.forecaster.stats.get(capability_name)
+        if stats:
+            # MC time is spent inside the predict and nodes stages
+            self.profiler.add('monte_carlo', stats['mc_seconds'], capability_name,
+                              calls=stats['mc_runs'], nested=True)
+            self.profiler.record(
+                capability_name,
+                fit_nfev=stats['fit_nfev'],
+                mc_runs=stats['mc_runs'],
+                mc_samples=stats['mc_samples'],
+                mc_valid_samples=stats['mc_valid_samples']
+            )
+        return result
+    
+    def _process_streaming(self, capabilities_data: Dict[str, Dict],
+                           thresholds: List[float]) -> None:
+        """
+        Forecast each capability and write it out immediately.
+        
+        Only the small per-capability summary (fit quality and threshold
+        predictions) is kept in self.results; curves and nodes go straight
+        to disk.
+        """
+        with StreamingForecastWriter(self.output_dir, self.results['metadata']) as writer:
+            for capability_name, data in capabilities_data.items():
+                result = self._forecast_capability(capability_name, data, thresholds)
+                with self.profiler.stage('write', capability_name):
+                    writer.write(capability_name, result)
+                
+                self.results['capabilities'][capability_name] = {
+                    key: value for key, value in result.items()
+                    if key not in ('forecast_curve', 'forecast_nodes')
+                }
+            
+            counts = writer.close()
+        
+        logger.info("✓ Streamed %d results to: %s", counts['results'], writer.results_path)
+        logger.info("✓ Streamed %d forecast nodes to: %s", counts['nodes'], writer.nodes_path)
+        logger.info("✓ Streamed %d summary rows to: %s", counts['summary_rows'], writer.csv_path)
+    
+    def save_results(self, sharded: bool = False) -> None:
+        """
+        Save all results to JSON files.
+        
+        Args:
+            sharded: Write per-capability shards and a manifest to
+                shard_dir instead of the monolithic JSON files
+        """
+        if sharded:
+            self._save_sharded()
+            return
         
         # Full results
         full_path = os.path.join(self.output_dir, 'forecast_results.json')
         with open(full_path, 'w') as f:
             json.dump(self.results, f, indent=2)
-        print(f"\n✓ Saved full results to: {full_path}")
+        logger.info("✓ Saved full results to: %s", full_path)
         
         # Forecast nodes only (for 3D terrain integration)
         all_nodes = []
@@ -286,47 +421,46 @@ class BatchForecaster:
                 'metadata': self.results['metadata'],
                 'nodes': all_nodes
             }, f, indent=2)
-        print(f"✓ Saved forecast nodes to: {nodes_path}")
+        logger.info("✓ Saved forecast nodes to: %s", nodes_path)
         
         # Summary CSV
-        summary_rows = []
+        rows = []
         for cap_name, cap_data in self.results['capabilities'].items():
-            if cap_data['success']:
-                for pred in cap_data['threshold_predictions']:
-                    if pred['success'] and not pred.get('already_achieved'):
-                        summary_rows.append({
-                            'capability': cap_name,
-                            'threshold': pred['threshold'],
-                            'predicted_date': pred['predicted_date'],
-                            'ci_lower': pred['confidence_interval']['lower'],
-                            'ci_upper': pred['confidence_interval']['upper'],
-                            'days_until': pred['days_until_threshold'],
-                            'current_performance': pred['current_predicted_performance']
-                        })
-        
-        if summary_rows:
-            df = pd.DataFrame(summary_rows)
+            rows.extend(summary_rows(cap_name, cap_data))
+        
+        if rows:
+            df = pd.DataFrame(rows)
             csv_path = os.path.join(self.output_dir, 'forecast_summary.csv')
             df.to_csv(csv_path, index=False)
-            print(f"✓ Saved summary CSV to: {csv_path}")
+            logger.info("✓ Saved summary CSV to: %s", csv_path)
+    
+    def _save_sharded(self) -> None:
+        """Save results as per-capability shards plus a manifest."""
+        writer = ShardedForecastWriter(self.shard_dir, self.results['metadata'])
+        for cap_name, cap_data in self.results['capabilities'].items():
+            writer.write(cap_name, cap_data)
+        manifest = writer.close()
+        
+        logger.info("✓ Saved %d capability shards (%d nodes) to: %s",
+                    len(manifest['shards']['capabilities']), manifest['total_nodes'],
+                    writer.shard_dir)
+        logger.info("✓ Saved shard manifest to: %s", writer.manifest_path)
     
     def print_summary(self) -> None:
         """Print a summary of all forecasts."""
-        print(f"\n{'='*60}")
-        print("FORECAST SUMMARY")
-        print(f"{'='*60}")
+        logger.log(SUMMARY, "\n%s\nFORECAST SUMMARY\n%s", '=' * 60, '=' * 60)
         
         successful = sum(1 for c in self.results['capabilities'].values() if c['success'])
         failed = len(self.results['capabilities']) - successful
         
-        print(f"\nCapabilities processed: {len(self.results['capabilities'])}")
-        print(f"  ✓ Successful: {successful}")
-        print(f"  ✗ Failed: {failed}")
+        logger.log(SUMMARY, "Capabilities processed: %d (✓ %d successful, ✗ %d failed)",
+                   len(self.results['capabilities']), successful, failed,
+                   extra={'successful': successful, 'failed': failed})
         
         if successful > 0:
-            print(f"\nKey Predictions (90% threshold):")
-            print(f"{'Capability':<30} {'Date':<15} {'Days Until':<12} {'Current %'}")
-            print("-" * 70)
+            logger.log(SUMMARY, "\nKey Predictions (90% threshold):")
+            logger.log(SUMMARY, "%-30s %-15s %-12s %s", 'Capability', 'Date', 'Days Until', 'Current %')
+            logger.log(SUMMARY, "-" * 70)
             
             for cap_name, cap_data in self.results['capabilities'].items():
                 if not cap_data['success']:
@@ -342,22 +476,40 @@ class BatchForecaster:
                 if pred_90 and not pred_90.get('already_achieved'):
                     days = pred_90.get('days_until_threshold', 'N/A')
                     current = pred_90.get('current_predicted_performance', 0)
-                    print(f"{cap_name:<30} {pred_90['predicted_date']:<15} "
-                          f"{str(days):>11} {current:>10.1f}%")
+                    logger.log(SUMMARY, "%-30s %-15s %11s %10.1f%%",
+                               cap_name, pred_90['predicted_date'], days, current)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Forecast all capabilities")
+    parser.add_argument('--format', choices=['json', 'ndjson', 'sharded'], default='json',
+                        help="'ndjson' streams compact output per capability, "
+                             "'sharded' writes one file per capability plus a manifest")
+    parser.add_argument('--shard-dir', default='frontend/public/predictions/shards',
+                        help="Where --format sharded publishes shards (the directory "
+                             "the frontend serves /predictions/shards from)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Recompute every capability instead of reusing cached forecasts")
+    parser.add_argument('--profile-cpu', action='store_true',
+                        help="Include a cProfile capture in predictions/run_report.json")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="Include tracemalloc peak/top allocations in the run report")
+    add_logging_args(parser)
+    args = parser.parse_args()
+    configure_from_args(args)
+    
     # Path to your combined benchmarks file
     DATA_PATH = "data/intermediate/combined_benchmarks_cleaned.csv"
     
-    print("\n" + "="*60)
-    print("AI CAPABILITY FORECASTING")
-    print("="*60)
-    
     # Create forecaster
     batch = BatchForecaster(
         data_path=DATA_PATH,
-        output_dir="predictions"
+        output_dir="predictions",
+        output_format=args.format,
+        use_cache=not args.no_cache,
+        profile_cpu=args.profile_cpu,
+        profile_memory=args.profile_memory,
+        shard_dir=args.shard_dir
     )
     
     # Process all capabilities
@@ -368,4 +520,4 @@ if __name__ == "__main__":
         thresholds=[85, 90, 95]
     )
     
-    print("✅ COMPLETE! Files ready in ./predictions/")
\ No newline at end of file
+    logger.log(SUMMARY, "✅ COMPLETE! Files ready in ./predictions/")
\ No newline at end of file
@@ -7,6 +7,7 @@ import numpy as np
 import pandas as pd
 from scipy.optimize import curve_fit
 from scipy.stats import t
+import time
 import warnings
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
@@ -14,6 +15,10 @@ import json
 
 warnings.filterwarnings('ignore')
 
+# Bump whenever a change to fitting or prediction alters results,
+# so cached forecasts from older versions are not reused
+FORECASTER_VERSION = '1.0'
+
 
 class CapabilityForecaster:
     """
@@ -21,14 +26,19 @@ class CapabilityForecaster:
     Predicts "when will capability X reach 90% performance?"
     """
     
-    def __init__(self, saturation_point: float = 100.0):
+    def __init__(self, saturation_point: float = 100.0, n_samples: int = 10000):
         """
         Args:
             saturation_point: Maximum theoretical performance (default 100%)
+            n_samples: Monte Carlo samples used for confidence intervals
         """
         self.saturation_point = saturation_point
+        self.n_samples = n_samples
+        self.ci_method = 'monte_carlo'
         self.fitted_params = {}
         self.confidence_intervals = {}
+        # Per-capability work counters (fit evaluations, MC samples and time)
+        self.stats = {}
         
     @staticmethod
     def logistic_growth(t: np.ndarray, L: float, k: float, t0: float) -> np.ndarray:
@@ -77,14 +87,16 @@ class CapabilityForecaster:
             t0_init = t_numeric.mean()  # Midpoint
             
             # Fit the curve
-            popt, pcov = curve_fit(
+            popt, pcov, infodict, _, _ = curve_fit(
                 lambda t, k, t0: self.logistic_growth(t, L_init, k, t0),
                 t_numeric,
                 scores_array,
                 p0=[k_init, t0_init],
                 maxfev=10000,
-                bounds=([0.0001, -1000], [1, t_numeric.max() * 5])
+                bounds=([0.0001, -1000], [1, t_numeric.max() * 5]),
+                full_output=True
             )
+            self._stats(capability_name)['fit_nfev'] = int(infodict.get('nfev', 0))
             
             k_fitted, t0_fitted = popt
             L_fitted = L_init
@@ -198,7 +210,8 @@ class CapabilityForecaster:
             
             # Calculate confidence interval using parameter uncertainties
             # Use Monte Carlo sampling for uncertainty propagation
-            n_samples = 10000
+            mc_start = time.perf_counter()
+            n_samples = self.n_samples
             k_samples = np.random.normal(k, ci['k_std'], n_samples)
             t0_samples = np.random.normal(t0, ci['t0_std'], n_samples)
             
@@ -218,6 +231,12 @@ class CapabilityForecaster:
             t_lower = np.percentile(t_samples, lower_percentile)
             t_upper = np.percentile(t_samples, upper_percentile)
             
+            stats = self._stats(capability_name)
+            stats['mc_runs'] += 1
+            stats['mc_samples'] += n_samples
+            stats['mc_valid_samples'] += int(valid_mask.sum())
+            stats['mc_seconds'] += time.perf_counter() - mc_start
+            
             date_lower = reference_date + timedelta(days=float(t_lower))
             date_upper = reference_date + timedelta(days=float(t_upper))
             
@@ -251,6 +270,18 @@ class CapabilityForecaster:
                 'capability': capability_name
             }
     
+    def _stats(self, capability_name: str) -> Dict:
+        """Get (creating if needed) the work counters for a capability."""
+        if capability_name not in self.stats:
+            self.stats[capability_name] = {
+                'fit_nfev': 0,
+                'mc_runs': 0,
+                'mc_samples': 0,
+                'mc_valid_samples': 0,
+                'mc_seconds': 0.0
+            }
+        return self.stats[capability_name]
+    
     def generate_forecast_curve(self, 
                                 capability_name: str,
                                 days_ahead: int = 730) -> Dict:
@@ -1,35 +1,100 @@
 import json
 from pathlib import Path
 from datetime import datetime
+from sinkhole_db import SinkholeDB
+from sinkhole_grading import all_of, contains, numeric, regex, validator
+from sinkhole_similarity import SimilarityIndex
 
 class SinkholeCollector:
     """Collect genuinely challenging sinkhole tasks"""
     
-    def __init__(self):
+    def __init__(self, db_path=None, index_path=None, duplicate_threshold=0.9):
+        """
+        With db_path, tasks are written through to the SQLite store
+        (sinkhole_db.py): ids are allocated by the database and tasks whose
+        normalized text is already stored are updated instead of duplicated,
+        so several collection scripts can share one store.
+
+        With index_path, new tasks are added to the similarity index
+        (sinkhole_similarity.py) and any at least duplicate_threshold similar
+        to an indexed task are reported in self.near_duplicates.
+        """
         self.sinkholes = {}
         self.next_id = 1
-    
-    def add_sinkhole(self, task, category, expected_difficulty='trivial', why_hard='', correct_answer=''):
-        """Add a new sinkhole task"""
-        
-        sinkhole_id = f"sinkhole_{self.next_id:03d}"
-        self.next_id += 1
-        
-        self.sinkholes[sinkhole_id] = {
-            'id': sinkhole_id,
+        self.db = SinkholeDB(db_path) if db_path else None
+        self.index = SimilarityIndex(index_path) if index_path else None
+        self.duplicate_threshold = duplicate_threshold
+        self.near_duplicates = {}
+    
+    def add_sinkhole(self, task, category, expected_difficulty='trivial', why_hard='', correct_answer='',
+                     checker=None):
+        """
+        Add a new sinkhole task
+
+        checker is an optional sinkhole_grading spec used to auto-grade
+        answers; tasks without one are graded by hand.
+        """
+
+        record = self._record(task, category, expected_difficulty, why_hard, correct_answer, checker)
+
+        if self.db is not None:
+            fields = {k: v for k, v in record.items() if k not in ('task', 'category', 'results')}
+            sinkhole_id, _ = self.db.add_task(task, category, **fields)
+        else:
+            sinkhole_id = f"sinkhole_{self.next_id:03d}"
+            self.next_id += 1
+
+        self.sinkholes[sinkhole_id] = {'id': sinkhole_id, **record}
+        self._check_duplicates([(sinkhole_id, task)])
+        return sinkhole_id
+
+    def add_sinkholes(self, tasks):
+        """
+        Add many tasks at once (e.g. from sinkhole_generators.py); each dict
+        takes add_sinkhole's keyword arguments. With a database they are
+        written in a single transaction.
+        """
+        records = [self._record(**t) for t in tasks]
+
+        if self.db is not None:
+            ids = [sid for sid, _ in self.db.add_tasks(records)]
+        else:
+            ids = [f"sinkhole_{self.next_id + i:03d}" for i in range(len(records))]
+            self.next_id += len(records)
+
+        for sinkhole_id, record in zip(ids, records):
+            self.sinkholes[sinkhole_id] = {'id': sinkhole_id, **record}
+        self._check_duplicates([(sid, r['task']) for sid, r in zip(ids, records)])
+        return ids
+
+    def _check_duplicates(self, tasks):
+        """Index new tasks and report near-duplicates (of each other too)"""
+        if self.index is None:
+            return
+        self.index.add(tasks)
+        found = self.index.duplicates_of(tasks, self.duplicate_threshold)
+        self.near_duplicates.update(found)
+        for sid, near in list(found.items())[:5]:
+            other, score = near[0]
+            print(f"⚠️  {sid} looks like a near-duplicate of {other} (similarity {score:.2f})")
+        if len(found) > 5:
+            print(f"⚠️  ... {len(found) - 5} more near-duplicates (see near_duplicates)")
+
+    def _record(self, task, category, expected_difficulty='trivial', why_hard='', correct_answer='',
+                checker=None):
+        return {
             'task': task,
             'category': category,
             'expected_difficulty': expected_difficulty,
             'why_hard': why_hard,
             'correct_answer': correct_answer,
+            'checker': checker,
             'x': self._assign_x_position(category),
             'y': self._assign_y_position(category),
             'depth': -0.8,
             'results': {},
             'added_date': datetime.now().isoformat()
         }
-        
-        return sinkhole_id
     
     def _assign_x_position(self, category):
         positions = {
@@ -62,16 +127,22 @@ class SinkholeCollector:
         return positions.get(category, 0.2)
     
     def save(self, output_path='data/sinkhole_data/negatives.json'):
+        """Write negatives.json (with a database: every task in it, not just this run's)"""
+        sinkholes = self.sinkholes
+        if self.db is not None:
+            sinkholes = self.db.export_sinkholes(include_results=False)
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, 'w') as f:
-            json.dump(self.sinkholes, f, indent=2)
-        print(f"✓ Saved {len(self.sinkholes)} sinkholes to {output_path}")
+            json.dump(sinkholes, f, indent=2)
+        print(f"✓ Saved {len(sinkholes)} sinkholes to {output_path}")
+        if self.index is not None:
+            self.index.save()
 
 
-def create_hard_sinkholes():
+def create_hard_sinkholes(db_path=None, index_path=None):
     """Create sinkholes that ACTUALLY fail current SOTA models (2025)"""
     
-    collector = SinkholeCollector()
+    collector = SinkholeCollector(db_path, index_path)
     
     # MULTI-CONSTRAINT SATISFACTION
     
@@ -79,28 +150,33 @@ def create_hard_sinkholes():
         task="Generate a sentence where: every word starts with 'b', has exactly 5 words, forms a grammatically correct question, and the 3rd word must be a verb.",
         category="constrained_generation",
         correct_answer="Before breakfast, Bob buys bread?",
-        why_hard="Multiple simultaneous constraints cause models to drop at least one"
+        why_hard="Multiple simultaneous constraints cause models to drop at least one",
+        checker=all_of(validator('word_count', count=5), validator('letter_constraints', word_start='b'),
+                       regex(r'\?', scope='quoted'), partial=True)
     )
     
     collector.add_sinkhole(
         task="Write a palindrome sentence (reads same forwards and backwards) that is exactly 7 words long and mentions an animal.",
         category="constrained_generation",
         correct_answer="Example: 'Rats live on no evil star' (rat) - but needs to be exactly 7 words",
-        why_hard="Triple constraint: palindrome + length + semantic requirement"
+        why_hard="Triple constraint: palindrome + length + semantic requirement",
+        checker=all_of(validator('palindrome'), validator('word_count', count=7), partial=True)
     )
     
     collector.add_sinkhole(
         task="Create a sentence where each word has one more letter than the previous word, starting with 'I' (1 letter), and must reach a 6-letter word.",
         category="constrained_generation",
         correct_answer="I am the best friend (1,2,3,4,6)",
-        why_hard="Precise length progression tracking across generation"
+        why_hard="Precise length progression tracking across generation",
+        checker=validator('word_lengths', start=1, end=6)
     )
     
     collector.add_sinkhole(
         task="Write three sentences where: the first has 5 words, the second has 6 words, the third has 7 words, and all three must rhyme at the end.",
         category="constrained_generation",
         correct_answer="Example: 'Cats love to play.' / 'Dogs run around all day.' / 'Birds sing in trees in May.'",
-        why_hard="Length constraint + phonetic constraint simultaneously"
+        why_hard="Length constraint + phonetic constraint simultaneously",
+        checker=validator('sentence_word_counts', scope='full', counts=[5, 6, 7], partial=True)
     )
     
     # CHAINED SPATIAL TRANSFORMATIONS
@@ -109,14 +185,16 @@ def create_hard_sinkholes():
         task="I have blocks spelling 'HELLO'. I swap the 2nd and 4th blocks, then reverse the whole sequence. What word is spelled now?",
         category="spatial_reasoning",
         correct_answer="OLLHE (HELLO -> HLELO -> OLELH)",
-        why_hard="Chained spatial transformations with intermediate state tracking"
+        why_hard="Chained spatial transformations with intermediate state tracking",
+        checker=contains('OELLH', reject=['OLLHE'])
     )
     
     collector.add_sinkhole(
         task="Start with the word 'TRAIN'. Remove the 3rd letter, then move the last letter to the front, then replace all vowels with 'X'. What do you have?",
         category="string_manipulation",
         correct_answer="NTRXN (TRAIN -> TRAN -> NTRA -> NTRX... wait: TRAN -> NTRA -> NTRX)",
-        why_hard="Multi-step string operations requiring careful state management"
+        why_hard="Multi-step string operations requiring careful state management",
+        checker=contains('NTRX', reject=['NTRA', 'NTRXN'])
     )
     
     collector.add_sinkhole(
@@ -153,7 +231,8 @@ def create_hard_sinkholes():
         task="Answer this question only after reading the full message: What is 5 + 3? But wait, multiply your answer by 2 before responding.",
         category="retroactive_reasoning",
         correct_answer="16 (5+3=8, then 8*2=16)",
-        why_hard="Must hold initial computation and retroactively modify it"
+        why_hard="Must hold initial computation and retroactively modify it",
+        checker=numeric(16)
     )
     
     # COMPLEX STATE TRACKING
@@ -176,7 +255,8 @@ def create_hard_sinkholes():
         task="A light switch starts in the OFF position. Person A flips it, then Person B flips it, then Person C flips it, then Person A flips it again. Is the light on or off?",
         category="logic_puzzle",
         correct_answer="OFF (starts OFF, flip 1->ON, flip 2->OFF, flip 3->ON, flip 4->OFF)",
-        why_hard="Simple state tracking but easy to lose count"
+        why_hard="Simple state tracking but easy to lose count",
+        checker=contains('off', reject=['on'])
     )
     
     # PRECISE NUMERIC CONSTRAINTS
@@ -192,7 +272,8 @@ def create_hard_sinkholes():
         task="Create a 3x3 magic square (all rows, columns, and diagonals sum to the same number) using only odd numbers 1-17.",
         category="arithmetic",
         correct_answer="Multiple solutions exist, e.g., using 1,3,5,7,9,11,13,15,17 with sum=27 per line",
-        why_hard="Constraint satisfaction with numeric planning"
+        why_hard="Constraint satisfaction with numeric planning",
+        checker=validator('magic_square', scope='full', allowed=list(range(1, 18, 2)))
     )
     
     # ADVERSARIAL INSTRUCTION FOLLOWING
@@ -208,14 +289,17 @@ def create_hard_sinkholes():
         task="I'll tell you a rule, then ask you to break it. Rule: Always start your response with 'Indeed.' Now break the rule and tell me what 2+2 equals.",
         category="self_reference",
         correct_answer="Should NOT start with 'Indeed' - answer should be '4' or 'Four' or '2+2=4'",
-        why_hard="Must violate an established instruction deliberately"
+        why_hard="Must violate an established instruction deliberately",
+        checker=all_of(validator('not_starts_with', scope='full', prefix='Indeed'),
+                       regex(r'\b(4|four)\b', scope='full'))
     )
     
     collector.add_sinkhole(
         task="Complete this sentence with exactly 3 words, but I forbid you from using the letter 'e': 'The cat is ___'",
         category="constrained_generation",
         correct_answer="Examples: 'on a mat', 'big and fat', 'black and small'",
-        why_hard="Length constraint + letter exclusion constraint"
+        why_hard="Length constraint + letter exclusion constraint",
+        checker=all_of(validator('word_count', count=3), validator('letter_constraints', exclude='e'), partial=True)
     )
     
     # PHYSICAL SIMULATION EDGE CASES
@@ -247,14 +331,16 @@ def create_hard_sinkholes():
         task="Draw a 2x2 grid. Put an X in the top-left and bottom-right. Put an O in the other cells. Now rotate the grid 90 degrees clockwise. What's in the top-right cell?",
         category="spatial_reasoning",
         correct_answer="X (bottom-right moves to top-right after 90° clockwise rotation)",
-        why_hard="Mental rotation with labeled positions"
+        why_hard="Mental rotation with labeled positions",
+        checker=contains('X', reject=['O'])
     )
     
     collector.add_sinkhole(
         task="I have a 3x3x3 cube made of 27 smaller cubes. I remove all cubes that touch an edge but are not corner cubes. How many cubes remain?",
         category="spatial_reasoning",
         correct_answer="15 cubes (8 corners + 1 center + 6 face centers = 15)",
-        why_hard="Complex 3D combinatorics requiring precise categorization"
+        why_hard="Complex 3D combinatorics requiring precise categorization",
+        checker=numeric(15)
     )
     
     collector.add_sinkhole(
@@ -277,14 +363,17 @@ def create_hard_sinkholes():
         task="A clerk in a butcher shop is 5'10\" tall. What does he weigh?",
         category="logic_puzzle",
         correct_answer="Meat - he weighs meat (his job), not asking about his body weight",
-        why_hard="Linguistic ambiguity - 'what' vs 'how much'"
+        why_hard="Linguistic ambiguity - 'what' vs 'how much'",
+        checker=contains('meat')
     )
     
     collector.add_sinkhole(
         task="How many months have 28 days?",
         category="logic_puzzle",
         correct_answer="All 12 months (every month has at least 28 days)",
-        why_hard="Trick question - natural interpretation is 'only 28 days'"
+        why_hard="Trick question - natural interpretation is 'only 28 days'",
+        checker=regex(r'\ball\s+(of\s+them|12\b|twelve\b|(the\s+)?months)|\bevery\s+month\b|\b(12|twelve)\s+months\b',
+                      reject=r'\bonly\s+(one|1|february)\b')
     )
     
     # COUNTING WITH COMPLEX RULES
@@ -293,7 +382,8 @@ def create_hard_sinkholes():
         task="Count from 1 to 20, but skip multiples of 3, and also skip any number containing the digit 1. List the remaining numbers.",
         category="counting",
         correct_answer="2, 4, 5, 7, 8, 20 (6 numbers)",
-        why_hard="Multiple exclusion rules requiring precise filtering"
+        why_hard="Multiple exclusion rules requiring precise filtering",
+        checker=validator('integer_list', scope='full', values=[2, 4, 5, 7, 8, 20])
     )
     
     collector.add_sinkhole(
@@ -307,7 +397,8 @@ def create_hard_sinkholes():
         task="In the word 'BOOKKEEPER', how many times do two consecutive identical letters appear?",
         category="counting",
         correct_answer="3 times (OO, KK, EE)",
-        why_hard="Pattern matching with specific substring constraint"
+        why_hard="Pattern matching with specific substring constraint",
+        checker=numeric(3)
     )
     
     # RECURSIVE SELF-MODIFICATION
@@ -316,7 +407,8 @@ def create_hard_sinkholes():
         task="Write a sentence that accurately describes the exact number of words it contains.",
         category="self_reference",
         correct_answer="Example: 'This sentence has exactly seven words in it.' (8 words - wait that's wrong!)",
-        why_hard="Self-referential requirement requiring iterative solving for fixed point"
+        why_hard="Self-referential requirement requiring iterative solving for fixed point",
+        checker=validator('self_describing_word_count')
     )
     
     collector.add_sinkhole(
@@ -339,21 +431,24 @@ def create_hard_sinkholes():
         task="Meeting A is 2 hours after Meeting B. Meeting B is 30 minutes before Meeting C. If Meeting C is at 3:00 PM, what time is Meeting A?",
         category="temporal",
         correct_answer="4:30 PM (C=3:00, so B=2:30, so A=4:30)",
-        why_hard="Chained temporal dependencies requiring backtracking"
+        why_hard="Chained temporal dependencies requiring backtracking",
+        checker=regex(r'\b4:30\b')
     )
     
     collector.add_sinkhole(
         task="If it takes 5 machines 5 minutes to make 5 widgets, how long does it take 100 machines to make 100 widgets?",
         category="arithmetic",
         correct_answer="5 minutes (rate is 1 widget per machine per 5 minutes)",
-        why_hard="Proportional reasoning trick question"
+        why_hard="Proportional reasoning trick question",
+        checker=numeric(5)
     )
     
     collector.add_sinkhole(
         task="Today is Thursday. What day of the week will it be 100 days from now?",
         category="temporal",
         correct_answer="Saturday (100 mod 7 = 2, so Thursday + 2 = Saturday)",
-        why_hard="Modular arithmetic with day-of-week cycling"
+        why_hard="Modular arithmetic with day-of-week cycling",
+        checker=contains('saturday')
     )
     
     # NEGATION AND CONTRADICTION
@@ -376,7 +471,9 @@ def create_hard_sinkholes():
         task="Give me a word that doesn't contain any of these letters: e, t, a, o, i, n, s, r",
         category="constrained_generation",
         correct_answer="Example: 'fly', 'up', 'my', 'by' (avoiding most common English letters)",
-        why_hard="Massive letter exclusion makes finding words very difficult"
+        why_hard="Massive letter exclusion makes finding words very difficult",
+        checker=all_of(validator('word_count', count=1), validator('letter_constraints', exclude='etaoinsr'),
+                       partial=True)
     )
     
     # MULTI-STEP ARITHMETIC WITH TRAPS
@@ -385,21 +482,24 @@ def create_hard_sinkholes():
         task="I have $100. I spend half of what I have, then I find $20. Then I spend half of what I have now. How much do I have left?",
         category="arithmetic",
         correct_answer="$35 (100/2=50, 50+20=70, 70/2=35)",
-        why_hard="Sequential operations with intermediate calculations"
+        why_hard="Sequential operations with intermediate calculations",
+        checker=numeric(35)
     )
     
     collector.add_sinkhole(
         task="A bat and a ball cost $1.10 together. The bat costs $1 more than the ball. How much does the ball cost?",
         category="arithmetic",
         correct_answer="$0.05 (not $0.10 - that's the intuitive wrong answer)",
-        why_hard="Classic cognitive bias problem - intuitive answer is wrong"
+        why_hard="Classic cognitive bias problem - intuitive answer is wrong",
+        checker=regex(r'\$?0?\.05\b|\b(5|five) cents\b', reject=r'\$?0?\.10\b|\b(10|ten) cents\b')
     )
     
     collector.add_sinkhole(
         task="If you flip a fair coin 10 times and get heads every time, what's the probability the next flip is heads?",
         category="arithmetic",
         correct_answer="50% (coin has no memory - gambler's fallacy trap)",
-        why_hard="Tests understanding of independent probability vs intuition"
+        why_hard="Tests understanding of independent probability vs intuition",
+        checker=regex(r'\b50\s*(%|percent)|\b1/2\b|\b0?\.5\b|\bhalf\b')
     )
     
     # Save
@@ -427,4 +527,14 @@ def create_hard_sinkholes():
 
 
 if __name__ == '__main__':
-    collector = create_hard_sinkholes()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Build the sinkhole task set")
+    parser.add_argument('--db', metavar='PATH',
+                        help="Also write tasks to this SQLite store (e.g. data/sinkhole_data/sinkholes.db)")
+    parser.add_argument('--index', metavar='PATH',
+                        help="Flag near-duplicates against this similarity index "
+                             "(e.g. data/sinkhole_data/task_vectors.npz)")
+    args = parser.parse_args()
+    
+    collector = create_hard_sinkholes(args.db, args.index)
\ No newline at end of file
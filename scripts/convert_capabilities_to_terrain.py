@@ -2,6 +2,10 @@
 Convert Capabilities Heights JSON to Rendering-Ready Terrain Map Format
 Optimized for 3D graphics engines (Three.js, WebGL, Unity, etc.)
 
+The terrain is built as a structure of arrays (build_terrain_arrays):
+float32 positions and colors, uint32 indices and a metadata column store.
+The JSON and binary exporters serialize from those arrays.
+
 Output format:
 - vertices: flat array of [x, y, z] coordinates
 - metadata: parallel array with hover data
@@ -16,6 +20,18 @@ from typing import Dict, List, Tuple
 from terrain_colors import CAPABILITY_COLORS, get_capability_color, CATEGORY_GROUPS
 
 
+def _json_floats(values, decimals=4):
+    """
+    float32 values as (nested lists of) Python floats for JSON: rounded to
+    float32's ~7 significant digits and at most `decimals` decimal places,
+    so 0.65 stays 0.65 rather than 0.6499999761581421
+    """
+    values = np.asarray(values, dtype=np.float64)
+    magnitude = np.floor(np.log10(np.maximum(np.abs(values), 1e-30)))
+    scale = 10.0 ** np.clip(6 - magnitude, 0, decimals)
+    return (np.round(values * scale) / scale).tolist()
+
+
 class RenderingTerrainConverter:
     """
     Convert capabilities to rendering-optimized format
@@ -39,42 +55,80 @@ class RenderingTerrainConverter:
             print(f"Warning: {org_name} not found, using 'all'")
             self.org_filter = 'all'
     
-    def _calculate_velocity(self, heights_dict):
-        """Calculate improvement velocity"""
-        if len(heights_dict) < 2:
-            return {
-                'velocity': 0.0,
-                'trend': 'stable',
-                'acceleration': 0.0
-            }
-        
-        years = sorted([int(y) for y in heights_dict.keys()])
-        scores = [heights_dict[str(y)] for y in years]
-        
-        velocities = []
-        for i in range(1, len(scores)):
-            year_diff = years[i] - years[i-1]
-            score_diff = scores[i] - scores[i-1]
-            velocity = (score_diff / scores[i-1]) * 100 / year_diff if scores[i-1] > 0 else 0
-            velocities.append(velocity)
+    def _calculate_velocities(self, org_data):
+        """
+        Calculate improvement velocity for every capability at once
         
-        avg_velocity = np.mean(velocities) if velocities else 0
+        Heights go into a capability x year matrix (NaN where a capability
+        has no score); each capability's velocities are the % change per
+        year between consecutive years it has scores for.
         
-        acceleration = 0.0
-        trend = 'stable'
-        if len(velocities) >= 2:
-            acceleration = velocities[-1] - velocities[-2]
-            if acceleration > 0.5:
-                trend = 'accelerating'
-            elif acceleration < -0.5:
-                trend = 'decelerating'
+        Returns {capability_name: velocity data}
+        """
+        names = list(org_data)
+        heights = [org_data[name].get('heights', {}) for name in names]
+        years = np.array(sorted({int(y) for h in heights for y in h}), dtype=float)
+        column = {int(y): i for i, y in enumerate(years)}
+        
+        scores = np.full((len(names), len(years)), np.nan)
+        for row, h in enumerate(heights):
+            for year, score in h.items():
+                scores[row, column[int(year)]] = score
+        present = ~np.isnan(scores)
+        
+        # Column of each score's previous score in the same row (-1 if none)
+        seen = np.where(present, np.arange(len(years)), -1)
+        previous = np.full_like(seen, -1)
+        if len(years) > 1:
+            previous[:, 1:] = np.maximum.accumulate(seen, axis=1)[:, :-1]
+        has_velocity = present & (previous >= 0)
+        
+        rows = np.arange(len(names))[:, None]
+        prev_scores = scores[rows, np.maximum(previous, 0)]
+        year_diff = years[None, :] - years[np.maximum(previous, 0)]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            velocity = (scores - prev_scores) / prev_scores * 100 / year_diff
+        velocity = np.where(has_velocity & (prev_scores > 0), velocity, 0.0)
+        
+        counts = has_velocity.sum(axis=1)
+        avg_velocity = np.where(has_velocity, velocity, 0.0).sum(axis=1) / np.maximum(counts, 1)
+        
+        # Last two velocities per row: positions of the last and second-last
+        # True in has_velocity
+        order = np.cumsum(has_velocity, axis=1)
+        last = np.where(has_velocity & (order == counts[:, None]), velocity, 0.0).sum(axis=1)
+        second_last = np.where(has_velocity & (order == counts[:, None] - 1), velocity, 0.0).sum(axis=1)
+        acceleration = np.where(counts >= 2, last - second_last, 0.0)
+        
+        velocities = {}
+        for row, name in enumerate(names):
+            if present[row].sum() < 2:
+                velocities[name] = {
+                    'velocity': 0.0,
+                    'trend': 'stable',
+                    'acceleration': 0.0
+                }
+                continue
+            
+            trend = 'stable'
+            if counts[row] >= 2:
+                if acceleration[row] > 0.5:
+                    trend = 'accelerating'
+                elif acceleration[row] < -0.5:
+                    trend = 'decelerating'
+            
+            velocities[name] = {
+                'velocity': round(float(avg_velocity[row]), 2),
+                'trend': trend,
+                'acceleration': round(float(acceleration[row]), 2),
+                'recent_velocity': round(float(last[row]), 2) if counts[row] else 0
+            }
         
-        return {
-            'velocity': round(float(avg_velocity), 2),
-            'trend': trend,
-            'acceleration': round(float(acceleration), 2),
-            'recent_velocity': round(float(velocities[-1]), 2) if velocities else 0
-        }
+        return velocities
+    
+    def _calculate_velocity(self, heights_dict):
+        """Calculate improvement velocity for a single capability's heights"""
+        return self._calculate_velocities({'_': {'heights': heights_dict}})['_']
     
     def _get_capability_color(self, capability_name, velocity=0):
         """
@@ -95,130 +149,135 @@ class RenderingTerrainConverter:
         
         return base_color
     
-    def _create_vertex_data(self, capability_name, capability_data, year, model_info):
+    def build_terrain_arrays(self):
         """
-        Create vertex and metadata for a single point
-        Returns (vertex, metadata, color)
-        """
-        # Get position
-        x = capability_data.get('x', 0.5)
-        y = capability_data.get('y', 0.5)
-        
-        # Height is the score
-        height = capability_data['heights'].get(str(year), 0)
-        z = height * 100 if height < 1 else height
-        
-        # Vertex position [x, y, z]
-        vertex = [round(float(x), 4), round(float(y), 4), round(float(z), 4)]
-        
-        # Calculate velocity
-        velocity_data = self._calculate_velocity(capability_data.get('heights', {}))
-        
-        # Get color using unified scheme
-        color = self._get_capability_color(capability_name, velocity_data['velocity'])
-        
-        # Metadata for hover
-        metadata = {
-            'type': 'baseline',  # Mark as baseline node
-            'capability': capability_name,
-            'capability_display': capability_data.get('name', capability_name),
-            'model': model_info.get('model', 'Unknown'),
-            'organization': model_info.get('org', 'Unknown'),
-            'release_date': model_info.get('date', f'{year}-01-01'),
-            'benchmark': model_info.get('benchmark', 'Unknown'),
-            'score': round(float(model_info.get('score', 0)), 4),
-            'normalized_score': round(float(model_info.get('normalized_score', model_info.get('score', 0))), 4),
-            'category': capability_data.get('category', 'unknown'),
-            'description': capability_data.get('description', ''),
-            'velocity': velocity_data['velocity'],
-            'velocity_trend': velocity_data['trend'],
-            'year': year
-        }
-        
-        return vertex, metadata, color
-    
-    def convert_to_rendering_format(self):
-        """
-        Convert to rendering-optimized format
+        Build the terrain as a structure of arrays, in one pass over the
+        top models
         
         Returns:
         {
-            'vertices': [[x, y, z], [x, y, z], ...],  # Flat array of positions
-            'metadata': [{...}, {...}, ...],           # Parallel array with hover data
-            'colors': [[r, g, b], [r, g, b], ...],    # Per-vertex colors (from unified scheme)
-            'indices': [0, 1, 2, 3, 4, 5, ...],       # For indexed rendering
+            'positions': float32 (n, 3) [x, y, z],
+            'colors': float32 (n, 3) [r, g, b],       # From unified scheme
+            'indices': uint32 (n,),
+            'columns': {field: per-vertex values},    # Metadata column store
+            'velocities': {capability: velocity data},
             'bounds': {min_x, max_x, min_y, max_y, min_z, max_z},
-            'config': {...}
+            'stats': {...}, 'config': {...},
+            'generated_at': ..., 'organization_filter': ...
         }
+        
+        Capability-level fields (display name, category, description,
+        velocity) are looked up by the 'capability' column when records are
+        serialized (see _metadata_records).
         """
         if self.org_filter not in self.capabilities:
             raise ValueError(f"Organization filter '{self.org_filter}' not found in data")
         
         org_data = self.capabilities[self.org_filter]
         
-        vertices = []
-        metadata = []
-        colors = []
+        # Velocity and velocity-adjusted color, once per capability
+        velocities = self._calculate_velocities(org_data)
+        capability_colors = {
+            name: self._get_capability_color(name, velocity['velocity'])
+            for name, velocity in velocities.items()
+        }
+        
+        # Size the arrays up front: at most one vertex per top model per year
+        capacity = sum(
+            len(models_list)
+            for capability_data in org_data.values()
+            for models_list in capability_data.get('top_models', {}).values()
+            if isinstance(models_list, list)
+        )
+        
+        positions = np.empty((capacity, 3), dtype=np.float32)
+        colors = np.empty((capacity, 3), dtype=np.float32)
+        columns = {
+            'capability': [], 'model': [], 'organization': [],
+            'release_date': [], 'benchmark': [],
+            'score': np.empty(capacity), 'normalized_score': np.empty(capacity),
+            'year': np.empty(capacity, dtype=np.int32)
+        }
         
-        # Process each capability
+        n = 0
         for capability_name, capability_data in org_data.items():
-            top_models = capability_data.get('top_models', {})
+            x = capability_data.get('x', 0.5)
+            y = capability_data.get('y', 0.5)
             
-            for year_str, models_list in top_models.items():
+            for year_str, models_list in capability_data.get('top_models', {}).items():
+                if not isinstance(models_list, list):
+                    continue
                 try:
                     year = int(year_str)
-                    for model_info in models_list:
-                        vertex, meta, color = self._create_vertex_data(
-                            capability_name,
-                            capability_data,
-                            year,
-                            model_info
-                        )
-                        vertices.append(vertex)
-                        metadata.append(meta)
-                        colors.append(color)
+                    # Height is the score
+                    height = capability_data['heights'].get(str(year), 0)
+                    z = height * 100 if height < 1 else height
                 except (ValueError, TypeError):
                     continue
-        
-        # Create indices (simple sequential for point cloud)
-        indices = list(range(len(vertices)))
-        
-        # Calculate bounds
-        vertices_array = np.array(vertices)
+                
+                for model_info in models_list:
+                    try:
+                        score = float(model_info.get('score', 0))
+                        normalized_score = float(model_info.get('normalized_score', model_info.get('score', 0)))
+                    except (ValueError, TypeError):
+                        continue
+                    positions[n] = (x, y, z)
+                    colors[n] = capability_colors[capability_name]
+                    columns['capability'].append(capability_name)
+                    columns['model'].append(model_info.get('model', 'Unknown'))
+                    columns['organization'].append(model_info.get('org', 'Unknown'))
+                    columns['release_date'].append(model_info.get('date', f'{year}-01-01'))
+                    columns['benchmark'].append(model_info.get('benchmark', 'Unknown'))
+                    columns['score'][n] = score
+                    columns['normalized_score'][n] = normalized_score
+                    columns['year'][n] = year
+                    n += 1
+        
+        positions, colors = positions[:n], colors[:n]
+        for field in ('score', 'normalized_score', 'year'):
+            columns[field] = columns[field][:n]
+        
+        # Bounds and stats as array reductions
+        low = positions.min(axis=0) if n else np.zeros(3, dtype=np.float32)
+        high = positions.max(axis=0) if n else np.zeros(3, dtype=np.float32)
+        low, high = _json_floats(low), _json_floats(high)
         bounds = {
-            'min_x': float(vertices_array[:, 0].min()),
-            'max_x': float(vertices_array[:, 0].max()),
-            'min_y': float(vertices_array[:, 1].min()),
-            'max_y': float(vertices_array[:, 1].max()),
-            'min_z': float(vertices_array[:, 2].min()),
-            'max_z': float(vertices_array[:, 2].max())
+            'min_x': low[0], 'max_x': high[0],
+            'min_y': low[1], 'max_y': high[1],
+            'min_z': low[2], 'max_z': high[2]
         }
         
-        # Get unique capabilities for legend (using unified color scheme)
-        capabilities_list = list(set(m['capability'] for m in metadata))
+        capabilities_list, capability_counts = np.unique(
+            np.array(columns['capability'], dtype=str), return_counts=True
+        )
+        release_dates = np.array(columns['release_date'], dtype=str)
+        known_dates = np.unique(release_dates[release_dates != 'Unknown'])
+        
+        # Legend for unique capabilities (using unified color scheme)
         capability_legend = {
-            cap: {
-                'color': get_capability_color(cap),
-                'count': sum(1 for m in metadata if m['capability'] == cap),
+            str(cap): {
+                'color': get_capability_color(str(cap)),
+                'count': int(count),
                 'category_group': next((group for group, caps in CATEGORY_GROUPS.items() if cap in caps), 'Other')
             }
-            for cap in capabilities_list
+            for cap, count in zip(capabilities_list, capability_counts)
         }
         
         return {
-            'vertices': vertices,
-            'metadata': metadata,
+            'positions': positions,
             'colors': colors,
-            'indices': indices,
+            'indices': np.arange(n, dtype=np.uint32),  # Simple sequential for point cloud
+            'columns': columns,
+            'velocities': velocities,
             'bounds': bounds,
             'stats': {
-                'total_points': len(vertices),
-                'capabilities': len(set(m['capability'] for m in metadata)),
-                'models': len(set(m['model'] for m in metadata)),
-                'organizations': len(set(m['organization'] for m in metadata)),
+                'total_points': n,
+                'capabilities': len(capabilities_list),
+                'models': len(np.unique(np.array(columns['model'], dtype=str))),
+                'organizations': len(np.unique(np.array(columns['organization'], dtype=str))),
                 'date_range': {
-                    'earliest': min((m['release_date'] for m in metadata if m['release_date'] != 'Unknown'), default='Unknown'),
-                    'latest': max((m['release_date'] for m in metadata if m['release_date'] != 'Unknown'), default='Unknown')
+                    'earliest': str(known_dates[0]) if len(known_dates) else 'Unknown',
+                    'latest': str(known_dates[-1]) if len(known_dates) else 'Unknown'
                 }
             },
             'config': {
@@ -242,6 +301,64 @@ class RenderingTerrainConverter:
             'organization_filter': self.org_filter
         }
     
+    def _metadata_records(self, arrays):
+        """Per-vertex hover metadata, built from the column store"""
+        org_data = self.capabilities[arrays['organization_filter']]
+        columns = arrays['columns']
+        velocities = arrays['velocities']
+        scores = np.round(columns['score'], 4).tolist()
+        normalized_scores = np.round(columns['normalized_score'], 4).tolist()
+        
+        records = []
+        for i, capability_name in enumerate(columns['capability']):
+            capability_data = org_data[capability_name]
+            records.append({
+                'type': 'baseline',  # Mark as baseline node
+                'capability': capability_name,
+                'capability_display': capability_data.get('name', capability_name),
+                'model': columns['model'][i],
+                'organization': columns['organization'][i],
+                'release_date': columns['release_date'][i],
+                'benchmark': columns['benchmark'][i],
+                'score': scores[i],
+                'normalized_score': normalized_scores[i],
+                'category': capability_data.get('category', 'unknown'),
+                'description': capability_data.get('description', ''),
+                'velocity': velocities[capability_name]['velocity'],
+                'velocity_trend': velocities[capability_name]['trend'],
+                'year': int(columns['year'][i])
+            })
+        return records
+    
+    def convert_to_rendering_format(self):
+        """
+        Convert to rendering-optimized format
+        
+        Returns:
+        {
+            'vertices': [[x, y, z], [x, y, z], ...],  # Flat array of positions
+            'metadata': [{...}, {...}, ...],           # Parallel array with hover data
+            'colors': [[r, g, b], [r, g, b], ...],    # Per-vertex colors (from unified scheme)
+            'indices': [0, 1, 2, 3, 4, 5, ...],       # For indexed rendering
+            'bounds': {min_x, max_x, min_y, max_y, min_z, max_z},
+            'config': {...}
+        }
+        """
+        return self._to_json_format(self.build_terrain_arrays())
+    
+    def _to_json_format(self, arrays):
+        return {
+            'vertices': _json_floats(arrays['positions']),
+            'metadata': self._metadata_records(arrays),
+            'colors': _json_floats(arrays['colors'], decimals=6),
+            'indices': arrays['indices'].tolist(),
+            'bounds': arrays['bounds'],
+            'stats': arrays['stats'],
+            'config': arrays['config'],
+            'generated_at': arrays['generated_at'],
+            'organization_filter': arrays['organization_filter']
+        }
+    
     def export_to_json(self, output_path):
         """Export to JSON file"""
         terrain_data = self.convert_to_rendering_format()
@@ -270,28 +387,28 @@ class RenderingTerrainConverter:
         - Color data (float32)
         - Index data (uint32)
         """
-        terrain_data = self.convert_to_rendering_format()
+        arrays = self.build_terrain_arrays()
         
-        # Convert to binary
-        vertices_bin = np.array(terrain_data['vertices'], dtype=np.float32).tobytes()
-        colors_bin = np.array(terrain_data['colors'], dtype=np.float32).tobytes()
-        indices_bin = np.array(terrain_data['indices'], dtype=np.uint32).tobytes()
+        # Array data is written as built (already float32 / uint32)
+        vertices_bin = arrays['positions'].tobytes()
+        colors_bin = arrays['colors'].tobytes()
+        indices_bin = arrays['indices'].tobytes()
         
         # Create metadata without the large arrays
         metadata_json = {
-            'metadata': terrain_data['metadata'],
-            'stats': terrain_data['stats'],
-            'config': terrain_data['config'],
-            'bounds': terrain_data['bounds'],
-            'organization_filter': terrain_data['organization_filter'],
-            'generated_at': terrain_data['generated_at'],
+            'metadata': self._metadata_records(arrays),
+            'stats': arrays['stats'],
+            'config': arrays['config'],
+            'bounds': arrays['bounds'],
+            'organization_filter': arrays['organization_filter'],
+            'generated_at': arrays['generated_at'],
             'binary_layout': {
                 'vertices_offset': 0,
-                'vertices_count': len(terrain_data['vertices']),
+                'vertices_count': len(arrays['positions']),
                 'colors_offset': 0,
-                'colors_count': len(terrain_data['colors']),
+                'colors_count': len(arrays['colors']),
                 'indices_offset': 0,
-                'indices_count': len(terrain_data['indices'])
+                'indices_count': len(arrays['indices'])
             }
         }
         
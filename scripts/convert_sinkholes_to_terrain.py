@@ -1,19 +1,40 @@
 """
-Convert Sinkhole Evaluation Markdown to Terrain Map Format
+Convert Sinkhole Evaluations to Terrain Map Format
 Extracts model failures/vulnerabilities and maps them to terrain sinkholes
 
+Evaluations are read from the structured store
+(data/sinkhole_data/evaluations.json, see sinkhole_evaluations.py); the
+markdown parser remains for migrating hand-graded markdown into the store.
+
 Each sinkhole includes:
-- Position (x, y, negative z for depth)
+- Position (x, y, negative z for depth), laid out deterministically
+  around its category (see sinkhole_layout.py)
 - Failure metadata (which models failed, why)
+- The nearest capability peaks, their heights and the gap down to the
+  sinkhole (see sinkhole_links.py)
 - Severity scoring
+
+Scoring works on a dense tasks x models matrix of failure rates
+(build_result_matrix); severity, depth and the stats are array reductions
+over it (score_matrix).
 """
 
 import json
-import re
+import os
 import numpy as np
 from typing import Dict, List, Tuple, Optional
+from sinkhole_evaluations import EvaluationStore, display_name, tokenize_evaluation_markdown
+from sinkhole_layout import SinkholeLayout
+from sinkhole_links import CapabilityLinker, load_capabilities
+from sinkhole_similarity import SimilarityIndex
 from terrain_colors import SINKHOLE_COLORS, get_sinkhole_color
 
+# Severity by mean failure rate across models, and the depth each starts from;
+# critical is kept for sinkholes every graded answer failed
+SEVERITY_LEVELS = ('low', 'medium', 'high', 'critical')
+SEVERITY_THRESHOLDS = np.array([0.5, 0.75])
+BASE_DEPTHS = np.array([-20.0, -40.0, -60.0, -80.0])
+
 
 class SinkholeToTerrainConverter:
     """
@@ -21,7 +42,19 @@ class SinkholeToTerrainConverter:
     Uses unified color scheme from terrain_colors.py
     """
     
-    def __init__(self):
+    def __init__(self, peaks: Optional[List[Tuple[float, float]]] = None,
+                 index_path: Optional[str] = None,
+                 capabilities: Optional[List[Dict]] = None):
+        """
+        Args:
+            peaks: Capability (x, y) positions sinkholes are kept clear of
+                (see sinkhole_layout.load_capability_peaks)
+            index_path: Similarity index (sinkhole_similarity.py) used to
+                place similar sinkholes of a category next to each other;
+                only sinkholes already indexed are matched (main() indexes them)
+            capabilities: Capabilities to link each sinkhole to (see
+                sinkhole_links.load_capabilities)
+        """
         # Category to position mapping (aligns with capabilities)
         self.category_positions = {
             'constrained_generation': (0.2, 0.3),  # language area
@@ -36,126 +69,131 @@ class SinkholeToTerrainConverter:
             'counting': (0.4, 0.4)                  # basic tasks
         }
         
+        # Deterministic placement around those points, seeded by sinkhole id
+        self.layout = SinkholeLayout(self.category_positions, peaks=peaks)
+        self.index = SimilarityIndex(index_path) if index_path else None
+        self.linker = CapabilityLinker(capabilities) if capabilities else None
+        
         # Use unified color scheme (imported from terrain_colors.py)
         # No longer defining colors here - single source of truth!
+    
+    def load_evaluations(self, store_path: str = 'data/sinkhole_data/evaluations.json') -> List[Dict]:
+        """
+        Read graded sinkholes straight from the evaluation store
+        Returns the same records as parse_markdown
+        """
+        return EvaluationStore(store_path).records()
         
     def parse_markdown(self, md_content: str) -> List[Dict]:
         """
         Parse markdown file and extract sinkhole data
-        Returns list of sinkhole records
+        Returns list of sinkhole records, with every ### MODEL block found
+        
+        Single linear pass over the lines (see tokenize_evaluation_markdown)
         """
         sinkholes = []
+        current = None
+        model = None
         
-        # Split by sinkhole sections (## sinkhole_XXX)
-        sections = re.split(r'##\s+sinkhole_\d+', md_content)
-        
-        for section in sections[1:]:  # Skip header
-            sinkhole = self._parse_sinkhole_section(section)
-            if sinkhole:
-                sinkholes.append(sinkhole)
-        
-        return sinkholes
-    
-    def _parse_sinkhole_section(self, section: str) -> Optional[Dict]:
-        """Parse a single sinkhole section"""
-        
-        # Extract task
-        task_match = re.search(r'\*\*Task:\*\*\s+(.+?)(?=\n\n|\*\*)', section, re.DOTALL)
-        if not task_match:
-            return None
-        task = task_match.group(1).strip()
-        
-        # Extract category
-        category_match = re.search(r'\*\*Category:\*\*\s+(\w+)', section)
-        category = category_match.group(1) if category_match else 'unknown'
-        
-        # Extract expected answer
-        expected_match = re.search(r'\*\*Expected Answer:\*\*\s+(.+?)(?=\n\n|###)', section, re.DOTALL)
-        expected = expected_match.group(1).strip() if expected_match else ''
-        
-        # Extract model evaluations
-        models = {}
+        for kind, value in tokenize_evaluation_markdown(md_content):
+            if kind == 'section':
+                current = {'id': value, 'task': None, 'category': 'unknown',
+                           'expected_answer': '', 'models': {}}
+                model = None
+                sinkholes.append(current)
+            elif current is None:
+                continue  # file header
+            elif kind == 'field':
+                name, text = value
+                if name == 'Task':
+                    current['task'] = text
+                elif name == 'Category':
+                    current['category'] = text.split()[0] if text.split() else 'unknown'
+                elif name == 'Expected Answer':
+                    current['expected_answer'] = text
+                elif name == 'Evaluation' and model is not None:
+                    model['evaluation'] = text
+            elif kind == 'model':
+                model = {'name': display_name(value.lower()), 'response': '',
+                         'correct': None, 'evaluation': ''}
+                current.setdefault('_blocks', []).append(model)
+            elif kind == 'response' and model is not None:
+                model['response'] = value
+            elif kind == 'verdict' and model is not None:
+                model['correct'] = value
         
-        # Find CLAUDE section
-        claude_section = re.search(r'###\s+CLAUDE\s+```(.+?)```\s+\*\*Correct\?\*\*\s+\[([ X])\]\s+Yes\s+\[([ X])\]\s+No\s+\*\*Evaluation:\*\*\s+(.+?)(?=###|---|\Z)', 
-                                   section, re.DOTALL)
-        if claude_section:
-            models['Claude'] = {
-                'response': claude_section.group(1).strip(),
-                'correct': 'X' in claude_section.group(2),
-                'evaluation': claude_section.group(4).strip()
-            }
-        
-        # Find GROK section
-        grok_section = re.search(r'###\s+GROK\s+```(.+?)```\s+\*\*Correct\?\*\*\s+\[([ X])\]\s+Yes\s+\[([ X])\]\s+No\s+\*\*Evaluation:\*\*\s+(.+?)(?=###|---|\Z)', 
-                                 section, re.DOTALL)
-        if grok_section:
-            models['Grok'] = {
-                'response': grok_section.group(1).strip(),
-                'correct': 'X' in grok_section.group(2),
-                'evaluation': grok_section.group(4).strip()
-            }
+        records = []
+        for sinkhole in sinkholes:
+            blocks = sinkhole.pop('_blocks', [])
+            if sinkhole['task'] is None:
+                continue
+            for block in blocks:
+                if block['correct'] is not None:  # unticked blocks are ungraded
+                    sinkhole['models'][block.pop('name')] = block
+            records.append(sinkhole)
         
-        return {
-            'task': task,
-            'category': category,
-            'expected_answer': expected,
-            'models': models
-        }
+        return records
     
-    def _calculate_severity(self, sinkhole_data: Dict) -> str:
+    def _failure_rate(self, model_data: Dict) -> float:
         """
-        Calculate severity based on how many models failed
+        Share of a model's answers that failed: 1 - pass rate for
+        multi-sample evaluations, else 0 or 1 from the single verdict
         """
-        models = sinkhole_data['models']
-        failed_count = sum(1 for m in models.values() if not m['correct'])
-        
-        if failed_count == len(models):
-            return 'critical'  # All models failed
-        elif failed_count >= len(models) * 0.75:
-            return 'high'
-        elif failed_count >= len(models) * 0.5:
-            return 'medium'
-        else:
-            return 'low'
+        if model_data.get('pass_rate') is not None:
+            return 1.0 - model_data['pass_rate']
+        return 0.0 if model_data['correct'] else 1.0
     
-    def _calculate_depth(self, severity: str, models_data: Dict) -> float:
-        """
-        Calculate sinkhole depth (negative z value)
-        Deeper = more severe
+    def build_result_matrix(self, sinkholes: List[Dict]) -> Tuple[List[str], np.ndarray]:
         """
-        base_depths = {
-            'critical': -80.0,
-            'high': -60.0,
-            'medium': -40.0,
-            'low': -20.0
-        }
+        Dense tasks x models matrix of failure rates (see _failure_rate)
         
-        depth = base_depths.get(severity, -30.0)
+        Returns:
+            (models in first-seen order, float array of shape
+            (len(sinkholes), len(models)); NaN where a model was not graded)
+        """
+        models = []
+        columns = {}
+        for sinkhole in sinkholes:
+            for name in sinkhole['models']:
+                if name not in columns:
+                    columns[name] = len(models)
+                    models.append(name)
         
-        # Add jitter for failed models
-        failed_count = sum(1 for m in models_data.values() if not m['correct'])
-        depth -= failed_count * 5  # Each failure adds depth
+        failure = np.full((len(sinkholes), len(models)), np.nan)
+        for row, sinkhole in enumerate(sinkholes):
+            for name, data in sinkhole['models'].items():
+                failure[row, columns[name]] = self._failure_rate(data)
         
-        return depth
+        return models, failure
     
-    def _get_position(self, category: str, index: int) -> Tuple[float, float]:
+    def score_matrix(self, failure: np.ndarray) -> Dict[str, np.ndarray]:
         """
-        Get x, y position based on category
-        Add small jitter to avoid overlaps
-        """
-        base_pos = self.category_positions.get(category, (0.5, 0.5))
+        Severity, depth and failure flags for every task, as array reductions
+        over the result matrix
         
-        # Add small random offset to avoid exact overlaps
-        jitter = 0.03
-        x = base_pos[0] + (np.random.random() - 0.5) * jitter
-        y = base_pos[1] + (np.random.random() - 0.5) * jitter
+        Severity comes from the mean failure rate across the models that were
+        graded (with one sample each: the share of models that failed). Depth
+        starts from the severity's base depth and each model adds depth in
+        proportion to how often it failed; deeper = more severe.
+        """
+        tested = ~np.isnan(failure)
+        rates = np.where(tested, failure, 0.0)
+        n_tested = tested.sum(axis=1)
+        total_failure = rates.sum(axis=1)
+        mean_failure = np.divide(total_failure, n_tested,
+                                 out=np.zeros(len(failure)), where=n_tested > 0)
         
-        # Clamp to valid range
-        x = max(0.1, min(0.9, x))
-        y = max(0.1, min(0.9, y))
+        # 0: low, 1: medium (>= 0.5), 2: high (>= 0.75), 3: critical (every answer failed)
+        level = np.searchsorted(SEVERITY_THRESHOLDS, mean_failure, side='right')
+        level[(n_tested > 0) & (mean_failure >= 1.0)] = len(SEVERITY_LEVELS) - 1
+        depth = BASE_DEPTHS[level] - total_failure * 5
         
-        return (x, y)
+        return {
+            'tested': tested,
+            'failed': tested & (failure >= 0.5),  # a model fails a task at >= 50% failures
+            'severity': np.asarray(SEVERITY_LEVELS)[level],
+            'depth': depth
+        }
     
     def convert_to_terrain_format(self, sinkholes: List[Dict]) -> Dict:
         """
@@ -169,20 +207,28 @@ class SinkholeToTerrainConverter:
             'indices': [0, 1, 2, ...]
         }
         """
+        anchors = {}
+        if self.index is not None:
+            anchors = self.index.anchors([s for s in sinkholes if s.get('id')])
+        positions = self.layout.place(sinkholes, anchors)
+        models, failure = self.build_result_matrix(sinkholes)
+        scores = self.score_matrix(failure)
+        failed = scores['failed']
+        passed = scores['tested'] & ~failed
+        links = self.linker.link(positions, scores['depth']) if self.linker else None
+        
         vertices = []
         metadata = []
         colors = []
         
         for idx, sinkhole in enumerate(sinkholes):
-            # Get position
-            x, y = self._get_position(sinkhole['category'], idx)
+            x, y = positions[idx]
             
-            # Calculate severity and depth
-            severity = self._calculate_severity(sinkhole)
-            z = self._calculate_depth(severity, sinkhole['models'])
+            severity = str(scores['severity'][idx])
+            z = float(scores['depth'][idx])
             
             # Create vertex
-            vertex = [round(float(x), 4), round(float(y), 4), round(float(z), 4)]
+            vertex = [round(float(x), 4), round(float(y), 4), round(z, 4)]
             vertices.append(vertex)
             
             # Get color from unified scheme
@@ -190,10 +236,8 @@ class SinkholeToTerrainConverter:
             colors.append(color)
             
             # Create metadata
-            failed_models = [name for name, data in sinkhole['models'].items() 
-                           if not data['correct']]
-            passed_models = [name for name, data in sinkhole['models'].items() 
-                           if data['correct']]
+            failed_models = [models[col] for col in np.flatnonzero(failed[idx])]
+            passed_models = [models[col] for col in np.flatnonzero(passed[idx])]
             
             meta = {
                 'type': 'sinkhole',
@@ -209,11 +253,17 @@ class SinkholeToTerrainConverter:
                 'evaluations': {
                     name: {
                         'correct': data['correct'],
-                        'reason': data['evaluation']
+                        'reason': data['evaluation'],
+                        **{field: data[field] for field in ('samples', 'pass_rate', 'ci_low', 'ci_high')
+                           if data.get(field) is not None}
                     }
                     for name, data in sinkhole['models'].items()
                 }
             }
+            if sinkhole.get('id') in anchors:
+                meta['similar_to'] = anchors[sinkhole['id']]
+            if links is not None:
+                meta['nearby_capabilities'] = links[idx]
             metadata.append(meta)
         
         # Create indices
@@ -230,16 +280,15 @@ class SinkholeToTerrainConverter:
             'max_z': float(vertices_array[:, 2].max())
         }
         
-        # Calculate statistics
-        severity_counts = {}
-        for m in metadata:
-            sev = m['severity']
-            severity_counts[sev] = severity_counts.get(sev, 0) + 1
-        
-        category_counts = {}
-        for m in metadata:
-            cat = m['category']
-            category_counts[cat] = category_counts.get(cat, 0) + 1
+        # Calculate statistics (reductions over the result matrix)
+        categories, category_index = np.unique(
+            [s['category'] for s in sinkholes], return_inverse=True
+        )
+        levels, level_counts = np.unique(scores['severity'], return_counts=True)
+        failure_counts = failed.sum(axis=1)
+        category_sizes = np.bincount(category_index, minlength=len(categories))
+        category_failures = np.bincount(category_index, weights=failure_counts,
+                                        minlength=len(categories))
         
         return {
             'vertices': vertices,
@@ -249,19 +298,28 @@ class SinkholeToTerrainConverter:
             'bounds': bounds,
             'stats': {
                 'total_sinkholes': len(vertices),
-                'severity_breakdown': severity_counts,
-                'category_breakdown': category_counts,
-                'total_failures': sum(m['failure_count'] for m in metadata),
-                'models_tested': list(set(
-                    model for m in metadata 
-                    for model in list(m['failed_models']) + list(m['passed_models'])
-                ))
+                'severity_breakdown': {str(level): int(count)
+                                       for level, count in zip(levels, level_counts)},
+                'category_breakdown': {str(cat): int(count)
+                                       for cat, count in zip(categories, category_sizes)},
+                'category_failures': {str(cat): int(count)
+                                      for cat, count in zip(categories, category_failures)},
+                'model_failures': {name: int(count)
+                                   for name, count in zip(models, failed.sum(axis=0))},
+                'total_failures': int(failure_counts.sum()),
+                'models_tested': [name for name, tested in zip(models, scores['tested'].any(axis=0))
+                                  if tested]
             },
             'config': {
                 'coordinate_system': 'cartesian',
                 'z_axis': 'failure_depth',
                 'severity_colors': SINKHOLE_COLORS,  # Reference to unified colors
                 'interpretation': 'Negative z = vulnerability depth, deeper = more severe',
+                'layout': {
+                    'seeded_by': 'sinkhole id',
+                    'min_separation': self.layout.min_separation,
+                    'peak_clearance': self.layout.peak_clearance
+                },
                 'color_scheme': 'unified',
                 'color_source': 'terrain_colors.py'
             }
@@ -286,18 +344,35 @@ class SinkholeToTerrainConverter:
 
 def main():
     """Main conversion function"""
-    # Read markdown file
-    with open('data/sinkhole_data/sinkhole_evaluation.md', 'r') as f:
-        md_content = f.read()
+    store_path = 'data/sinkhole_data/evaluations.json'
+    md_path = 'data/sinkhole_data/sinkhole_evaluation.md'
 
-    # Create converter
-    converter = SinkholeToTerrainConverter()
+    # Create converter, keeping sinkholes off the capability peaks,
+    # similar sinkholes together, and linking each to the peaks around it
+    capabilities = load_capabilities()
+    converter = SinkholeToTerrainConverter(
+        peaks=[(cap['x'], cap['y']) for cap in capabilities],
+        index_path='data/sinkhole_data/task_vectors.npz',
+        capabilities=capabilities
+    )
 
-    # Parse sinkholes
-    print("Parsing sinkhole evaluations...")
-    sinkholes = converter.parse_markdown(md_content)
+    # Load sinkholes from the store (markdown only if it was never migrated)
+    if os.path.exists(store_path):
+        print(f"Loading sinkhole evaluations from {store_path}...")
+        sinkholes = converter.load_evaluations(store_path)
+    else:
+        print(f"⚠️  No {store_path}; parsing {md_path} "
+              f"(migrate with: python scripts/sinkhole_evaluations.py import-markdown)")
+        with open(md_path, 'r') as f:
+            sinkholes = converter.parse_markdown(f.read())
     print(f"Found {len(sinkholes)} sinkholes")
 
+    # Bring the similarity index up to date for placement
+    vectorized = converter.index.add((s['id'], s['task']) for s in sinkholes if s.get('id'))
+    converter.index.save()
+    if vectorized:
+        print(f"✓ Indexed {vectorized} new or changed tasks in {converter.index.path}")
+
     # Convert to terrain format
     print("\nConverting to rendering format with unified colors...")
     terrain_data = converter.export_to_json(
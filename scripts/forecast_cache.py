@@ -0,0 +1,107 @@
+"""
+Forecast Result Cache
+Reuses per-capability forecasts when inputs and settings are unchanged
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, List, Optional
+
+ENTRY_PATTERN = re.compile(r'^(\d{4}-\d{2}-\d{2})-[0-9a-f]{64}\.json$')
+
+
+class ForecastCache:
+    """
+    On-disk cache of BatchForecaster.process_capability results.
+
+    One compact JSON file per entry, named by the key. The key covers
+    everything a result depends on: the capability, the prepared series,
+    thresholds, saturation point, CI method and sample count, forecaster
+    version and the as-of date (days-until and current-performance values
+    are relative to today). Keys start with the as-of date, so entries from
+    earlier days can be evicted without reading them.
+    """
+
+    def __init__(self, cache_dir: str):
+        """
+        Args:
+            cache_dir: Directory holding cache entries (created if missing)
+        """
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(capability: str,
+                 dates: List[str],
+                 scores: List[float],
+                 thresholds: List[float],
+                 saturation_point: float,
+                 ci_method: str,
+                 n_samples: int,
+                 version: str,
+                 as_of: str) -> str:
+        """
+        Build the cache key for one capability.
+
+        Returns:
+            The as-of date and the hex sha256 digest of the canonicalised
+            inputs, e.g. '2025-01-31-<digest>'
+        """
+        payload = {
+            'capability': capability,
+            'dates': [str(d) for d in dates],
+            'scores': [float(s) for s in scores],
+            'thresholds': [float(t) for t in thresholds],
+            'saturation_point': float(saturation_point),
+            'ci_method': ci_method,
+            'n_samples': n_samples,
+            'version': version,
+            'as_of': as_of
+        }
+        blob = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        return f"{as_of}-{hashlib.sha256(blob.encode('utf-8')).hexdigest()}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the cached result for key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                result = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict) -> None:
+        """Store result under key (written atomically)."""
+        path = self._path(key)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(result, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+    def evict(self, as_of: str) -> int:
+        """
+        Delete entries computed before as_of (and entries without a date).
+
+        Returns:
+            Number of entries deleted
+        """
+        evicted = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            match = ENTRY_PATTERN.match(name)
+            if match is None or match.group(1) < as_of:
+                os.remove(os.path.join(self.cache_dir, name))
+                evicted += 1
+        return evicted
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
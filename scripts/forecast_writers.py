@@ -0,0 +1,217 @@
+"""
+Forecast Output Writers
+Incremental writers used by BatchForecaster to emit results as they complete
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+from typing import Dict, List
+
+
+SUMMARY_FIELDS = [
+    'capability', 'threshold', 'predicted_date', 'ci_lower', 'ci_upper',
+    'days_until', 'current_performance'
+]
+
+
+def summary_rows(capability_name: str, result: Dict) -> List[Dict]:
+    """
+    Build forecast_summary.csv rows for a single capability result.
+
+    Only future (not yet achieved) threshold predictions are included.
+    """
+    rows = []
+    if not result.get('success'):
+        return rows
+
+    for pred in result['threshold_predictions']:
+        if pred['success'] and not pred.get('already_achieved'):
+            rows.append({
+                'capability': capability_name,
+                'threshold': pred['threshold'],
+                'predicted_date': pred['predicted_date'],
+                'ci_lower': pred['confidence_interval']['lower'],
+                'ci_upper': pred['confidence_interval']['upper'],
+                'days_until': pred['days_until_threshold'],
+                'current_performance': pred['current_predicted_performance']
+            })
+    return rows
+
+
+class StreamingForecastWriter:
+    """
+    Write forecast results one capability at a time.
+
+    Produces three files in output_dir:
+    - forecast_results.ndjson: metadata line, then one compact line per capability
+    - forecast_nodes.json: compact JSON ({metadata, nodes}), nodes appended as they arrive
+    - forecast_summary.csv: summary rows appended as they arrive
+
+    Nothing is buffered beyond the capability currently being written, so
+    memory stays flat regardless of how many capabilities are processed.
+    """
+
+    def __init__(self, output_dir: str, metadata: Dict):
+        """
+        Args:
+            output_dir: Directory to write into (must exist)
+            metadata: Run metadata written at the head of each JSON output
+        """
+        self.output_dir = output_dir
+        self.metadata = metadata
+        self.results_path = os.path.join(output_dir, 'forecast_results.ndjson')
+        self.nodes_path = os.path.join(output_dir, 'forecast_nodes.json')
+        self.csv_path = os.path.join(output_dir, 'forecast_summary.csv')
+
+        self._results_file = None
+        self._nodes_file = None
+        self._csv_file = None
+        self._csv_writer = None
+        self._n_nodes = 0
+        self._n_results = 0
+        self._n_rows = 0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def open(self) -> None:
+        """Open all output files and write their headers."""
+        self._results_file = open(self.results_path, 'w')
+        self._results_file.write(self._dumps({'metadata': self.metadata}) + '\n')
+
+        self._nodes_file = open(self.nodes_path, 'w')
+        self._nodes_file.write('{"metadata":' + self._dumps(self.metadata) + ',"nodes":[')
+
+        self._csv_file = open(self.csv_path, 'w', newline='')
+        self._csv_writer = csv.DictWriter(self._csv_file, fieldnames=SUMMARY_FIELDS)
+        self._csv_writer.writeheader()
+
+    def write(self, capability_name: str, result: Dict) -> None:
+        """Append one capability's result to every output."""
+        self._results_file.write(self._dumps(result) + '\n')
+        self._n_results += 1
+
+        if result.get('success'):
+            for node in result['forecast_nodes']:
+                if self._n_nodes:
+                    self._nodes_file.write(',')
+                self._nodes_file.write(self._dumps(node))
+                self._n_nodes += 1
+
+        rows = summary_rows(capability_name, result)
+        self._csv_writer.writerows(rows)
+        self._n_rows += len(rows)
+
+    def close(self) -> Dict:
+        """
+        Finish the JSON document and close all files.
+
+        Returns:
+            Counts of results, nodes and summary rows written
+        """
+        if self._nodes_file is not None:
+            self._nodes_file.write(']}')
+
+        for f in (self._results_file, self._nodes_file, self._csv_file):
+            if f is not None:
+                f.close()
+        self._results_file = self._nodes_file = self._csv_file = None
+
+        return {
+            'results': self._n_results,
+            'nodes': self._n_nodes,
+            'summary_rows': self._n_rows
+        }
+
+    @staticmethod
+    def _dumps(obj) -> str:
+        return json.dumps(obj, separators=(',', ':'))
+
+
+class ShardedForecastWriter:
+    """
+    Write one small file per capability plus an index manifest.
+
+    Layout under shard_dir:
+    - nodes/<capability>-<hash>.json: forecast nodes only (what the map renders)
+    - capabilities/<capability>-<hash>.json: full result including the forecast curve
+    - manifest.json: metadata and, per shard, name, path, byte size,
+      sha256 and node count
+
+    Clients read the manifest first and fetch only the shards they need;
+    the content hash lets them skip shards that have not changed. File names
+    carry a hash of the capability name, since names that differ only in
+    punctuation sanitize to the same stem.
+
+    Shards are written to <shard_dir>.tmp and swapped in by close(), which
+    replaces the previous run's shards as a whole: capabilities that were
+    dropped leave no stale files, and clients never see a half-written set.
+    """
+
+    def __init__(self, shard_dir: str, metadata: Dict):
+        """
+        Args:
+            shard_dir: Directory to publish the shards in (replaced on close)
+            metadata: Run metadata written into the manifest
+        """
+        self.shard_dir = shard_dir
+        self.manifest_path = os.path.join(shard_dir, 'manifest.json')
+        self.metadata = metadata
+        self.entries = {'nodes': [], 'capabilities': []}
+
+        self._tmp_dir = shard_dir.rstrip('/\\') + '.tmp'
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+        for kind in self.entries:
+            os.makedirs(os.path.join(self._tmp_dir, kind))
+
+    def write(self, capability_name: str, result: Dict) -> None:
+        """Write the node and full-result shards for one capability."""
+        nodes = result.get('forecast_nodes', []) if result.get('success') else []
+        self._write_shard('nodes', capability_name, nodes, count=len(nodes))
+        self._write_shard('capabilities', capability_name, result)
+
+    def close(self) -> Dict:
+        """
+        Write the manifest and replace the published shards.
+
+        Returns:
+            The manifest dictionary
+        """
+        manifest = {
+            'metadata': self.metadata,
+            'total_nodes': sum(e['count'] for e in self.entries['nodes']),
+            'shards': self.entries
+        }
+        with open(os.path.join(self._tmp_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        shutil.rmtree(self.shard_dir, ignore_errors=True)
+        os.replace(self._tmp_dir, self.shard_dir)
+        return manifest
+
+    def _write_shard(self, kind: str, capability_name: str, payload,
+                     count: int = None) -> None:
+        suffix = hashlib.sha256(capability_name.encode('utf-8')).hexdigest()[:8]
+        filename = f"{re.sub(r'[^A-Za-z0-9_.-]', '_', capability_name)}-{suffix}.json"
+        data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        with open(os.path.join(self._tmp_dir, kind, filename), 'wb') as f:
+            f.write(data)
+
+        entry = {
+            'name': capability_name,
+            'path': f"{kind}/{filename}",
+            'bytes': len(data),
+            'sha256': hashlib.sha256(data).hexdigest()
+        }
+        if count is not None:
+            entry['count'] = count
+        self.entries[kind].append(entry)
@@ -1,17 +1,19 @@
+import argparse
 import pandas as pd
 from pathlib import Path
 import json
 import os
 from datetime import datetime
+from pipeline_logging import SUMMARY, add_logging_args, configure_from_args, get_logger
 
-print("✓ All imports complete, defining functions...")
+logger = get_logger('load_epoch_data')
 
 def get_available_benchmarks(data_dir='data/raw/epoch_benchmark_data'):
     """Scan directory and find all available CSV files"""
     
     path = Path(data_dir)
     if not path.exists():
-        print(f"❌ Directory not found: {data_dir}")
+        logger.warning("❌ Directory not found: %s", data_dir)
         return []
     
     csv_files = list(path.glob('*.csv'))
@@ -91,10 +93,10 @@ def load_benchmark(filepath, benchmark_name):
     try:
         df = pd.read_csv(filepath)
         cols_preview = df.columns.tolist()[:8]
-        print(f"✓ {benchmark_name}: {len(df)} rows | Columns: {cols_preview}...")
+        logger.debug("✓ %s: %d rows | Columns: %s...", benchmark_name, len(df), cols_preview)
         return df
     except Exception as e:
-        print(f"✗ Error loading {benchmark_name}: {e}")
+        logger.warning("✗ Error loading %s: %s", benchmark_name, e)
         return None
 
 def standardize_dataframe(df, benchmark_name):
@@ -153,13 +155,11 @@ def standardize_dataframe(df, benchmark_name):
 def aggregate_all_benchmarks(data_dir='data/raw/epoch_benchmark_data'):
     """Load all available benchmarks"""
     
-    print("="*70)
-    print("SCANNING FOR BENCHMARKS")
-    print("="*70 + "\n")
+    logger.info("Scanning for benchmarks in %s", data_dir)
     
     # Get all CSV files
     available = get_available_benchmarks(data_dir)
-    print(f"Found {len(available)} CSV files\n")
+    logger.info("Found %d CSV files", len(available))
     
     all_data = []
     loaded = []
@@ -187,14 +187,21 @@ def aggregate_all_benchmarks(data_dir='data/raw/epoch_benchmark_data'):
 
     
     if len(all_data) == 0:
-        print("\n❌ No data loaded!")
+        logger.warning("❌ No data loaded!")
         return None
     
     # Combine all
     combined = pd.concat(all_data, ignore_index=True)
+    logger.log(SUMMARY, "✓ Loaded %d benchmarks (%d skipped), %d records",
+               len(loaded), len(skipped), len(combined),
+               extra={'loaded': len(loaded), 'skipped': skipped})
     return combined
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Combine Epoch benchmark CSVs")
+    add_logging_args(parser)
+    configure_from_args(parser.parse_args())
+    
     # Load all data
     df = aggregate_all_benchmarks()
     
@@ -204,7 +211,7 @@ if __name__ == '__main__':
         output_path = 'data/intermediate/combined_benchmarks.csv'
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         df.to_csv(output_path, index=False)
-        print(f"\n✓ Saved: {output_path}")
+        logger.log(SUMMARY, "✓ Saved: %s", output_path)
 
         # Save summary
         summary = {
@@ -215,13 +222,11 @@ if __name__ == '__main__':
 
         with open('data/intermediate/data_summary.json', 'w') as f:
             json.dump(summary, f, indent=2)
-        print(f"✓ Saved: data/intermediate/data_summary.json")
+        logger.info("✓ Saved: data/intermediate/data_summary.json")
 
         # Show what capabilities we have
-        print(f"\n{'='*70}")
-        print("CAPABILITIES COVERAGE")
-        print(f"{'='*70}")
+        logger.info("Capabilities coverage:")
         cap_counts = df['capability'].value_counts()
         for cap, count in cap_counts.items():
             benchmarks = df[df['capability'] == cap]['benchmark'].unique()
-            print(f"  {cap}: {count} records ({len(benchmarks)} benchmarks)")
\ No newline at end of file
+            logger.info("  %s: %d records (%d benchmarks)", cap, count, len(benchmarks))
\ No newline at end of file
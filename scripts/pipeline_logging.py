@@ -0,0 +1,97 @@
+"""
+Pipeline Logging
+Leveled logging with an optional JSON-lines sink for the batch scripts
+
+Levels, from quietest to loudest:
+- quiet: warnings and the end-of-run summary only (default)
+- info:  progress for each stage and the files written
+- debug: the full per-capability / per-benchmark detail
+"""
+
+import argparse
+import json
+import logging
+import sys
+from datetime import datetime
+from typing import Optional
+
+# Between INFO and WARNING, so quiet runs still show the final summary
+SUMMARY = 25
+logging.addLevelName(SUMMARY, 'SUMMARY')
+
+ROOT_LOGGER = 'pipeline'
+
+VERBOSITY_LEVELS = {
+    'quiet': SUMMARY,
+    'info': logging.INFO,
+    'debug': logging.DEBUG,
+}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format each record as one JSON object per line."""
+
+    # Attributes every LogRecord has; anything else came in via extra={...}
+    _RESERVED = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in self._RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a logger under the shared pipeline namespace."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def configure_logging(verbosity: str = 'quiet', json_path: Optional[str] = None) -> None:
+    """
+    Configure console output and, optionally, a JSON-lines file sink.
+
+    Args:
+        verbosity: 'quiet', 'info' or 'debug'
+        json_path: If given, every record at the chosen level is also
+            appended to this file as one JSON object per line
+    """
+    if verbosity not in VERBOSITY_LEVELS:
+        raise ValueError(f"Unknown verbosity '{verbosity}'")
+    level = VERBOSITY_LEVELS[verbosity]
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(level)
+    logger.propagate = False
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(console)
+
+    if json_path:
+        sink = logging.FileHandler(json_path)
+        sink.setFormatter(JsonLinesFormatter())
+        logger.addHandler(sink)
+
+
+def add_logging_args(parser: argparse.ArgumentParser) -> None:
+    """Add --log-level and --log-json options to a script's parser."""
+    parser.add_argument('--log-level', choices=list(VERBOSITY_LEVELS), default='quiet',
+                        help="quiet: summary and warnings only; debug: full detail")
+    parser.add_argument('--log-json', metavar='PATH',
+                        help="Also append log records to PATH as JSON lines")
+
+
+def configure_from_args(args: argparse.Namespace) -> None:
+    """Configure logging from options added by add_logging_args."""
+    configure_logging(args.log_level, args.log_json)
@@ -0,0 +1,193 @@
+"""
+Pipeline Profiler
+Stage-level timing and optional cProfile/tracemalloc capture for batch runs
+"""
+
+import cProfile
+import json
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class PipelineProfiler:
+    """
+    Collect wall time per pipeline stage and per capability.
+
+    Usage:
+        profiler = PipelineProfiler(cpu=True)
+        profiler.start()
+        with profiler.stage('load'):
+            ...
+        with profiler.stage('fit', capability='code_generation'):
+            ...
+        profiler.stop()
+        profiler.write_report('predictions/run_report.json')
+
+    Stage timings are always collected (they cost a couple of perf_counter
+    calls each). cProfile and tracemalloc are opt-in since both slow the
+    run down noticeably.
+    """
+
+    def __init__(self, cpu: bool = False, memory: bool = False, top_n: int = 25):
+        """
+        Args:
+            cpu: Capture a cProfile of the whole run
+            memory: Track allocations with tracemalloc (peak and top sites)
+            top_n: Number of functions / allocation sites kept in the report
+        """
+        self.cpu = cpu
+        self.memory = memory
+        self.top_n = top_n
+
+        self.stages = {}
+        self.capabilities = {}
+        # Stages timed inside other stages; excluded from per-capability totals
+        self.nested_stages = set()
+        self._profile = None
+        self._started_at = None
+        self._start = None
+        self._elapsed = None
+        self._memory_report = None
+
+    def start(self) -> None:
+        """Start the run clock and any opt-in profilers."""
+        self._started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+        if self.memory:
+            tracemalloc.start()
+        if self.cpu:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self) -> None:
+        """Stop the run clock and any opt-in profilers."""
+        if self._profile is not None:
+            self._profile.disable()
+        if self.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            self._memory_report = {
+                'current_bytes': current,
+                'peak_bytes': peak,
+                'top_allocations': [
+                    {
+                        'location': str(stat.traceback),
+                        'size_bytes': stat.size,
+                        'count': stat.count
+                    }
+                    for stat in snapshot.statistics('lineno')[:self.top_n]
+                ]
+            }
+        self._elapsed = time.perf_counter() - self._start
+
+    @contextmanager
+    def stage(self, name: str, capability: Optional[str] = None):
+        """
+        Time a block as stage `name`, optionally attributed to a capability.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, capability)
+
+    def add(self, name: str, seconds: float, capability: Optional[str] = None,
+            calls: int = 1, nested: bool = False) -> None:
+        """
+        Add time measured elsewhere (e.g. inside the forecaster) to a stage.
+
+        Pass nested=True when the time is already part of another stage.
+        """
+        if nested:
+            self.nested_stages.add(name)
+        totals = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+        totals['seconds'] += seconds
+        totals['calls'] += calls
+
+        if capability is not None:
+            cap = self._capability(capability)
+            cap['stages'][name] = cap['stages'].get(name, 0.0) + seconds
+
+    def record(self, capability: str, **counters) -> None:
+        """Attach counters (fit evaluations, MC samples, cache hit...) to a capability."""
+        self._capability(capability).update(counters)
+
+    def report(self) -> Dict:
+        """
+        Build the machine-readable run report.
+
+        Returns:
+            Dictionary with run totals, per-stage and per-capability timings,
+            and profiler output when enabled
+        """
+        capabilities = {}
+        for name, data in self.capabilities.items():
+            capabilities[name] = {
+                **data,
+                'seconds': round(sum(
+                    v for k, v in data['stages'].items() if k not in self.nested_stages
+                ), 6),
+                'stages': {k: round(v, 6) for k, v in data['stages'].items()}
+            }
+
+        report = {
+            'started_at': self._started_at,
+            'total_seconds': round(self._elapsed, 6) if self._elapsed is not None else None,
+            'stages': {
+                name: {
+                    'seconds': round(t['seconds'], 6),
+                    'calls': t['calls'],
+                    'nested': name in self.nested_stages
+                }
+                for name, t in self.stages.items()
+            },
+            'capabilities': capabilities
+        }
+
+        if self._profile is not None:
+            report['cpu_profile'] = self._top_functions()
+        if self._memory_report is not None:
+            report['memory'] = self._memory_report
+
+        return report
+
+    def write_report(self, path: str) -> Dict:
+        """
+        Write the run report as JSON (and the raw cProfile dump alongside it).
+
+        Returns:
+            The report dictionary
+        """
+        report = self.report()
+        if self._profile is not None:
+            prof_path = os.path.splitext(path)[0] + '.prof'
+            self._profile.dump_stats(prof_path)
+            report['cpu_profile_path'] = prof_path
+
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def _capability(self, name: str) -> Dict:
+        if name not in self.capabilities:
+            self.capabilities[name] = {'stages': {}}
+        return self.capabilities[name]
+
+    def _top_functions(self):
+        stats = pstats.Stats(self._profile)
+        rows = []
+        for (filename, line, func), (cc, nc, tt, ct, _) in stats.stats.items():
+            rows.append({
+                'function': f"{filename}:{line}({func})",
+                'calls': nc,
+                'tottime': round(tt, 6),
+                'cumtime': round(ct, 6)
+            })
+        rows.sort(key=lambda r: r['cumtime'], reverse=True)
+        return rows[:self.top_n]
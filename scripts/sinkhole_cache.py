@@ -0,0 +1,115 @@
+"""
+Sinkhole Response Cache
+Persists model answers keyed on provider, model id, task text and
+generation params, so re-runs only query (task, model) pairs not seen before
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class ResponseCache:
+    """
+    JSON-file cache of model answers.
+
+    Key = sha256(provider, model id, sha256(task text), max_tokens, temperature).
+    Any change to the task wording or generation params is a miss.
+    """
+
+    def __init__(self, path: str = 'data/sinkhole_data/response_cache.json'):
+        """
+        Args:
+            path: Cache file (created on first save)
+        """
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+        if os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def make_key(config: Dict, task: str) -> str:
+        """
+        Build the cache key for a task under a model config.
+
+        Args:
+            config: Model config with provider, model, max_tokens, temperature
+            task: Task prompt text
+        """
+        payload = {
+            'provider': config['provider'],
+            'model': config['model'],
+            'task_sha256': hashlib.sha256(task.encode('utf-8')).hexdigest(),
+            'max_tokens': config.get('max_tokens'),
+            'temperature': config.get('temperature'),
+        }
+        blob = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+    def get(self, config: Dict, task: str) -> Optional[str]:
+        """Return the cached answer, or None on a miss."""
+        entry = self.entries.get(self.make_key(config, task))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry['answer']
+
+    def put(self, config: Dict, task: str, answer: str) -> None:
+        """Store an answer."""
+        self.entries[self.make_key(config, task)] = {
+            'provider': config['provider'],
+            'model': config['model'],
+            'answer': answer,
+            'cached_at': datetime.now().isoformat()
+        }
+        self._dirty = True
+
+    def seed_from_responses(self, sinkholes: Dict[str, Dict], configs: Dict[str, Dict]) -> int:
+        """
+        Import answers from an existing negatives_with_responses.json.
+
+        That file does not record model ids or params, so answers are assumed
+        to come from the current configs at their full max_tokens. Answers
+        that were not are skipped: streams stopped early on a settled
+        verdict, multi-sample results, and sinkholes with their own
+        token_budget. Error strings are skipped too, and entries already in
+        the cache are left alone.
+
+        Returns:
+            Number of answers imported
+        """
+        imported = 0
+        for sinkhole in sinkholes.values():
+            if sinkhole.get('token_budget'):
+                continue
+            for model, result in sinkhole.get('results', {}).items():
+                config = configs.get(model)
+                answer = result.get('answer')
+                if config is None or not answer or answer.startswith('Error:'):
+                    continue
+                if result.get('stopped_early') or 'samples' in result:
+                    continue
+                key = self.make_key(config, sinkhole['task'])
+                if key not in self.entries:
+                    self.put(config, sinkhole['task'], answer)
+                    imported += 1
+        return imported
+
+    def save(self) -> None:
+        """Write the cache file if anything changed (atomic replace)."""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
@@ -0,0 +1,91 @@
+"""
+Sinkhole Run Checkpoint
+Append-only JSON-lines log of (sinkhole, model) results so an interrupted
+run can resume without re-querying completed pairs
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Tuple
+
+
+def _task_hash(task: str) -> str:
+    return hashlib.sha256(task.encode('utf-8')).hexdigest()
+
+
+class ResultCheckpoint:
+    """
+    Durable per-result checkpoint.
+
+    Each completed (sinkhole, model) result is appended as one JSON line and
+    fsync'd before the next is accepted, so a crash or Ctrl-C loses at most
+    the request in flight. A partially written trailing line is ignored on load.
+    """
+
+    def __init__(self, path: str = 'data/sinkhole_data/negatives_with_responses.checkpoint.jsonl'):
+        """
+        Args:
+            path: Checkpoint file
+        """
+        self.path = path
+        self._file = None
+
+    def load(self, sinkholes: Dict[str, Dict]) -> Dict[Tuple[str, str], Dict]:
+        """
+        Read completed results from the checkpoint.
+
+        Records whose task text no longer matches the sinkhole are dropped.
+
+        Returns:
+            Mapping of (sinkhole_id, model) to result
+        """
+        completed = {}
+        if not os.path.exists(self.path):
+            return completed
+
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from an interrupted run
+                sinkhole = sinkholes.get(record['sinkhole_id'])
+                if sinkhole is None or _task_hash(sinkhole['task']) != record['task_sha256']:
+                    continue
+                completed[(record['sinkhole_id'], record['model'])] = record['result']
+        return completed
+
+    def open(self, resume: bool = False) -> None:
+        """
+        Open the checkpoint for appending.
+
+        Args:
+            resume: Keep existing records; otherwise start a fresh checkpoint
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, 'a' if resume else 'w')
+
+        # Terminate a torn trailing line so the next record starts cleanly
+        if resume and self._file.tell() > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._file.write('\n')
+
+    def append(self, sinkhole_id: str, model: str, task: str, result: Dict) -> None:
+        """Durably record one result."""
+        record = {
+            'sinkhole_id': sinkhole_id,
+            'model': model,
+            'task_sha256': _task_hash(task),
+            'result': result
+        }
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
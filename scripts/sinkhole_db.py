@@ -0,0 +1,424 @@
+"""
+Sinkhole Database
+Indexed SQLite store for sinkhole tasks and per-model results
+
+Tables:
+- categories: one row per task category
+- tasks:      one row per sinkhole, deduplicated by a hash of the normalized
+              task text; ids (sinkhole_XXX) are allocated inside a write
+              transaction, so concurrent collection scripts never collide
+- results:    one row per (task, model), upserted as answers and verdicts
+              arrive
+
+Queries such as "all spatial_reasoning tasks Grok failed" are answered from
+the indexes without loading any JSON:
+
+    db = SinkholeDB()
+    db.failed_tasks(category='spatial_reasoning', model='grok')
+
+The JSON files stay the interchange format: import_sinkholes() loads
+negatives.json / negatives_with_responses.json, import_evaluations() loads
+verdicts from the evaluation store, and export_sinkholes() writes the
+negatives.json shape back out.
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id    INTEGER PRIMARY KEY,
+    name  TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    seq                  INTEGER PRIMARY KEY,
+    id                   TEXT NOT NULL UNIQUE,
+    task                 TEXT NOT NULL,
+    task_hash            TEXT NOT NULL UNIQUE,
+    category_id          INTEGER NOT NULL REFERENCES categories(id),
+    expected_difficulty  TEXT,
+    why_hard             TEXT,
+    correct_answer       TEXT,
+    checker              TEXT,
+    x                    REAL,
+    y                    REAL,
+    depth                REAL,
+    added_date           TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_category ON tasks(category_id);
+
+CREATE TABLE IF NOT EXISTS results (
+    task_id        TEXT NOT NULL REFERENCES tasks(id),
+    model          TEXT NOT NULL,
+    status         TEXT NOT NULL DEFAULT 'ok',
+    answer         TEXT,
+    correct        INTEGER,
+    graded_by      TEXT,
+    latency_s      REAL,
+    input_tokens   INTEGER,
+    output_tokens  INTEGER,
+    attempts       INTEGER,
+    updated_at     TEXT NOT NULL,
+    PRIMARY KEY (task_id, model)
+);
+CREATE INDEX IF NOT EXISTS idx_results_model ON results(model, correct);
+"""
+
+TASK_FIELDS = ('expected_difficulty', 'why_hard', 'correct_answer', 'x', 'y', 'depth', 'added_date')
+RESULT_FIELDS = ('status', 'answer', 'correct', 'graded_by', 'latency_s',
+                 'input_tokens', 'output_tokens', 'attempts')
+
+# For TRIM(): the evaluation store keeps responses stripped, raw results do not
+WHITESPACE = "char(32, 9, 10, 13)"
+
+
+def task_hash(task: str) -> str:
+    """Hash of the task text, case- and whitespace-insensitive."""
+    return hashlib.sha256(' '.join(task.lower().split()).encode('utf-8')).hexdigest()
+
+
+class SinkholeDB:
+    """SQLite-backed sinkhole tasks and results."""
+
+    def __init__(self, path: str = 'data/sinkhole_data/sinkholes.db'):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit; writes use explicit BEGIN IMMEDIATE transactions
+        self.conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+        self._categories: Dict[str, int] = {}
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write(self):
+        """Transaction that takes the write lock up front."""
+        db = self
+
+        class _Transaction:
+            def __enter__(self):
+                db.conn.execute('BEGIN IMMEDIATE')
+                return db.conn
+
+            def __exit__(self, exc_type, exc, tb):
+                if exc_type is None:
+                    db.conn.execute('COMMIT')
+                else:
+                    db.conn.execute('ROLLBACK')
+                    db._categories.clear()  # may hold ids that were rolled back
+
+        return _Transaction()
+
+    def _category_id(self, name: str) -> int:
+        if name not in self._categories:
+            self.conn.execute('INSERT OR IGNORE INTO categories (name) VALUES (?)', (name,))
+            row = self.conn.execute('SELECT id FROM categories WHERE name = ?', (name,)).fetchone()
+            self._categories[name] = row['id']
+        return self._categories[name]
+
+    # ------------------------------------------------------------------
+    # Tasks
+    # ------------------------------------------------------------------
+
+    def _upsert_task(self, task: str, category: str, fields: Dict,
+                     sinkhole_id: Optional[str] = None) -> Tuple[str, bool]:
+        digest = task_hash(task)
+        row = self.conn.execute('SELECT id FROM tasks WHERE task_hash = ?', (digest,)).fetchone()
+        values = {name: fields.get(name) for name in TASK_FIELDS}
+        checker = fields.get('checker')
+        values['checker'] = json.dumps(checker) if checker is not None else None
+        values['category_id'] = self._category_id(category)
+
+        if row is not None:
+            assignments = ', '.join(f"{name} = COALESCE(?, {name})" for name in values)
+            self.conn.execute(f"UPDATE tasks SET {assignments} WHERE id = ?",
+                              (*values.values(), row['id']))
+            return row['id'], False
+
+        # Keep a requested id (e.g. from negatives.json) unless another task has it
+        seq = None
+        if sinkhole_id is not None and sinkhole_id.rsplit('_', 1)[-1].isdigit():
+            taken = self.conn.execute('SELECT 1 FROM tasks WHERE id = ?', (sinkhole_id,)).fetchone()
+            if taken is None:
+                seq = int(sinkhole_id.rsplit('_', 1)[-1])
+        if seq is None:
+            seq = self.conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM tasks').fetchone()[0]
+            sinkhole_id = f"sinkhole_{seq:03d}"
+        values['added_date'] = values['added_date'] or datetime.now().isoformat()
+        columns = ['seq', 'id', 'task', 'task_hash'] + list(values)
+        self.conn.execute(
+            f"INSERT INTO tasks ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            (seq, sinkhole_id, task, digest, *values.values())
+        )
+        return sinkhole_id, True
+
+    def add_task(self, task: str, category: str, **fields) -> Tuple[str, bool]:
+        """
+        Insert a task, or update the existing one with the same normalized text.
+
+        Args:
+            task: Task prompt
+            category: Category name
+            **fields: expected_difficulty, why_hard, correct_answer, checker,
+                x, y, depth, added_date
+
+        Returns:
+            (sinkhole id, True if newly inserted)
+        """
+        with self._write():
+            return self._upsert_task(task, category, fields)
+
+    def add_tasks(self, tasks: Iterable[Dict]) -> List[Tuple[str, bool]]:
+        """
+        add_task for many tasks in one transaction (for generated task sets).
+
+        Args:
+            tasks: Dicts with 'task', 'category' and any add_task fields
+
+        Returns:
+            (sinkhole id, True if newly inserted) per task, in order
+        """
+        with self._write():
+            return [self._upsert_task(t['task'], t['category'], t) for t in tasks]
+
+    def get_task(self, sinkhole_id: str) -> Optional[Dict]:
+        row = self.conn.execute(
+            'SELECT t.*, c.name AS category FROM tasks t JOIN categories c ON c.id = t.category_id '
+            'WHERE t.id = ?', (sinkhole_id,)
+        ).fetchone()
+        return self._task_dict(row) if row is not None else None
+
+    def tasks(self, category: Optional[str] = None) -> List[Dict]:
+        """Tasks in id order, optionally for one category."""
+        query = ('SELECT t.*, c.name AS category FROM tasks t '
+                 'JOIN categories c ON c.id = t.category_id')
+        params: Tuple = ()
+        if category is not None:
+            query += ' WHERE c.name = ?'
+            params = (category,)
+        query += ' ORDER BY t.seq'
+        return [self._task_dict(row) for row in self.conn.execute(query, params)]
+
+    @staticmethod
+    def _task_dict(row: sqlite3.Row) -> Dict:
+        task = {
+            'id': row['id'],
+            'task': row['task'],
+            'category': row['category'],
+            'expected_difficulty': row['expected_difficulty'],
+            'why_hard': row['why_hard'],
+            'correct_answer': row['correct_answer'],
+            'checker': json.loads(row['checker']) if row['checker'] else None,
+            'x': row['x'],
+            'y': row['y'],
+            'depth': row['depth'],
+            'added_date': row['added_date'],
+        }
+        return task
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def upsert_results(self, rows: Iterable[Tuple[str, str, Dict]]) -> int:
+        """
+        Insert or update (sinkhole_id, model, result) rows in one transaction.
+
+        A verdict already stored is kept when the new row has none for the
+        same answer, so re-importing raw responses never erases grading.
+
+        Returns:
+            Number of rows written
+        """
+        now = datetime.now().isoformat()
+        params = []
+        for sid, model, result in rows:
+            values = [result.get(name) for name in RESULT_FIELDS]
+            values[0] = values[0] or 'ok'
+            correct = result.get('correct')
+            values[2] = None if correct is None else int(bool(correct))
+            params.append((sid, model, *values, now))
+
+        columns = ('task_id', 'model') + RESULT_FIELDS + ('updated_at',)
+        usage = ('latency_s', 'input_tokens', 'output_tokens', 'attempts')
+        updates = ', '.join(
+            [f"{name} = excluded.{name}" for name in ('status', 'answer')]
+            + [f"{name} = COALESCE(excluded.{name}, results.{name})" for name in usage]
+        )
+        same_answer = f"TRIM(results.answer, {WHITESPACE}) IS TRIM(excluded.answer, {WHITESPACE})"
+        keep_verdict = (f"CASE WHEN excluded.correct IS NULL AND {same_answer} "
+                        "THEN results.{0} ELSE excluded.{0} END")
+        with self._write() as conn:
+            conn.executemany(
+                f"INSERT INTO results ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * len(columns))}) "
+                f"ON CONFLICT(task_id, model) DO UPDATE SET {updates}, "
+                f"correct = {keep_verdict.format('correct')}, "
+                f"graded_by = {keep_verdict.format('graded_by')}, "
+                f"updated_at = excluded.updated_at",
+                params
+            )
+        return len(params)
+
+    def results(self, sinkhole_id: str) -> Dict[str, Dict]:
+        """Results for one task, keyed by model."""
+        rows = self.conn.execute('SELECT * FROM results WHERE task_id = ?', (sinkhole_id,))
+        return {row['model']: self._result_dict(row) for row in rows}
+
+    @staticmethod
+    def _result_dict(row: sqlite3.Row) -> Dict:
+        result = {name: row[name] for name in RESULT_FIELDS}
+        if result['correct'] is not None:
+            result['correct'] = bool(result['correct'])
+        return result
+
+    def failed_tasks(self, category: Optional[str] = None, model: Optional[str] = None) -> List[Dict]:
+        """
+        Tasks with a result graded incorrect, optionally filtered by category
+        and model; each task lists the models that failed it.
+        """
+        query = ('SELECT t.*, c.name AS category, r.model AS failed_model '
+                 'FROM results r '
+                 'JOIN tasks t ON t.id = r.task_id '
+                 'JOIN categories c ON c.id = t.category_id '
+                 'WHERE r.correct = 0')
+        params = []
+        if model is not None:
+            query += ' AND r.model = ?'
+            params.append(model)
+        if category is not None:
+            query += ' AND c.name = ?'
+            params.append(category)
+        query += ' ORDER BY t.seq, r.model'
+
+        failed: Dict[str, Dict] = {}
+        for row in self.conn.execute(query, params):
+            task = failed.get(row['id'])
+            if task is None:
+                task = failed[row['id']] = self._task_dict(row)
+                task['failed_models'] = []
+            task['failed_models'].append(row['failed_model'])
+        return list(failed.values())
+
+    def failure_rates(self) -> List[Dict]:
+        """Graded / failed counts per (category, model)."""
+        rows = self.conn.execute(
+            'SELECT c.name AS category, r.model AS model, COUNT(r.correct) AS graded, '
+            'SUM(r.correct = 0) AS failed '
+            'FROM results r JOIN tasks t ON t.id = r.task_id '
+            'JOIN categories c ON c.id = t.category_id '
+            'GROUP BY c.name, r.model ORDER BY c.name, r.model'
+        )
+        return [dict(row) for row in rows]
+
+    # ------------------------------------------------------------------
+    # JSON interchange
+    # ------------------------------------------------------------------
+
+    def import_sinkholes(self, sinkholes: Dict[str, Dict]) -> Dict[str, int]:
+        """
+        Import negatives.json-shaped data (with or without results), keeping
+        the existing sinkhole ids.
+
+        Returns:
+            Counts of tasks inserted, tasks updated and results written
+        """
+        counts = {'inserted': 0, 'updated': 0, 'results': 0}
+        rows = []
+        with self._write():
+            for sid, sinkhole in sinkholes.items():
+                sinkhole_id, inserted = self._upsert_task(
+                    sinkhole['task'], sinkhole['category'], sinkhole, sinkhole_id=sid
+                )
+                counts['inserted' if inserted else 'updated'] += 1
+                for model, result in sinkhole.get('results', {}).items():
+                    rows.append((sinkhole_id, model, result))
+        counts['results'] = self.upsert_results(rows)
+        return counts
+
+    def import_evaluations(self, store) -> int:
+        """
+        Import verdicts from an EvaluationStore (see sinkhole_evaluations.py).
+
+        Returns:
+            Number of results written
+        """
+        rows = []
+        for sid, entry in store.sinkholes.items():
+            for model, data in entry['evaluations'].items():
+                rows.append((sid, model, {
+                    'answer': data['response'],
+                    'correct': data['correct'],
+                    'graded_by': data['graded_by']
+                }))
+        return self.upsert_results(rows)
+
+    def export_sinkholes(self, include_results: bool = True) -> Dict[str, Dict]:
+        """All tasks in the negatives.json shape."""
+        sinkholes = {}
+        for task in self.tasks():
+            task['results'] = {}
+            sinkholes[task['id']] = task
+        if include_results:
+            for row in self.conn.execute('SELECT * FROM results ORDER BY task_id, model'):
+                sinkholes[row['task_id']]['results'][row['model']] = self._result_dict(row)
+        return sinkholes
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Query and load the sinkhole database")
+    parser.add_argument('--db', default='data/sinkhole_data/sinkholes.db')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('import', help="Load sinkholes (and results) from JSON")
+    load.add_argument('paths', nargs='*', default=['data/sinkhole_data/negatives.json',
+                                                    'data/sinkhole_data/negatives_with_responses.json'])
+    load.add_argument('--evaluations', default='data/sinkhole_data/evaluations.json',
+                      help="Evaluation store to take verdicts from")
+
+    failed = commands.add_parser('failed', help="List tasks a model failed")
+    failed.add_argument('--category')
+    failed.add_argument('--model')
+
+    commands.add_parser('rates', help="Failure counts per category and model")
+    args = parser.parse_args()
+
+    with SinkholeDB(args.db) as db:
+        if args.command == 'import':
+            for path in args.paths:
+                with open(path) as f:
+                    counts = db.import_sinkholes(json.load(f))
+                print(f"✓ {path}: {counts['inserted']} new tasks, {counts['updated']} updated, "
+                      f"{counts['results']} results")
+            if args.evaluations and Path(args.evaluations).exists():
+                from sinkhole_evaluations import EvaluationStore
+                written = db.import_evaluations(EvaluationStore(args.evaluations))
+                print(f"✓ {args.evaluations}: {written} verdicts")
+
+        elif args.command == 'failed':
+            tasks = db.failed_tasks(category=args.category, model=args.model)
+            for task in tasks:
+                print(f"{task['id']} [{task['category']}] {', '.join(task['failed_models'])}: "
+                      f"{task['task'][:80]}")
+            print(f"\n{len(tasks)} tasks")
+
+        else:
+            for row in db.failure_rates():
+                print(f"  {row['category']:<24} {row['model']:<8} "
+                      f"{row['failed']}/{row['graded']} failed")
@@ -0,0 +1,453 @@
+"""
+Sinkhole Evaluation Store
+Structured source of truth for graded sinkhole answers
+
+data/sinkhole_data/evaluations.json holds every (sinkhole, model) verdict:
+    {
+        "version": 1,
+        "sinkholes": {
+            "sinkhole_001": {
+                "id": "sinkhole_001",
+                "task": "...",
+                "category": "constrained_generation",
+                "expected_answer": "...",
+                "evaluations": {
+                    "claude": {
+                        "response": "...",
+                        "correct": true,          # null until graded
+                        "evaluation": "...",      # grader's note
+                        "graded_by": "manual",    # 'manual', 'checker' or null
+                        "samples": 5,             # multi-sample runs only (--samples):
+                        "pass_rate": 0.4,         #   checker pass rate and its
+                        "ci_low": 0.118,          #   95% Wilson interval, see
+                        "ci_high": 0.769, ...     #   sinkhole_grading.summarize_samples
+                    }
+                }
+            }
+        }
+    }
+
+The evaluation markdown is only a rendered view of this store. Verdicts
+ticked in the markdown by hand can be imported back (import-markdown),
+which is also how an existing markdown file is migrated; re-rendering
+also picks them up first, so review work is never overwritten.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+STORE_VERSION = 1
+
+# Store keys (the config/sinkhole_models.json names) to display names
+MODEL_DISPLAY_NAMES = {
+    'claude': 'Claude',
+    'grok': 'Grok',
+    'gpt4': 'GPT-4',
+    'gemini': 'Gemini',
+    'llama': 'Llama',
+}
+
+
+# Pass-rate fields copied from multi-sample results
+SAMPLE_FIELDS = ('samples', 'passes', 'graded', 'pass_rate', 'ci_low', 'ci_high')
+
+
+def display_name(model: str) -> str:
+    return MODEL_DISPLAY_NAMES.get(model, model.capitalize())
+
+
+SECTION_PATTERN = re.compile(r'##\s+(sinkhole_\d+)\s*$')
+MODEL_PATTERN = re.compile(r'###\s+(\S+)\s*$')
+FIELD_PATTERN = re.compile(r'\*\*(Task|Category|Expected Answer|Pass rate|Evaluation):\*\*\s*(.*)$')
+VERDICT_PATTERN = re.compile(r'\*\*Correct\?\*\*\s*\[([ xX])\]\s*Yes\s*\[([ xX])\]\s*No')
+# Written before each rendered section: <!-- sinkhole_001 <entry hash> <text hash> -->
+# (store content it was rendered from, and the section text as written)
+MARKER_PATTERN = re.compile(r'^<!-- (sinkhole_\d+) ([0-9a-f]+) ([0-9a-f]+) -->$', re.M)
+
+
+def _is_structural(line: str) -> bool:
+    """Lines that can only appear outside a response block."""
+    return (line.startswith('#') or line.startswith('---') or bool(MARKER_PATTERN.match(line))
+            or bool(VERDICT_PATTERN.match(line)) or bool(FIELD_PATTERN.match(line)))
+
+
+def tokenize_evaluation_markdown(md_content: str):
+    """
+    Walk evaluation markdown once, line by line, yielding tokens:
+        ('section', sinkhole_id)          ## sinkhole_XXX
+        ('field', (name, text))           **Task:** / **Category:** /
+                                          **Expected Answer:** / **Pass rate:** /
+                                          **Evaluation:**
+        ('model', header)                 ### CLAUDE, ### GPT4, ...
+        ('response', text)                fenced block after a model header
+        ('verdict', True / False / None)  **Correct?** [X] Yes  [ ] No
+    
+    Field text runs until a blank line (Evaluation: until the next heading or
+    ---). Responses may contain their own fences and headings, so a bare
+    ``` only closes the response when the next non-blank line is structure
+    (a verdict, field, heading or rule) or the end of the file.
+    """
+    lines = md_content.splitlines()
+    i = 0
+    n = len(lines)
+    while i < n:
+        stripped = lines[i].strip()
+        if not stripped:
+            i += 1
+            continue
+        lead = stripped[0]
+        
+        if stripped.startswith('```'):
+            # Fenced response: collect until the closing fence
+            start = i + 1
+            i = start
+            while i < n:
+                if lines[i].strip() == '```':
+                    j = i + 1
+                    while j < n and not lines[j].strip():
+                        j += 1
+                    if j == n or _is_structural(lines[j].strip()):
+                        break
+                i += 1
+            yield 'response', '\n'.join(lines[start:i]).strip()
+            i += 1
+            continue
+        
+        if lead == '#':
+            match = SECTION_PATTERN.match(stripped)
+            if match:
+                yield 'section', match.group(1)
+            else:
+                match = MODEL_PATTERN.match(stripped)
+                if match:
+                    yield 'model', match.group(1)
+            i += 1
+            continue
+        
+        if lead == '*':
+            match = VERDICT_PATTERN.match(stripped)
+            if match:
+                yes, no = (box.strip().upper() == 'X' for box in match.groups())
+                yield 'verdict', True if yes else (False if no else None)
+                i += 1
+                continue
+            
+            match = FIELD_PATTERN.match(stripped)
+            if match:
+                name, text = match.groups()
+                parts = [text]
+                i += 1
+                while i < n:
+                    nxt = lines[i].strip()
+                    if name == 'Evaluation':
+                        if nxt.startswith('#') or nxt.startswith('---') or nxt.startswith('```'):
+                            break
+                    elif not nxt or nxt.startswith('**') or nxt.startswith('#'):
+                        break
+                    parts.append(lines[i])
+                    i += 1
+                yield 'field', (name, '\n'.join(parts).strip())
+                continue
+        
+        i += 1
+
+
+class EvaluationStore:
+    """Load, update and save graded sinkhole answers."""
+
+    def __init__(self, path: str = 'data/sinkhole_data/evaluations.json'):
+        self.path = Path(path)
+        self.sinkholes: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get('version') != STORE_VERSION:
+                raise ValueError(f"{self.path}: unsupported store version {data.get('version')}")
+            self.sinkholes = data['sinkholes']
+
+    def _entry(self, sid: str, task: str, category: str, expected_answer: str) -> Dict:
+        entry = self.sinkholes.setdefault(sid, {'id': sid, 'evaluations': {}})
+        entry.update({'task': task, 'category': category, 'expected_answer': expected_answer})
+        return entry
+
+    def update_from_responses(self, sinkholes: Dict[str, Dict]) -> int:
+        """
+        Merge a responses file (see test_sinkholes.py) into the store.
+
+        A verdict already in the store is kept while the response text is
+        unchanged; a new response replaces it with the result's own
+        (auto-graded or empty) verdict. Pass-rate fields of multi-sample
+        results are always refreshed.
+
+        Returns:
+            Number of (sinkhole, model) answers added or replaced
+        """
+        changed = 0
+        for sid, sinkhole in sinkholes.items():
+            entry = self._entry(sid, sinkhole['task'], sinkhole['category'],
+                                sinkhole.get('correct_answer', ''))
+            for model, result in sinkhole.get('results', {}).items():
+                if result.get('status', 'ok') != 'ok':
+                    continue
+                current = entry['evaluations'].get(model)
+                if current is not None and current['response'] == result['answer']:
+                    if current['correct'] is None and result.get('correct') is not None:
+                        current.update(correct=result['correct'], graded_by=result.get('graded_by'),
+                                       evaluation='Auto-graded by checker')
+                else:
+                    graded = result.get('correct') is not None
+                    current = entry['evaluations'][model] = {
+                        'response': result['answer'],
+                        'correct': result.get('correct'),
+                        'evaluation': 'Auto-graded by checker' if graded else '',
+                        'graded_by': result.get('graded_by') if graded else None
+                    }
+                    changed += 1
+                if 'samples' in result:
+                    current.update({field: result.get(field) for field in SAMPLE_FIELDS})
+                    current['samples'] = len(result['samples'])
+        return changed
+
+    def set_verdict(self, sid: str, model: str, correct: Optional[bool], evaluation: str = '',
+                    graded_by: Optional[str] = 'manual') -> None:
+        """Record a verdict for one answer already in the store."""
+        self.sinkholes[sid]['evaluations'][model].update(
+            correct=correct, evaluation=evaluation, graded_by=graded_by if correct is not None else None
+        )
+
+    def import_records(self, records: List[Dict]) -> int:
+        """
+        Import parsed markdown records (see
+        SinkholeToTerrainConverter.parse_markdown), keyed by their 'id'.
+
+        Returns:
+            Number of verdicts imported
+        """
+        names = {display_name(key).lower(): key for key in MODEL_DISPLAY_NAMES}
+        imported = 0
+        for record in records:
+            entry = self._entry(record['id'], record['task'], record['category'],
+                                record['expected_answer'])
+            for name, data in record['models'].items():
+                model = names.get(name.lower(), name.lower())
+                entry['evaluations'][model] = {
+                    'response': data['response'],
+                    'correct': data['correct'],
+                    'evaluation': data['evaluation'],
+                    'graded_by': 'manual'
+                }
+                imported += 1
+        return imported
+
+    def records(self, graded_only: bool = True) -> List[Dict]:
+        """
+        Sinkholes in the converter's record shape, in one pass:
+        {'id', 'task', 'category', 'expected_answer',
+         'models': {display name: {'response', 'correct', 'evaluation',
+                                   and SAMPLE_FIELDS when sampled}}}
+
+        Args:
+            graded_only: Leave out answers that have no verdict yet (and
+                sinkholes with no graded answers at all)
+        """
+        records = []
+        for sid, entry in self.sinkholes.items():
+            models = {
+                display_name(model): {
+                    'response': data['response'],
+                    'correct': data['correct'],
+                    'evaluation': data['evaluation'],
+                    **{field: data[field] for field in SAMPLE_FIELDS if field in data}
+                }
+                for model, data in entry['evaluations'].items()
+                if not graded_only or data['correct'] is not None or data.get('pass_rate') is not None
+            }
+            if not models:
+                continue
+            records.append({
+                'id': sid,
+                'task': entry['task'],
+                'category': entry['category'],
+                'expected_answer': entry['expected_answer'],
+                'models': models
+            })
+        return records
+
+    def save(self) -> None:
+        """Write the store atomically."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = str(self.path) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': STORE_VERSION, 'sinkholes': self.sinkholes}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def harvest_markdown(self, md_content: str) -> int:
+        """
+        Take verdicts ticked (and evaluations written) by hand in a rendered
+        markdown view, for answers whose response is still the one in the
+        store. Unticked blocks and outdated responses are ignored.
+
+        Returns:
+            Number of verdicts taken from the markdown
+        """
+        names = {display_name(key).lower(): key for key in MODEL_DISPLAY_NAMES}
+        blocks = []
+        sid = None
+        block = None
+        for kind, value in tokenize_evaluation_markdown(md_content):
+            if kind == 'section':
+                sid, block = value, None
+            elif kind == 'model' and sid is not None:
+                block = {'sid': sid, 'model': names.get(value.lower(), value.lower()),
+                         'response': '', 'correct': None, 'evaluation': None}
+                blocks.append(block)
+            elif block is None:
+                continue
+            elif kind == 'response':
+                block['response'] = value
+            elif kind == 'verdict':
+                block['correct'] = value
+            elif kind == 'field' and value[0] == 'Evaluation':
+                block['evaluation'] = value[1]
+
+        harvested = 0
+        for block in blocks:
+            data = self.sinkholes.get(block['sid'], {}).get('evaluations', {}).get(block['model'])
+            if data is None or block['correct'] is None or data['response'].strip() != block['response']:
+                continue
+            evaluation = block['evaluation'] if block['evaluation'] is not None else data['evaluation']
+            if data['correct'] != block['correct'] or evaluation != data['evaluation']:
+                self.set_verdict(block['sid'], block['model'], block['correct'], evaluation)
+                harvested += 1
+        return harvested
+
+    @staticmethod
+    def section_hash(entry: Dict) -> str:
+        """Hash of everything a sinkhole's markdown section shows."""
+        blob = json.dumps(entry, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(blob.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _text_hash(text: str) -> str:
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    def _render_section(self, sid: str, entry: Dict) -> str:
+        lines = [f"## {sid}\n\n"]
+        lines.append(f"**Task:** {entry['task']}\n\n")
+        lines.append(f"**Category:** {entry['category']}\n\n")
+        if entry['expected_answer']:
+            lines.append(f"**Expected Answer:** {entry['expected_answer']}\n\n")
+
+        for model, data in sorted(entry['evaluations'].items()):
+            yes = 'X' if data['correct'] is True else ' '
+            no = 'X' if data['correct'] is False else ' '
+            lines.append(f"### {model.upper()}\n")
+            lines.append(f"```\n{data['response']}\n```\n")
+            lines.append(f"**Correct?** [{yes}] Yes  [{no}] No\n\n")
+            if data.get('pass_rate') is not None:
+                lines.append(f"**Pass rate:** {data['passes']}/{data['graded']} "
+                             f"({data['pass_rate']:.0%}, 95% CI {data['ci_low']:.0%}-"
+                             f"{data['ci_high']:.0%}) over {data['samples']} samples\n\n")
+            if data['correct'] is not None:
+                lines.append(f"**Evaluation:** {data['evaluation']}\n\n")
+
+        lines.append("---\n\n")
+        body = ''.join(lines)
+        return f"<!-- {sid} {self.section_hash(entry)} {self._text_hash(body)} -->\n{body}"
+
+    @staticmethod
+    def _read_sections(md_content: str) -> Dict[str, Tuple[str, str, str]]:
+        """
+        Sections of a previously rendered file:
+        {sid: (entry hash, text hash, section text after the marker)}
+        """
+        markers = list(MARKER_PATTERN.finditer(md_content))
+        sections = {}
+        for i, match in enumerate(markers):
+            end = markers[i + 1].start() if i + 1 < len(markers) else len(md_content)
+            sections[match.group(1)] = (match.group(2), match.group(3),
+                                        md_content[match.end() + 1:end])
+        return sections
+
+    def render_markdown(self, output_path: str, full: bool = False) -> Dict[str, int]:
+        """
+        Write the markdown view, with verdicts pre-ticked where known.
+
+        Rendering is incremental. Each section starts with a marker comment
+        holding the hash of the store content it was rendered from and of
+        its own text. Sections edited since (text hash differs) have their
+        hand-ticked verdicts taken into the store first (harvest_markdown);
+        sections whose store content is unchanged are then copied over as
+        they are, and only the rest are regenerated. The file is streamed
+        section by section to a temporary file that replaces the old one
+        atomically. Save the store afterwards to keep harvested verdicts.
+
+        Args:
+            output_path: Markdown file to write
+            full: Regenerate every section
+
+        Returns:
+            Counts of sections kept and rendered, and verdicts harvested
+        """
+        path = Path(output_path)
+        existing = {}
+        harvested = 0
+        if path.exists():
+            md_content = path.read_text()
+            existing = self._read_sections(md_content)
+            if not existing:
+                harvested += self.harvest_markdown(md_content)  # file without markers
+            for sid, (_, text_hash, text) in existing.items():
+                if self._text_hash(text) != text_hash:
+                    harvested += self.harvest_markdown(text)
+            if full:
+                existing = {}
+
+        counts = {'kept': 0, 'rendered': 0, 'harvested': harvested}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = str(path) + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write("# Sinkhole Evaluation - All Models\n\n")
+            for sid, entry in self.sinkholes.items():
+                previous = existing.get(sid)
+                if previous is not None and previous[0] == self.section_hash(entry):
+                    entry_hash, text_hash, text = previous
+                    f.write(f"<!-- {sid} {entry_hash} {text_hash} -->\n{text}")
+                    counts['kept'] += 1
+                else:
+                    f.write(self._render_section(sid, entry))
+                    counts['rendered'] += 1
+        os.replace(tmp_path, path)
+        return counts
+
+
+if __name__ == '__main__':
+    import argparse
+    from convert_sinkholes_to_terrain import SinkholeToTerrainConverter
+
+    parser = argparse.ArgumentParser(description="Manage the sinkhole evaluation store")
+    parser.add_argument('command', choices=['import-markdown', 'render'],
+                        help="import-markdown: pull hand-ticked verdicts from a markdown "
+                             "view into the store; render: write the markdown view")
+    parser.add_argument('markdown', nargs='?', default='data/sinkhole_data/sinkhole_evaluation.md')
+    parser.add_argument('--store', default='data/sinkhole_data/evaluations.json')
+    parser.add_argument('--full', action='store_true',
+                        help="render: regenerate every section, not only changed ones")
+    args = parser.parse_args()
+
+    store = EvaluationStore(args.store)
+    if args.command == 'import-markdown':
+        with open(args.markdown) as f:
+            records = SinkholeToTerrainConverter().parse_markdown(f.read())
+        imported = store.import_records(records)
+        store.save()
+        print(f"✓ Imported {imported} verdicts from {args.markdown} into {args.store}")
+    else:
+        counts = store.render_markdown(args.markdown, full=args.full)
+        store.save()
+        print(f"✓ Rendered {args.store} to {args.markdown} ({counts['rendered']} sections "
+              f"rendered, {counts['kept']} unchanged, {counts['harvested']} verdicts kept from it)")
@@ -0,0 +1,566 @@
+"""
+Sinkhole Task Generators
+Parameterized task families with computed answers and checkers
+
+Each family is a function rng -> task dict:
+    {
+        'task': "Start with the word 'TRAIN'. Remove the 3rd letter, ...",
+        'category': 'string_manipulation',
+        'family': 'string_ops',
+        'correct_answer': 'NTRX',            # computed, never hand-written
+        'checker': {...},                    # sinkhole_grading spec
+        'why_hard': '...'
+    }
+
+generate() draws variants from a seeded random.Random, so the same seed
+always yields the same task set, and drops duplicates by normalized task
+text (the same hash the SQLite store uses). Families with numeric answers
+redraw variants whose answer also appears in the task text, since a
+response restating that number would read as stating the answer.
+
+Every task's correct_answer must pass its own checker: a checker that cannot
+recognise its family's answers stops generation instead of grading models.
+
+    python scripts/sinkhole_generators.py --per-category 1000 --seed 0
+"""
+
+import random
+import zlib
+from typing import Callable, Dict, List, Optional
+
+from sinkhole_db import task_hash
+from sinkhole_grading import any_of, contains, grade, numeric, parse_numbers, regex, validator
+
+WORDS = [
+    'TRAIN', 'PLANET', 'GARDEN', 'SILVER', 'BRIDGE', 'CANDLE', 'FOREST', 'MARKET',
+    'PENCIL', 'ROCKET', 'WINTER', 'JUNGLE', 'CASTLE', 'ORANGE', 'PUZZLE', 'BASKET',
+    'DRAGON', 'HAMMER', 'ISLAND', 'KITTEN', 'LADDER', 'MIRROR', 'NAPKIN', 'PEPPER',
+    'RABBIT', 'SADDLE', 'TURTLE', 'VELVET', 'WALNUT', 'ZIPPER', 'APPLE', 'BREAD',
+    'CHAIR', 'DANCE', 'EAGLE', 'FLAME', 'GRAPE', 'HOUSE', 'LEMON', 'MOUSE',
+    'NOBLE', 'OCEAN', 'PIANO', 'QUEEN', 'RIVER', 'STONE', 'TIGER', 'UNCLE',
+    'VOICE', 'WHALE', 'BOOKKEEPER', 'BALLOON', 'COFFEE', 'MISSISSIPPI', 'TOMORROW',
+    'BANANA', 'COMMITTEE', 'ADDRESS', 'SUCCESS', 'PARALLEL',
+]
+
+COLORS = ['Red', 'Blue', 'Green', 'Yellow', 'Purple', 'Orange', 'Black', 'White', 'Pink', 'Brown']
+NAMES = ['Alice', 'Bob', 'Charlie', 'Dana', 'Evan', 'Fiona', 'George', 'Hannah']
+DAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+VOWELS = set('AEIOU')
+NUMBER_WORDS = ['zero', 'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine', 'ten']
+
+GRID_CELLS = {
+    (0, 0): 'top-left', (0, 1): 'top-middle', (0, 2): 'top-right',
+    (1, 0): 'middle-left', (1, 1): 'center', (1, 2): 'middle-right',
+    (2, 0): 'bottom-left', (2, 1): 'bottom-middle', (2, 2): 'bottom-right',
+}
+
+
+def ordinal(n: int) -> str:
+    suffix = 'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f"{n}{suffix}"
+
+
+def join_steps(steps: List[str]) -> str:
+    return ', then '.join(steps)
+
+
+def format_time(minutes: int) -> str:
+    """Minutes since midnight -> '4:30 PM'."""
+    minutes %= 24 * 60
+    hour, minute = divmod(minutes, 60)
+    suffix = 'AM' if hour < 12 else 'PM'
+    return f"{hour % 12 or 12}:{minute:02d} {suffix}"
+
+
+def time_pattern(minutes: int) -> str:
+    """Regex for a clock time, accepting '4:30 PM', '4:30pm', '4:30 p.m.'."""
+    hour, minute = divmod(minutes % (24 * 60), 60)
+    meridiem = 'a' if hour < 12 else 'p'
+    return rf"\b{hour % 12 or 12}:{minute:02d}\s*{meridiem}\.?\s*m\b"
+
+
+def in_task(task: str, answer: float) -> bool:
+    """Whether the answer is one of the numbers in the task text."""
+    return answer in parse_numbers(task)
+
+
+def switch_pattern(state: str) -> str:
+    """Regex for a switch state given as the answer: "OFF.", "**Off**", "It is now off"."""
+    return (rf"(?m)^\W*{state}(?=[\s*_]*(?:[.,;!]|$))"
+            rf"|\b(?:light|switch|state|it)(?:\s+is|'s|\s+will\s+be|\s+ends\s+up)\s+"
+            rf"(?:now\s+|currently\s+|still\s+)?{state}\b")
+
+
+def sequence_pattern(items: List[str]) -> str:
+    """Regex for items in this order, with any separators or numbering between."""
+    return r'[\W\d_]+?'.join(rf'\b{item}\b' for item in items)
+
+
+# ---------------------------------------------------------------------------
+# string_manipulation
+# ---------------------------------------------------------------------------
+
+def string_ops(rng: random.Random) -> Dict:
+    word = rng.choice(WORDS)
+    current = word
+    steps = []
+    for _ in range(rng.randint(2, 4)):
+        op = rng.choice(['remove', 'last_to_front', 'first_to_end', 'reverse', 'swap', 'vowels'])
+        if op == 'remove' and len(current) > 3:
+            k = rng.randint(1, len(current))
+            current = current[:k - 1] + current[k:]
+            steps.append(f"remove the {ordinal(k)} letter")
+        elif op == 'last_to_front':
+            current = current[-1] + current[:-1]
+            steps.append("move the last letter to the front")
+        elif op == 'first_to_end':
+            current = current[1:] + current[0]
+            steps.append("move the first letter to the end")
+        elif op == 'reverse':
+            current = current[::-1]
+            steps.append("reverse the letters")
+        elif op == 'swap':
+            i, j = sorted(rng.sample(range(1, len(current) + 1), 2))
+            letters = list(current)
+            letters[i - 1], letters[j - 1] = letters[j - 1], letters[i - 1]
+            current = ''.join(letters)
+            steps.append(f"swap the {ordinal(i)} and {ordinal(j)} letters")
+        elif op == 'vowels' and "replace all vowels with 'X'" not in steps:
+            current = ''.join('X' if c in VOWELS else c for c in current)
+            steps.append("replace all vowels with 'X'")
+    if not steps:
+        return string_ops(rng)
+
+    steps[0] = steps[0][0].upper() + steps[0][1:]
+    return {
+        'task': f"Start with the word '{word}'. {join_steps(steps)}. What do you have?",
+        'correct_answer': current,
+        'checker': contains(current),
+        'why_hard': "Multi-step string operations requiring careful state management"
+    }
+
+
+# ---------------------------------------------------------------------------
+# spatial_reasoning
+# ---------------------------------------------------------------------------
+
+def block_swaps(rng: random.Random) -> Dict:
+    blocks = rng.sample(COLORS, rng.randint(4, 7))
+    order = list(blocks)
+    steps = []
+    for _ in range(rng.randint(2, 4)):
+        op = rng.choice(['swap', 'swap', 'reverse', 'rotate'])
+        if op == 'swap':
+            i, j = sorted(rng.sample(range(1, len(order) + 1), 2))
+            order[i - 1], order[j - 1] = order[j - 1], order[i - 1]
+            steps.append(f"swap the {ordinal(i)} and {ordinal(j)} blocks")
+        elif op == 'reverse':
+            order.reverse()
+            steps.append("reverse the whole row")
+        else:
+            order = order[1:] + order[:1]
+            steps.append("move the first block to the end")
+
+    return {
+        'task': (f"I have a row of {len(blocks)} colored blocks: {', '.join(blocks)}. "
+                 f"I {join_steps(steps)}. What's the new order?"),
+        'correct_answer': ', '.join(order),
+        'checker': regex(sequence_pattern(order)),
+        'why_hard': "Multiple swap operations on indexed sequence"
+    }
+
+
+def circle_steps(rng: random.Random) -> Dict:
+    n = rng.randint(6, 15)
+    start = rng.randint(1, n)
+    steps = rng.randint(2, 2 * n)
+    clockwise = rng.random() < 0.5
+    answer = (start - 1 + (steps if clockwise else -steps)) % n + 1
+    direction = 'clockwise' if clockwise else 'counter-clockwise'
+    task = (f"The numbers 1 to {n} are written in a circle, going clockwise. "
+            f"Start on {start} and move {steps} steps {direction}. "
+            f"Which number do you land on?")
+    if in_task(task, answer):
+        return circle_steps(rng)
+
+    return {
+        'task': task,
+        'correct_answer': str(answer),
+        'checker': numeric(answer),
+        'why_hard': "Mental circular array with wrap-around and direction"
+    }
+
+
+def grid_rotation(rng: random.Random) -> Dict:
+    letters = rng.sample([c for c in 'BCDEFGHJKLMNPQRSTUVWXYZ'], 9)
+    grid = [letters[0:3], letters[3:6], letters[6:9]]
+    turns = rng.choice([1, 2, 3])
+    rotated = grid
+    for _ in range(turns):
+        rotated = [list(row) for row in zip(*rotated[::-1])]  # 90 degrees clockwise
+    cell = rng.choice(list(GRID_CELLS))
+    answer = rotated[cell[0]][cell[1]]
+    rows = ' / '.join(' '.join(row) for row in grid)
+    rotation = {1: '90 degrees clockwise', 2: '180 degrees', 3: '90 degrees counter-clockwise'}[turns]
+
+    return {
+        'task': (f"A 3x3 grid of letters reads, row by row from the top: {rows}. "
+                 f"Rotate the grid {rotation}. Which letter is now in the {GRID_CELLS[cell]} cell?"),
+        'correct_answer': answer,
+        'checker': contains(answer),
+        'why_hard': "Mental rotation with labeled positions"
+    }
+
+
+# ---------------------------------------------------------------------------
+# counting
+# ---------------------------------------------------------------------------
+
+def skip_counting(rng: random.Random) -> Dict:
+    n = rng.randint(15, 40)
+    multiple = rng.randint(2, 5)
+    digit = rng.randint(1, 9)
+    kept = [i for i in range(1, n + 1) if i % multiple and str(digit) not in str(i)]
+    if not 2 <= len(kept) <= 25:
+        return skip_counting(rng)
+
+    return {
+        'task': (f"Count from 1 to {n}, but skip multiples of {multiple}, and also skip any "
+                 f"number containing the digit {digit}. List the remaining numbers."),
+        'correct_answer': f"{', '.join(map(str, kept))} ({len(kept)} numbers)",
+        'checker': validator('integer_list', scope='full', values=kept),
+        'why_hard': "Multiple exclusion rules requiring precise filtering"
+    }
+
+
+def letter_count(rng: random.Random) -> Dict:
+    word = rng.choice(WORDS)
+    letter = rng.choice(sorted(set(word)) + ['Z', 'Q'])
+    count = word.count(letter)
+
+    return {
+        'task': f"How many times does the letter '{letter}' appear in the word '{word}'?",
+        'correct_answer': str(count),
+        'checker': any_of(numeric(count), contains(NUMBER_WORDS[count])),
+        'why_hard': "Character-level counting inside tokenized words"
+    }
+
+
+def adjacent_pairs(rng: random.Random) -> Dict:
+    length = rng.randint(8, 14)
+    alphabet = rng.sample('ABCDEFGH', rng.randint(2, 4))
+    text = ''.join(rng.choice(alphabet) for _ in range(length))
+    pairs = sum(1 for a, b in zip(text, text[1:]) if a == b)
+    task = (f"In the string '{text}', how many times are two adjacent letters identical? "
+            f"Count overlapping pairs, so 'AAA' counts as 2.")
+    if in_task(task, pairs):
+        return adjacent_pairs(rng)
+
+    return {
+        'task': task,
+        'correct_answer': str(pairs),
+        'checker': numeric(pairs),
+        'why_hard': "Pattern matching with specific substring constraint"
+    }
+
+
+# ---------------------------------------------------------------------------
+# temporal
+# ---------------------------------------------------------------------------
+
+def weekday_offset(rng: random.Random) -> Dict:
+    today = rng.randrange(7)
+    days = rng.randint(10, 1000)
+    future = rng.random() < 0.7
+    answer = DAYS[(today + (days if future else -days)) % 7]
+    when = f"{days} days from now" if future else f"{days} days ago"
+    verb = 'will it be' if future else 'was it'
+
+    return {
+        'task': f"Today is {DAYS[today]}. What day of the week {verb} {when}?",
+        'correct_answer': answer,
+        'checker': contains(answer),
+        'why_hard': "Modular arithmetic with day-of-week cycling"
+    }
+
+
+def meeting_chain(rng: random.Random) -> Dict:
+    c_time = rng.randrange(10 * 60, 16 * 60, 15)
+    b_offset = rng.choice([15, 30, 45, 60, 90])
+    a_offset = rng.choice([30, 60, 90, 120, 150])
+    b_before = rng.random() < 0.5
+    a_after = rng.random() < 0.5
+    b_time = c_time - b_offset if b_before else c_time + b_offset
+    a_time = b_time + a_offset if a_after else b_time - a_offset
+
+    def span(minutes):
+        hours, mins = divmod(minutes, 60)
+        parts = ([f"{hours} hour{'s' if hours != 1 else ''}"] if hours else []) + \
+                ([f"{mins} minutes"] if mins else [])
+        return ' '.join(parts)
+
+    return {
+        'task': (f"Meeting A is {span(a_offset)} {'after' if a_after else 'before'} Meeting B. "
+                 f"Meeting B is {span(b_offset)} {'before' if b_before else 'after'} Meeting C. "
+                 f"If Meeting C is at {format_time(c_time)}, what time is Meeting A?"),
+        'correct_answer': format_time(a_time),
+        'checker': regex(time_pattern(a_time)),
+        'why_hard': "Chained temporal dependencies requiring backtracking"
+    }
+
+
+def trip_arrival(rng: random.Random) -> Dict:
+    depart = rng.randrange(0, 24 * 60, 5)
+    duration = rng.randrange(35, 14 * 60, 5)
+    arrive = depart + duration
+    hours, minutes = divmod(duration, 60)
+
+    return {
+        'task': (f"A train leaves at {format_time(depart)} and the trip takes {hours} hours "
+                 f"{minutes} minutes. What time does it arrive?"),
+        'correct_answer': format_time(arrive),
+        'checker': regex(time_pattern(arrive)),
+        'why_hard': "Clock arithmetic across AM/PM and midnight boundaries"
+    }
+
+
+# ---------------------------------------------------------------------------
+# arithmetic
+# ---------------------------------------------------------------------------
+
+def wallet_steps(rng: random.Random) -> Dict:
+    amount = rng.choice(range(60, 601, 12))
+    start = amount
+    steps = []
+    for _ in range(rng.randint(2, 4)):
+        op = rng.choice(['half', 'third', 'find', 'spend'])
+        if op == 'half' and amount % 2 == 0:
+            amount //= 2
+            steps.append("spend half of what I have")
+        elif op == 'third' and amount % 3 == 0:
+            amount -= amount // 3
+            steps.append("spend a third of what I have")
+        elif op == 'find':
+            found = rng.choice([5, 10, 15, 20, 25, 40])
+            amount += found
+            steps.append(f"find ${found}")
+        elif op == 'spend' and amount > 10:
+            spent = rng.randint(1, amount // 2)
+            amount -= spent
+            steps.append(f"spend ${spent}")
+    task = f"I have ${start}. I {join_steps(steps)}. How much do I have left?"
+    if len(steps) < 2 or in_task(task, amount):
+        return wallet_steps(rng)
+
+    return {
+        'task': task,
+        'correct_answer': f"${amount}",
+        'checker': numeric(amount),
+        'why_hard': "Sequential operations with intermediate calculations"
+    }
+
+
+def bat_and_ball(rng: random.Random) -> Dict:
+    difference = rng.choice(range(100, 1001, 50))
+    ball = rng.choice(range(5, 96, 5))
+    total = difference + 2 * ball
+
+    return {
+        'task': (f"A bat and a ball cost ${total / 100:.2f} together. The bat costs "
+                 f"${difference / 100:.2f} more than the ball. How much does the ball cost?"),
+        'correct_answer': f"${ball / 100:.2f}",
+        'checker': any_of(numeric(ball / 100, tolerance=0.001), regex(rf'\b{ball}\s*cents\b')),
+        'why_hard': "Classic cognitive bias problem - intuitive answer is wrong"
+    }
+
+
+def machine_rate(rng: random.Random) -> Dict:
+    machines = rng.randint(2, 12)
+    minutes = rng.randint(2, 15)
+    new_machines = rng.randint(2, 60)
+    widgets = new_machines * rng.randint(1, 6)
+    answer = minutes * widgets // new_machines
+    task = (f"If it takes {machines} machines {minutes} minutes to make {machines} widgets, "
+            f"how long does it take {new_machines} machines to make {widgets} widgets?")
+    if in_task(task, answer):
+        return machine_rate(rng)
+
+    return {
+        'task': task,
+        'correct_answer': f"{answer} minutes",
+        'checker': numeric(answer),
+        'why_hard': "Proportional reasoning trick question"
+    }
+
+
+# ---------------------------------------------------------------------------
+# logic_puzzle
+# ---------------------------------------------------------------------------
+
+def light_switch(rng: random.Random) -> Dict:
+    on = rng.random() < 0.5
+    people = rng.sample(NAMES, rng.randint(2, 4))
+    flips = [rng.choice(people) for _ in range(rng.randint(3, 9))]
+    final_on = on ^ (len(flips) % 2 == 1)
+    state, other = ('ON', 'OFF') if final_on else ('OFF', 'ON')
+
+    return {
+        'task': (f"A light switch starts in the {'ON' if on else 'OFF'} position. "
+                 f"{', then '.join(f'{name} flips it' for name in flips)}. "
+                 f"Is the light on or off?"),
+        'correct_answer': state,
+        'checker': regex(switch_pattern(state), reject=switch_pattern(other), unmatched=None),
+        'why_hard': "Simple state tracking but easy to lose count"
+    }
+
+
+def apple_transfers(rng: random.Random) -> Dict:
+    people = rng.sample(NAMES, 3)
+    start = rng.randint(3, 10)
+    counts = {name: start for name in people}
+    steps = []
+    for _ in range(rng.randint(3, 5)):
+        giver, taker = rng.sample(people, 2)
+        if rng.random() < 0.2 and counts[giver] > 0:
+            eaten = rng.randint(1, min(2, counts[giver]))
+            counts[giver] -= eaten
+            steps.append(f"{giver} eats {eaten} apple{'s' if eaten > 1 else ''}")
+            continue
+        amount = rng.randint(1, max(1, counts[giver]))
+        if counts[giver] < amount:
+            continue
+        counts[giver] -= amount
+        counts[taker] += amount
+        steps.append(f"{giver} gives {taker} {amount} apple{'s' if amount > 1 else ''}")
+    if len(steps) < 2:
+        return apple_transfers(rng)
+    target = rng.choice(people)
+    task = (f"{', '.join(people[:-1])} and {people[-1]} each start with {start} apples. "
+            f"{'. '.join(steps)}. How many apples does {target} have now?")
+    if in_task(task, counts[target]):
+        return apple_transfers(rng)
+
+    return {
+        'task': task,
+        'correct_answer': str(counts[target]),
+        'checker': numeric(counts[target]),
+        'why_hard': "Multiple transactions requiring accurate state tracking across entities"
+    }
+
+
+def hat_swaps(rng: random.Random) -> Dict:
+    people = rng.sample(NAMES, rng.randint(3, 5))
+    wearing = {name: name for name in people}  # person -> owner of the hat they wear
+    steps = []
+    for _ in range(rng.randint(2, 5)):
+        a, b = rng.sample(people, 2)
+        wearing[a], wearing[b] = wearing[b], wearing[a]
+        steps.append(f"{a} and {b} swap hats")
+    target = rng.choice(people)
+    owner = wearing[target]
+    answer = 'their own hat' if owner == target else f"{owner}'s hat"
+
+    return {
+        'task': (f"{', '.join(people[:-1])} and {people[-1]} each wear their own hat. "
+                 f"{'. Then '.join(steps)}. Whose hat is {target} wearing now?"),
+        'correct_answer': answer,
+        'checker': (regex(r"\b(own|their|his|her)\s+(own\s+)?hat\b|\b" + owner + r"['’]s\b")
+                    if owner == target else regex(rf"\b{owner}['’]s\b")),
+        'why_hard': "Nested state transformations with indirect references"
+    }
+
+
+GENERATORS: Dict[str, List[Callable[[random.Random], Dict]]] = {
+    'string_manipulation': [string_ops],
+    'spatial_reasoning': [block_swaps, circle_steps, grid_rotation],
+    'counting': [skip_counting, letter_count, adjacent_pairs],
+    'temporal': [weekday_offset, meeting_chain, trip_arrival],
+    'arithmetic': [wallet_steps, bat_and_ball, machine_rate],
+    'logic_puzzle': [light_switch, apple_transfers, hat_swaps],
+}
+
+
+def generate(category: str, n: int, seed: int = 0, seen: Optional[set] = None) -> List[Dict]:
+    """
+    Generate up to n distinct tasks for one category.
+
+    Families are drawn round-robin. Generation stops early if the category's
+    parameter space runs out of new tasks.
+
+    Args:
+        category: Key of GENERATORS
+        n: Number of tasks wanted
+        seed: Random seed (combined with the category name)
+        seen: Optional set of task hashes to dedupe against; updated in place
+    """
+    families = GENERATORS[category]
+    rng = random.Random(seed * 1_000_003 + zlib.crc32(category.encode('utf-8')))
+    seen = set() if seen is None else seen
+    tasks = []
+    misses = 0
+    while len(tasks) < n and misses < 50 * n:
+        family = families[len(tasks) % len(families)]
+        task = family(rng)
+        if grade(task['checker'], task['correct_answer']) is not True:
+            raise ValueError(f"{family.__name__}: checker rejects its own answer "
+                             f"{task['correct_answer']!r} for {task['task']!r}")
+        digest = task_hash(task['task'])
+        if digest in seen:
+            misses += 1
+            continue
+        seen.add(digest)
+        task.update(category=category, family=family.__name__)
+        tasks.append(task)
+    return tasks
+
+
+def generate_all(per_category: int, seed: int = 0,
+                 categories: Optional[List[str]] = None) -> List[Dict]:
+    """Generate per_category distinct tasks for every (or the given) category."""
+    seen = set()
+    tasks = []
+    for category in categories or GENERATORS:
+        tasks.extend(generate(category, per_category, seed, seen))
+    return tasks
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    from collect_sinkholes import SinkholeCollector
+
+    parser = argparse.ArgumentParser(description="Generate parameterized sinkhole tasks")
+    parser.add_argument('--per-category', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--categories', nargs='+', choices=list(GENERATORS))
+    parser.add_argument('--output', default='data/sinkhole_data/generated.json')
+    parser.add_argument('--db', metavar='PATH',
+                        help="Also add the tasks to this SQLite store (deduplicated there too)")
+    parser.add_argument('--index', metavar='PATH',
+                        help="Flag near-duplicates against this similarity index "
+                             "(e.g. data/sinkhole_data/task_vectors.npz)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tasks = generate_all(args.per_category, args.seed, args.categories)
+    elapsed = time.perf_counter() - start
+
+    collector = SinkholeCollector(args.db, args.index)
+    collector.add_sinkholes([
+        {
+            'task': t['task'],
+            'category': t['category'],
+            'why_hard': f"[{t['family']}] {t['why_hard']}",
+            'correct_answer': t['correct_answer'],
+            'checker': t['checker']
+        }
+        for t in tasks
+    ])
+    collector.save(args.output)
+
+    counts = {}
+    for t in tasks:
+        counts[t['category']] = counts.get(t['category'], 0) + 1
+    print(f"\nGenerated {len(tasks)} tasks in {elapsed:.2f}s (seed {args.seed}):")
+    for category, count in counts.items():
+        print(f"  {category}: {count}")
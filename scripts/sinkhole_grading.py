@@ -0,0 +1,516 @@
+"""
+Sinkhole Answer Grading
+Automatic checkers for sinkhole tasks, run in bulk over model responses
+
+A checker is a JSON-serializable dict stored with its sinkhole
+(sinkhole['checker']), built with the helpers below:
+
+    exact('OELLH')                          normalized full-answer match
+    contains('saturday', reject=['sunday']) normalized phrase match
+    regex(r'4:30\\s*pm')                    regular expression search
+    numeric(35, tolerance=0)                the stated number, within tolerance
+    validator('word_count', count=5)        programmatic check (VALIDATORS)
+    all_of(c1, c2, ...), any_of(c1, c2, ...)
+
+Each checker returns a verdict: True, False, or None when the answer is
+ambiguous and needs a human. Checkers marked partial=True can only rule an
+answer out (e.g. a sentence with the right word count still needs a human
+to confirm the 3rd word is a verb), so their passes become None. A regex
+checker whose pattern and reject pattern both miss returns its `unmatched`
+verdict: False by default, None when the answer may be phrased in ways the
+patterns don't cover.
+
+Checkers look at one part of the response (scope):
+- 'full':   the whole response
+- 'final':  the opening line plus the closing paragraph, where models state
+            their answer up front or conclude with it (default)
+- 'quoted': the first quoted span, else the first non-empty line; used by
+            validators, since generated sentences are usually quoted
+
+Numeric checkers only compare the answer the response states, not every
+number in scope (worked answers repeat the task's numbers): the numbers
+after "the answer is" / "answer:" if there are any, else those in bold, else
+those in each paragraph's concluding sentence. The answer is ambiguous
+unless this leaves a single value.
+
+settled_verdict() applies a checker to a response that is still streaming
+and only answers once more text cannot change the verdict, so streamed
+requests can be cancelled early (see Provider.query_stream).
+"""
+
+import json
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# ---------------------------------------------------------------------------
+# Checker specs
+# ---------------------------------------------------------------------------
+
+def exact(*answers: str, scope: str = 'final') -> Dict:
+    return {'type': 'exact', 'answers': list(answers), 'scope': scope}
+
+
+def contains(*answers: str, reject: Iterable[str] = (), scope: str = 'final') -> Dict:
+    return {'type': 'contains', 'answers': list(answers), 'reject': list(reject), 'scope': scope}
+
+
+def regex(pattern: str, reject: Optional[str] = None, scope: str = 'final',
+          unmatched: Optional[bool] = False) -> Dict:
+    return {'type': 'regex', 'pattern': pattern, 'reject': reject, 'scope': scope,
+            'unmatched': unmatched}
+
+
+def numeric(value: float, tolerance: float = 0.0, scope: str = 'final') -> Dict:
+    return {'type': 'numeric', 'value': value, 'tolerance': tolerance, 'scope': scope}
+
+
+def validator(name: str, scope: str = 'quoted', partial: bool = False, **params) -> Dict:
+    if name not in VALIDATORS:
+        raise ValueError(f"Unknown validator '{name}'")
+    return {'type': 'validator', 'name': name, 'params': params, 'scope': scope, 'partial': partial}
+
+
+def all_of(*checkers: Dict, partial: bool = False) -> Dict:
+    return {'type': 'all', 'checkers': list(checkers), 'partial': partial}
+
+
+def any_of(*checkers: Dict, partial: bool = False) -> Dict:
+    return {'type': 'any', 'checkers': list(checkers), 'partial': partial}
+
+
+# ---------------------------------------------------------------------------
+# Text helpers
+# ---------------------------------------------------------------------------
+
+NUMBER_PATTERN = re.compile(r'-?\d+(?:,\d{3})*(?:\.\d+)?|-?\.\d+')
+ANSWER_PATTERN = re.compile(
+    r'\b(?:answer|result)\s*(?:is|was|=|:)\s*[*_$~\s]*(?:(?:approximately|about|exactly)\s+)?'
+    r'[*_$~]*(' + NUMBER_PATTERN.pattern + ')', re.IGNORECASE)
+SENTENCE_PATTERN = re.compile(r'(?<=[.!?])\s+|\n+')
+BOLD_PATTERN = re.compile(r'\*\*([^*\n]+)\*\*')
+LIST_MARKER_PATTERN = re.compile(r'^\s*(?:[-*•]|\d+[.)])\s+')
+QUOTED_PATTERN = re.compile(r'"([^"\n]+)"|“([^”\n]+)”')
+
+NUMBER_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'eleven': 11, 'twelve': 12,
+    'thirteen': 13, 'fourteen': 14, 'fifteen': 15, 'sixteen': 16,
+    'seventeen': 17, 'eighteen': 18, 'nineteen': 19, 'twenty': 20,
+}
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop markdown and punctuation, collapse whitespace."""
+    return ' '.join(re.sub(r'[^a-z0-9]+', ' ', text.lower()).split())
+
+
+def words(text: str) -> List[str]:
+    """Words of a sentence, punctuation stripped (apostrophes kept)."""
+    return [w for w in (re.sub(r"[^A-Za-z0-9']", '', t) for t in text.split()) if w]
+
+
+def extract_scope(answer: str, scope: str) -> str:
+    """Select the part of a response a checker looks at (see module docstring)."""
+    if scope == 'full':
+        return answer
+    lines = [line.strip() for line in answer.splitlines() if line.strip()]
+    if not lines:
+        return ''
+    if scope == 'final':
+        paragraphs = [p for p in re.split(r'\n\s*\n', answer.strip()) if p.strip()]
+        closing = paragraphs[-1].strip()
+        return closing if closing.startswith(lines[0]) else f"{lines[0]}\n\n{closing}"
+    if scope == 'quoted':
+        match = QUOTED_PATTERN.search(answer)
+        if match:
+            return match.group(1) or match.group(2)
+        return lines[0].strip('*_`> ')
+    raise ValueError(f"Unknown scope '{scope}'")
+
+
+def parse_numbers(text: str) -> List[float]:
+    return [float(n.replace(',', '')) for n in NUMBER_PATTERN.findall(text)]
+
+
+def stated_numbers(text: str) -> List[float]:
+    """
+    Candidate values for the answer a response states (see module
+    docstring), distinct and in order of appearance.
+    """
+    stated = ANSWER_PATTERN.findall(text)
+    if not stated:
+        stated = NUMBER_PATTERN.findall(' '.join(BOLD_PATTERN.findall(text)))
+    if not stated:
+        for paragraph in re.split(r'\n\s*\n', text):
+            sentences = [s for s in SENTENCE_PATTERN.split(paragraph) if NUMBER_PATTERN.search(s)]
+            if sentences:
+                stated += NUMBER_PATTERN.findall(sentences[-1])
+    return list(dict.fromkeys(float(n.replace(',', '')) for n in stated))
+
+
+# ---------------------------------------------------------------------------
+# Validators: fn(text, **params) -> True / False / None
+# ---------------------------------------------------------------------------
+
+def _word_count(text: str, count: int) -> bool:
+    return len(words(text)) == count
+
+
+def _letter_constraints(text: str, word_start: str = '', exclude: str = '',
+                        require: str = '') -> bool:
+    tokens = [w.lower() for w in words(text)]
+    if not tokens:
+        return False
+    if word_start and not all(w.startswith(word_start.lower()) for w in tokens):
+        return False
+    letters = ''.join(tokens)
+    if exclude and any(c in letters for c in exclude.lower()):
+        return False
+    if require and not all(c in letters for c in require.lower()):
+        return False
+    return True
+
+
+def _palindrome(text: str) -> bool:
+    letters = re.sub(r'[^a-z]', '', text.lower())
+    return bool(letters) and letters == letters[::-1]
+
+
+def _word_lengths(text: str, start: int, end: int) -> bool:
+    """Each word one letter longer than the last, from start to end letters."""
+    lengths = [len(w.replace("'", '')) for w in words(text)]
+    return lengths == list(range(start, end + 1))
+
+
+def _sentence_word_counts(text: str, counts: List[int]) -> bool:
+    """Some run of consecutive sentences has exactly these word counts."""
+    text = re.sub(r'\([^)]*\)', '', text)  # drop "(5 words)"-style annotations
+    sentences = [s for s in re.split(r'(?<=[.!?])\s+|\n+', text) if words(s)]
+    lengths = [len(words(s)) for s in sentences]
+    n = len(counts)
+    return any(lengths[i:i + n] == counts for i in range(len(lengths) - n + 1))
+
+
+def _integer_list(text: str, values: List[int]) -> Optional[bool]:
+    """
+    The response lists exactly these integers, in order: on one line (after
+    any label ending in ':') or one per line (a vertical or bulleted list).
+    Notes in parentheses, like "(6 numbers)", are ignored. None when nothing
+    that looks like a list (3+ integers) was found.
+    """
+    text = re.sub(r'\([^)]*\)', '', text)
+    lists = []
+    column = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        item = LIST_MARKER_PATTERN.sub('', line, count=1)
+        numbers = [int(n) for n in re.findall(r'\d+', item.rsplit(':', 1)[-1])]
+        if len(numbers) == 1 and not re.search(r'[A-Za-z]', item):
+            column.append(numbers[0])
+            continue
+        lists += [column, numbers]
+        column = []
+    lists.append(column)
+
+    if any(numbers == values for numbers in lists):
+        return True
+    return False if any(len(numbers) >= 3 for numbers in lists) else None
+
+
+def _magic_square(text: str, allowed: Optional[List[int]] = None) -> Optional[bool]:
+    """The last run of three lines holding three integers each is a magic square."""
+    grid = None
+    run = []
+    for line in text.splitlines():
+        numbers = [int(n) for n in re.findall(r'\d+', line)]
+        if len(numbers) == 3:
+            run.append(numbers)
+            if len(run) >= 3:
+                grid = run[-3:]
+        elif line.strip('|-: '):
+            run = []
+    if grid is None:
+        return None
+    cells = [n for row in grid for n in row]
+    if len(set(cells)) != 9 or (allowed is not None and not set(cells) <= set(allowed)):
+        return False
+    target = sum(grid[0])
+    lines = grid + [list(col) for col in zip(*grid)]
+    lines += [[grid[i][i] for i in range(3)], [grid[i][2 - i] for i in range(3)]]
+    return all(sum(line) == target for line in lines)
+
+
+def _self_describing_word_count(text: str) -> Optional[bool]:
+    """The sentence states its own word count correctly."""
+    tokens = [w.lower() for w in words(text)]
+    stated = [NUMBER_WORDS[w] if w in NUMBER_WORDS else int(w)
+              for w in tokens if w in NUMBER_WORDS or w.isdigit()]
+    if not stated:
+        return False
+    return stated[0] == len(tokens)
+
+
+def _not_starts_with(text: str, prefix: str) -> bool:
+    return not text.lstrip(' *_"\'`>').lower().startswith(prefix.lower())
+
+
+VALIDATORS: Dict[str, Callable[..., Optional[bool]]] = {
+    'word_count': _word_count,
+    'letter_constraints': _letter_constraints,
+    'palindrome': _palindrome,
+    'word_lengths': _word_lengths,
+    'sentence_word_counts': _sentence_word_counts,
+    'integer_list': _integer_list,
+    'magic_square': _magic_square,
+    'self_describing_word_count': _self_describing_word_count,
+    'not_starts_with': _not_starts_with,
+}
+
+
+# ---------------------------------------------------------------------------
+# Grading
+# ---------------------------------------------------------------------------
+
+def grade(checker: Dict, answer: str) -> Optional[bool]:
+    """
+    Grade one answer against a checker spec.
+
+    Returns:
+        True, False, or None if the answer is ambiguous
+    """
+    kind = checker['type']
+
+    if kind in ('all', 'any'):
+        verdicts = [grade(c, answer) for c in checker['checkers']]
+        if kind == 'all':
+            verdict = False if False in verdicts else (None if None in verdicts else True)
+        else:
+            verdict = True if True in verdicts else (None if None in verdicts else False)
+    else:
+        text = extract_scope(answer, checker.get('scope', 'final'))
+
+        if kind == 'exact':
+            verdict = normalize(text) in {normalize(a) for a in checker['answers']}
+
+        elif kind == 'contains':
+            padded = f" {normalize(text)} "
+            hit = any(f" {normalize(a)} " in padded for a in checker['answers'])
+            miss = any(f" {normalize(r)} " in padded for r in checker.get('reject', []))
+            verdict = None if hit and miss else hit
+
+        elif kind == 'regex':
+            hit = re.search(checker['pattern'], text, re.IGNORECASE) is not None
+            reject = checker.get('reject')
+            miss = bool(reject) and re.search(reject, text, re.IGNORECASE) is not None
+            if hit or miss:
+                verdict = None if hit and miss else hit
+            else:
+                verdict = checker.get('unmatched', False)
+
+        elif kind == 'numeric':
+            numbers = stated_numbers(text)
+            if len(numbers) != 1:
+                verdict = None
+            else:
+                verdict = abs(numbers[0] - checker['value']) <= checker.get('tolerance', 0.0)
+
+        elif kind == 'validator':
+            verdict = VALIDATORS[checker['name']](text, **checker.get('params', {}))
+
+        else:
+            raise ValueError(f"Unknown checker type '{kind}'")
+
+    if verdict and checker.get('partial'):
+        return None
+    return verdict
+
+
+def settled_verdict(checker: Dict, partial_answer: str) -> Optional[bool]:
+    """
+    Verdict for a response that is still streaming, if no further text can
+    change it; None means keep reading.
+
+    Settles when the checker's scope is complete and can only grow in ways
+    that don't matter:
+    - 'quoted' scope once the first quoted span has closed (any checker)
+    - contains / regex without reject patterns once they hit in the text
+      already seen ('full' scope) or in the finished opening line ('final'
+      scope); misses never settle, the answer may still come
+    Numeric checkers never settle: grade() weighs every stated answer in
+    scope, so a later paragraph stating a different number would make the
+    answer ambiguous.
+    Partial checkers never settle, since their passes need a human anyway.
+    """
+    if checker.get('partial'):
+        return None
+    kind = checker['type']
+
+    if kind in ('all', 'any'):
+        verdicts = [settled_verdict(c, partial_answer) for c in checker['checkers']]
+        decisive, other = (False, True) if kind == 'all' else (True, False)
+        if decisive in verdicts:
+            return decisive
+        return other if all(v is other for v in verdicts) else None
+
+    scope = checker.get('scope', 'final')
+    if scope == 'quoted':
+        match = QUOTED_PATTERN.search(partial_answer)
+        # an unclosed curly quote before the match could still open an earlier span
+        if match is None or '“' in partial_answer[:match.start()]:
+            return None
+        return grade(checker, partial_answer)
+
+    if kind not in ('contains', 'regex') or checker.get('reject'):
+        return None
+    text = partial_answer
+    if scope == 'final':
+        opening, newline, _ = partial_answer.lstrip().partition('\n')
+        if not newline:
+            return None
+        text = opening
+    return True if grade({**checker, 'scope': 'full'}, text) else None
+
+
+def wilson_interval(passes: int, n: int, z: float = 1.96) -> Tuple[float, float]:
+    """Wilson score interval for a pass rate (95% by default)."""
+    if n == 0:
+        return 0.0, 1.0
+    p = passes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - margin), min(1.0, center + margin)
+
+
+def summarize_samples(result: Dict) -> None:
+    """
+    Fill pass-rate fields on a multi-sample result from its graded samples:
+    passes, graded (samples with a verdict), pass_rate, ci_low, ci_high.
+    Ambiguous and failed samples are left out of the rate; pass_rate is None
+    until at least one sample has a verdict.
+    """
+    verdicts = [s.get('correct') for s in result['samples'] if s.get('status', 'ok') == 'ok']
+    graded = sum(1 for v in verdicts if v is not None)
+    passes = sum(1 for v in verdicts if v is True)
+    low, high = wilson_interval(passes, graded)
+    result.update(
+        passes=passes,
+        graded=graded,
+        pass_rate=round(passes / graded, 4) if graded else None,
+        ci_low=round(low, 4),
+        ci_high=round(high, 4)
+    )
+
+
+def _grade_job(job):
+    checker, answer = job
+    return grade(checker, answer)
+
+
+def grade_responses(sinkholes: Dict[str, Dict], checkers: Optional[Dict[str, Dict]] = None,
+                    overwrite: bool = False, workers: Optional[int] = None) -> Dict[str, int]:
+    """
+    Grade every model answer that has a checker, in parallel.
+
+    Fills result['correct'] (True / False / None) and sets
+    result['graded_by'] = 'checker' when a verdict was reached. Multi-sample
+    results (see sinkhole_runner.combine_samples) have every sample graded,
+    their top-level verdict taken from the first successful sample, and
+    pass-rate fields filled by summarize_samples.
+
+    Args:
+        sinkholes: Mapping of sinkhole id to sinkhole record with results
+        checkers: Optional mapping of sinkhole id to checker spec; defaults
+            to each sinkhole's own 'checker'
+        overwrite: Re-grade answers that already have a verdict
+        workers: Process count (defaults to the CPU count)
+
+    Returns:
+        Counts of correct, incorrect, ambiguous and unchecked answers
+        (samples count individually)
+    """
+    counts = {'correct': 0, 'incorrect': 0, 'ambiguous': 0, 'unchecked': 0}
+    targets = []
+    jobs = []
+    sampled = []
+    for sid, sinkhole in sinkholes.items():
+        checker = (checkers or {}).get(sid) or sinkhole.get('checker')
+        for result in sinkhole.get('results', {}).values():
+            answers = result.get('samples', [result])
+            if 'samples' in result:
+                sampled.append(result)
+            for answer in answers:
+                if answer.get('status', 'ok') != 'ok' or answer.get('answer') is None:
+                    continue
+                if answer.get('correct') is not None and not overwrite:
+                    continue
+                if checker is None:
+                    counts['unchecked'] += 1
+                    continue
+                targets.append(answer)
+                jobs.append((checker, answer['answer']))
+
+    workers = workers or os.cpu_count() or 1
+    if not jobs:
+        verdicts = []
+    elif workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            verdicts = list(executor.map(_grade_job, jobs, chunksize=chunksize))
+    else:
+        verdicts = [_grade_job(job) for job in jobs]
+
+    for result, verdict in zip(targets, verdicts):
+        result['correct'] = verdict
+        if verdict is None:
+            result.pop('graded_by', None)
+            counts['ambiguous'] += 1
+        else:
+            result['graded_by'] = 'checker'
+            counts['correct' if verdict else 'incorrect'] += 1
+
+    for result in sampled:
+        first = next((s for s in result['samples'] if s.get('status', 'ok') == 'ok'), None)
+        if first is not None:
+            result['correct'] = first.get('correct')
+            if 'graded_by' in first:
+                result['graded_by'] = first['graded_by']
+            else:
+                result.pop('graded_by', None)
+        summarize_samples(result)
+
+    return counts
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Auto-grade sinkhole responses in place")
+    parser.add_argument('responses', nargs='?',
+                        default='data/sinkhole_data/negatives_with_responses.json')
+    parser.add_argument('--tasks', default='data/sinkhole_data/negatives.json',
+                        help="Sinkhole definitions holding the checkers")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="Re-grade answers that already have a verdict")
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    with open(args.tasks) as f:
+        tasks = json.load(f)
+    with open(args.responses) as f:
+        sinkholes = json.load(f)
+
+    checkers = {sid: s['checker'] for sid, s in tasks.items() if s.get('checker')}
+    counts = grade_responses(sinkholes, checkers, overwrite=args.overwrite, workers=args.workers)
+
+    with open(args.responses, 'w') as f:
+        json.dump(sinkholes, f, indent=2)
+
+    print(f"✓ Graded {args.responses}: {counts['correct']} correct, "
+          f"{counts['incorrect']} incorrect, {counts['ambiguous']} need review, "
+          f"{counts['unchecked']} without a checker")
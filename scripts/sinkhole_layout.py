@@ -0,0 +1,188 @@
+"""
+Sinkhole Layout
+Deterministic, collision-free placement of sinkholes around their
+category's point on the capability map
+
+Usage:
+    layout = SinkholeLayout(category_positions, peaks=load_capability_peaks())
+    positions = layout.place(sinkholes)    # [(x, y), ...] in input order
+
+Each sinkhole's candidate positions come from an RNG seeded with its id, and
+sinkholes are placed in id order, so a sinkhole lands in the same spot on
+every conversion and adding new sinkholes never moves the existing ones.
+Candidates are drawn (dart throwing, as in Poisson-disk sampling) in a ring
+around the category point: at least peak_clearance from every capability
+peak and min_separation from every sinkhole already placed. Both checks are
+spatial-hash lookups, so a layout takes O(n) expected time.
+
+Given anchors (sinkhole id -> a similar, earlier-placed sinkhole, see
+sinkhole_similarity.SimilarityIndex.anchors), a sinkhole is placed in a
+tight ring around its anchor instead, so similar tasks sit together.
+
+Large suites would not fit at the default spacing, so the separation
+shrinks and crowded categories get wider regions, in steps of 1.5x: existing
+positions only move when a suite or category grows past a step.
+"""
+
+import math
+import random
+from typing import Dict, List, Optional, Tuple
+
+from sinkhole_links import load_capabilities
+
+Point = Tuple[float, float]
+
+
+def load_capability_peaks(path: str = 'data/intermediate/capability_heights.json',
+                          org: str = 'all') -> List[Point]:
+    """(x, y) of every capability in capability_heights.json; [] if it is missing."""
+    return [(cap['x'], cap['y']) for cap in load_capabilities(path, org)]
+
+
+class SpatialHash:
+    """Uniform grid of points for fixed-radius 'anything nearby?' queries."""
+
+    def __init__(self, cell: float):
+        self.cell = cell
+        self._cells: Dict[Tuple[int, int], List[Point]] = {}
+
+    def _key(self, x: float, y: float) -> Tuple[int, int]:
+        return (math.floor(x / self.cell), math.floor(y / self.cell))
+
+    def add(self, x: float, y: float) -> None:
+        self._cells.setdefault(self._key(x, y), []).append((x, y))
+
+    def nearest_distance(self, x: float, y: float, radius: float) -> float:
+        """Distance to the closest point within radius (inf if none)."""
+        reach = math.ceil(radius / self.cell)
+        cx, cy = self._key(x, y)
+        best = math.inf
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for px, py in self._cells.get((i, j), ()):
+                    best = min(best, math.hypot(px - x, py - y))
+        return best if best <= radius else math.inf
+
+
+class SinkholeLayout:
+    """Place sinkholes around category points without overlaps."""
+
+    def __init__(self, category_positions: Dict[str, Point],
+                 peaks: Optional[List[Point]] = None,
+                 min_separation: float = 0.02,
+                 peak_clearance: float = 0.015,
+                 region_radius: float = 0.06,
+                 bounds: Tuple[float, float] = (0.1, 0.9),
+                 attempts: int = 30):
+        """
+        Args:
+            category_positions: Category name to (x, y) centre of its region
+            peaks: Capability (x, y) positions sinkholes must keep clear of
+            min_separation: Minimum distance between two sinkholes (for
+                suites that fit the bounds at this spacing)
+            peak_clearance: Minimum distance from a sinkhole to any peak
+            region_radius: Outer radius of a category's region (wider for
+                crowded categories, and while a region has no room left)
+            bounds: Allowed range for both coordinates
+            attempts: Candidates drawn per sinkhole before growing the region
+        """
+        self.category_positions = category_positions
+        self.peaks = list(peaks or [])
+        self.min_separation = min_separation
+        self.peak_clearance = peak_clearance
+        self.region_radius = region_radius
+        self.bounds = bounds
+        self.attempts = attempts
+
+    @staticmethod
+    def _key(sinkhole: Dict) -> str:
+        return sinkhole.get('id') or f"{sinkhole['category']}:{sinkhole['task']}"
+
+    def place(self, sinkholes: List[Dict], anchors: Optional[Dict[str, str]] = None) -> List[Point]:
+        """
+        Position every sinkhole (records with 'id' and 'category').
+
+        Args:
+            sinkholes: Sinkhole records
+            anchors: Optional {sinkhole id: id of a similar sinkhole that
+                sorts before it}, to place it next to that one
+
+        Returns:
+            (x, y) per sinkhole, in the order given
+        """
+        separation = self._separation(len(sinkholes))
+        counts = {}
+        for sinkhole in sinkholes:
+            counts[sinkhole['category']] = counts.get(sinkhole['category'], 0) + 1
+        radii = {category: self._region_radius(count, separation)
+                 for category, count in counts.items()}
+
+        placed = SpatialHash(separation)
+        peaks = SpatialHash(self.peak_clearance)
+        for x, y in self.peaks:
+            peaks.add(x, y)
+
+        anchors = anchors or {}
+        positions = {}
+        by_key = {}
+        for index in sorted(range(len(sinkholes)), key=lambda i: self._key(sinkholes[i])):
+            sinkhole = sinkholes[index]
+            key = self._key(sinkhole)
+            category = sinkhole['category']
+            anchor = by_key.get(anchors.get(key))
+            if anchor is not None:
+                centre, inner, radius = anchor, separation, 3 * separation
+            else:
+                centre = self.category_positions.get(category, (0.5, 0.5))
+                inner, radius = self.peak_clearance, radii[category]
+            x, y = self._place_one(random.Random(key), centre, inner, radius,
+                                   separation, placed, peaks)
+            placed.add(x, y)
+            positions[index] = by_key[key] = (x, y)
+
+        return [positions[i] for i in range(len(sinkholes))]
+
+    def _separation(self, n: int) -> float:
+        """min_separation, shrunk in 1.5x steps until n sinkholes fit the bounds."""
+        # Dart throwing stalls well before disks cover the area, and category
+        # regions overlap; keeping n * separation^2 at a fifth of it stays fast
+        area = (self.bounds[1] - self.bounds[0]) ** 2
+        separation = self.min_separation
+        while n * separation ** 2 > 0.2 * area:
+            separation /= 1.5
+        return separation
+
+    def _region_radius(self, count: int, separation: float) -> float:
+        """region_radius, grown in 1.5x steps until the ring holds count sinkholes."""
+        radius = self.region_radius
+        while math.pi * (radius ** 2 - self.peak_clearance ** 2) < 4 * count * separation ** 2:
+            radius *= 1.5
+        return radius
+
+    def _place_one(self, rng: random.Random, centre: Point, inner: float, radius: float,
+                   separation: float, placed: SpatialHash, peaks: SpatialHash) -> Point:
+        low, high = self.bounds
+        best, best_gap = None, -1.0
+
+        for _ in range(8):
+            for _ in range(self.attempts):
+                # Uniform over the ring between inner and radius
+                r = math.sqrt(rng.uniform(inner ** 2, radius ** 2))
+                angle = rng.uniform(0, 2 * math.pi)
+                x = centre[0] + r * math.cos(angle)
+                y = centre[1] + r * math.sin(angle)
+                if not (low <= x <= high and low <= y <= high):
+                    continue
+
+                gap = min(placed.nearest_distance(x, y, separation) / separation,
+                          peaks.nearest_distance(x, y, self.peak_clearance) / self.peak_clearance)
+                if gap == math.inf:
+                    return (x, y)
+                if gap > best_gap:
+                    best, best_gap = (x, y), gap
+            radius *= 1.5
+
+        # Region is full up to the bounds: take the least crowded candidate
+        if best is None:
+            best = (min(high, max(low, centre[0])), min(high, max(low, centre[1])))
+        return best
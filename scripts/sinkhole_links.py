@@ -0,0 +1,102 @@
+"""
+Sinkhole Capability Links
+Relate each sinkhole to the capability peaks around it: the k nearest
+capabilities on the map, their current heights and how far the sinkhole
+drops below them
+
+Usage:
+    linker = CapabilityLinker(load_capabilities(), k=3)
+    links = linker.link(positions, depths)     # one list of links per sinkhole
+
+Capability positions go into a KD-tree once, so each sinkhole lookup is
+O(log n) and linking thousands of sinkholes is a single batched query.
+"""
+
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def load_capabilities(path: str = 'data/intermediate/capability_heights.json',
+                      org: str = 'all') -> List[Dict]:
+    """
+    Capabilities from capability_heights.json with their latest height;
+    [] if the file is missing.
+
+    Heights use the terrain's z convention (see
+    convert_capabilities_to_terrain.py): scores below 1 are scaled by 100.
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        capabilities = json.load(f).get(org, {})
+
+    records = []
+    for name, cap in capabilities.items():
+        heights = cap.get('heights', {})
+        year = max(heights, key=int) if heights else None
+        height = heights[year] if year is not None else 0.0
+        records.append({
+            'capability': name,
+            'name': cap.get('name', name),
+            'x': cap.get('x', 0.5),
+            'y': cap.get('y', 0.5),
+            'height': height * 100 if height < 1 else height,
+            'year': int(year) if year is not None else None
+        })
+    return records
+
+
+class CapabilityLinker:
+    """Nearest capability peaks for sinkhole positions, via a KD-tree."""
+
+    def __init__(self, capabilities: List[Dict], k: int = 3):
+        """
+        Args:
+            capabilities: Records from load_capabilities
+            k: Capabilities to link per sinkhole
+        """
+        self.capabilities = capabilities
+        self.k = min(k, len(capabilities))
+        self.heights = np.array([c['height'] for c in capabilities], dtype=float)
+        self.tree = cKDTree(np.array([(c['x'], c['y']) for c in capabilities], dtype=float)) \
+            if capabilities else None
+
+    def link(self, positions: List[Tuple[float, float]], depths: List[float]) -> List[List[Dict]]:
+        """
+        Link sinkholes to their nearest capabilities.
+
+        Args:
+            positions: (x, y) per sinkhole
+            depths: Sinkhole z (negative) per sinkhole
+
+        Returns:
+            Per sinkhole, its k nearest capabilities (closest first) with
+            distance, current height and height_gap (peak height minus
+            sinkhole z)
+        """
+        if self.tree is None or not positions:
+            return [[] for _ in positions]
+
+        distances, indices = self.tree.query(np.asarray(positions, dtype=float), k=self.k)
+        distances = distances.reshape(len(positions), self.k)
+        indices = indices.reshape(len(positions), self.k)
+        gaps = self.heights[indices] - np.asarray(depths, dtype=float)[:, None]
+
+        links = []
+        for row in range(len(positions)):
+            links.append([
+                {
+                    'capability': self.capabilities[i]['capability'],
+                    'name': self.capabilities[i]['name'],
+                    'distance': round(float(distances[row, col]), 4),
+                    'height': round(float(self.heights[i]), 4),
+                    'height_year': self.capabilities[i]['year'],
+                    'height_gap': round(float(gaps[row, col]), 4)
+                }
+                for col, i in enumerate(indices[row])
+            ])
+        return links
@@ -0,0 +1,235 @@
+"""
+Sinkhole Run Metrics
+Per-request latency, time-to-first-token, token and retry accounting,
+aggregated into per-provider histograms
+
+Usage:
+    metrics = ProviderMetrics()
+    metrics.start()
+    ...
+    metrics.record('claude', result)       # every provider result
+    ...
+    metrics.stop()
+    metrics.write_report('data/sinkhole_data/negatives_with_responses_metrics.json')
+
+Results are the provider result dicts (see sinkhole_providers.Provider.query);
+ttft_s is only present for streamed answers. Multi-sample results are
+recorded sample by sample.
+
+While the sweep runs, a provider whose recent median latency climbs to
+slowdown_factor x its median over its first requests is reported once
+(and listed under 'alerts'), so a provider degrading mid-sweep shows up
+before the run ends.
+"""
+
+import json
+import math
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Histogram bucket upper bounds (the last bucket is open-ended)
+LATENCY_BUCKETS = [0.25, 0.5, 1, 2, 4, 8, 16, 32, 64]
+TOKEN_BUCKETS = [16, 32, 64, 128, 256, 512, 1024]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile (q in 0-100); None for no values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def histogram(values: List[float], bounds: List[float]) -> Dict[str, int]:
+    """Counts per bucket, labelled '<=bound' and '>last'."""
+    counts = {f"<={b}": 0 for b in bounds}
+    counts[f">{bounds[-1]}"] = 0
+    for value in values:
+        for b in bounds:
+            if value <= b:
+                counts[f"<={b}"] += 1
+                break
+        else:
+            counts[f">{bounds[-1]}"] += 1
+    return counts
+
+
+def summarize(values: List[float], bounds: List[float]) -> Dict:
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 4) if values else None,
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p99': percentile(values, 99),
+        'max': max(values) if values else None,
+        'histogram': histogram(values, bounds)
+    }
+
+
+class ProviderMetrics:
+    """Collect per-request metrics for a sinkhole sweep, grouped by provider."""
+
+    def __init__(self, window: int = 20, slowdown_factor: float = 2.0,
+                 timeline_seconds: float = 60.0, prices: Optional[Dict[str, Dict]] = None):
+        """
+        Args:
+            window: Requests in the baseline and in the rolling window used
+                for slow-down alerts
+            slowdown_factor: Alert when the rolling median latency reaches
+                this multiple of the baseline median
+            timeline_seconds: Width of the per-provider timeline buckets
+            prices: Optional {model: {'input_per_mtok': $, 'output_per_mtok': $}}
+                (e.g. from model configs) to estimate cost
+        """
+        self.window = window
+        self.slowdown_factor = slowdown_factor
+        self.timeline_seconds = timeline_seconds
+        self.prices = prices or {}
+
+        self.requests: Dict[str, List[Dict]] = {}
+        self.alerts: List[Dict] = []
+        self._baseline: Dict[str, List[float]] = {}
+        self._recent: Dict[str, deque] = {}
+        self._alerted = set()
+        self._started_at = None
+        self._start = None
+        self._elapsed = None
+
+    def start(self) -> None:
+        self._started_at = datetime.now().isoformat()
+        self._start = time.perf_counter()
+
+    def stop(self) -> None:
+        if self._start is not None:
+            self._elapsed = time.perf_counter() - self._start
+
+    def record(self, model: str, result: Dict) -> None:
+        """Record one provider result (or each sample of a multi-sample result)."""
+        at = time.perf_counter() - self._start if self._start is not None else None
+        for sample in result.get('samples', [result]):
+            entry = {
+                'at_s': at,
+                'status': sample.get('status', 'ok'),
+                'latency_s': sample.get('latency_s'),
+                'ttft_s': sample.get('ttft_s'),
+                'input_tokens': sample.get('input_tokens'),
+                'output_tokens': sample.get('output_tokens'),
+                'attempts': sample.get('attempts', 1),
+                'error_class': sample.get('error_class'),
+                'stopped_early': bool(sample.get('stopped_early'))
+            }
+            self.requests.setdefault(model, []).append(entry)
+            if entry['status'] == 'ok' and entry['latency_s'] is not None:
+                self._check_slowdown(model, entry['latency_s'], at)
+
+    def _check_slowdown(self, model: str, latency: float, at: Optional[float]) -> None:
+        baseline = self._baseline.setdefault(model, [])
+        if len(baseline) < self.window:
+            baseline.append(latency)
+            return
+        recent = self._recent.setdefault(model, deque(maxlen=self.window))
+        recent.append(latency)
+        if model in self._alerted or len(recent) < self.window:
+            return
+        baseline_p50 = percentile(baseline, 50)
+        current = percentile(list(recent), 50)
+        if baseline_p50 and current >= self.slowdown_factor * baseline_p50:
+            self._alerted.add(model)
+            self.alerts.append({'model': model, 'at_s': round(at, 3) if at is not None else None,
+                                'baseline_p50_s': baseline_p50, 'recent_p50_s': current})
+            print(f"⚠️  {model} is slowing down: median latency {current:.2f}s over the last "
+                  f"{self.window} requests vs {baseline_p50:.2f}s at the start of the sweep")
+
+    def _timeline(self, requests: List[Dict]) -> List[Dict]:
+        buckets = {}
+        for r in requests:
+            if r['at_s'] is None:
+                continue
+            index = int(r['at_s'] // self.timeline_seconds)
+            buckets.setdefault(index, []).append(r)
+        timeline = []
+        for index in sorted(buckets):
+            rows = buckets[index]
+            latencies = [r['latency_s'] for r in rows if r['status'] == 'ok' and r['latency_s'] is not None]
+            timeline.append({
+                'start_s': index * self.timeline_seconds,
+                'requests': len(rows),
+                'errors': sum(1 for r in rows if r['status'] != 'ok'),
+                'p50_latency_s': percentile(latencies, 50)
+            })
+        return timeline
+
+    def provider_report(self, model: str) -> Dict:
+        requests = self.requests.get(model, [])
+        ok = [r for r in requests if r['status'] == 'ok']
+        latencies = [r['latency_s'] for r in ok if r['latency_s'] is not None]
+        ttfts = [r['ttft_s'] for r in ok if r['ttft_s'] is not None]
+        input_tokens = [r['input_tokens'] for r in ok if r['input_tokens'] is not None]
+        output_tokens = [r['output_tokens'] for r in ok if r['output_tokens'] is not None]
+
+        errors = {}
+        for r in requests:
+            if r['status'] != 'ok':
+                name = r['error_class'] or 'unknown'
+                errors[name] = errors.get(name, 0) + 1
+        retries = {}
+        for r in requests:
+            retries[str(r['attempts'])] = retries.get(str(r['attempts']), 0) + 1
+
+        report = {
+            'requests': len(requests),
+            'ok': len(ok),
+            'errors': errors,
+            'attempts': dict(sorted(retries.items(), key=lambda kv: int(kv[0]))),
+            'retried': sum(1 for r in requests if (r['attempts'] or 1) > 1),
+            'stopped_early': sum(1 for r in ok if r['stopped_early']),
+            'latency_s': summarize(latencies, LATENCY_BUCKETS),
+            'ttft_s': summarize(ttfts, LATENCY_BUCKETS),
+            'input_tokens': {'total': sum(input_tokens), **summarize(input_tokens, TOKEN_BUCKETS)},
+            'output_tokens': {'total': sum(output_tokens), **summarize(output_tokens, TOKEN_BUCKETS)},
+            'timeline': self._timeline(requests)
+        }
+
+        price = self.prices.get(model)
+        if price:
+            report['estimated_cost_usd'] = round(
+                sum(input_tokens) / 1e6 * price.get('input_per_mtok', 0.0)
+                + sum(output_tokens) / 1e6 * price.get('output_per_mtok', 0.0), 4
+            )
+        return report
+
+    def report(self) -> Dict:
+        return {
+            'started_at': self._started_at,
+            'total_seconds': round(self._elapsed, 3) if self._elapsed is not None else None,
+            'providers': {model: self.provider_report(model) for model in self.requests},
+            'alerts': self.alerts
+        }
+
+    def write_report(self, path: str) -> Dict:
+        """Write the metrics report as JSON; returns the report."""
+        report = self.report()
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        return report
+
+    def print_summary(self) -> None:
+        """One line per provider: volume, errors, latency and token percentiles."""
+        for model, data in self.report()['providers'].items():
+            latency = data['latency_s']
+            ttft = data['ttft_s']
+            errors = sum(data['errors'].values())
+            line = (f"  {model}: {data['requests']} requests, {errors} errors, "
+                    f"{data['retried']} retried")
+            if latency['count']:
+                line += f", latency p50 {latency['p50']:.2f}s / p90 {latency['p90']:.2f}s"
+            if ttft['count']:
+                line += f", TTFT p50 {ttft['p50']:.2f}s"
+            line += (f", tokens in {data['input_tokens']['total']} / "
+                     f"out {data['output_tokens']['total']}")
+            if 'estimated_cost_usd' in data:
+                line += f", ~${data['estimated_cost_usd']:.2f}"
+            print(line)
@@ -0,0 +1,560 @@
+"""
+Sinkhole Model Providers
+Registry of model providers with pooled clients, bounded retries and
+per-call latency / token accounting
+
+Models are configured in config/sinkhole_models.json:
+    {
+        "claude": {
+            "enabled": true,
+            "provider": "anthropic",          # key into PROVIDER_TYPES
+            "model": "claude-sonnet-4-20250514",
+            "api_key_env": "ANTHROPIC_API_KEY",
+            "base_url_env": "...",            # optional endpoint override
+            "max_tokens": 200,
+            "temperature": null,
+            "concurrency": 4,                 # runner limits
+            "rate": 2.0,
+            "max_retries": 4,                 # optional, default 4
+            "batch": true,                    # use the provider batch API in --batch mode
+            "native_n": false,                # draw --samples via the API's n parameter
+            "stream_usage": true,             # optional: ask for usage in streams (OpenAI)
+            "pricing": {"input_per_mtok": 3.0, "output_per_mtok": 15.0}
+                                              # optional: $ per million tokens, for run metrics
+        },
+        ...
+    }
+"""
+
+import io
+import json
+import os
+import random
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from sinkhole_grading import settled_verdict
+
+
+# HTTP statuses worth retrying: timeout, conflict, rate limit, server errors
+TRANSIENT_STATUS = {408, 409, 429}
+TRANSIENT_ERROR_NAMES = {
+    'APIConnectionError', 'APITimeoutError', 'ConnectTimeout', 'ReadTimeout',
+    'RemoteProtocolError', 'ServiceUnavailable', 'TooManyRequests',
+    'InternalServerError', 'DeadlineExceeded', 'ResourceExhausted',
+}
+
+
+def is_transient(exc: Exception) -> bool:
+    """Decide whether an SDK exception is worth retrying."""
+    status = getattr(exc, 'status_code', None) or getattr(exc, 'code', None)
+    if isinstance(status, int) and (status in TRANSIENT_STATUS or status >= 500):
+        return True
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    return type(exc).__name__ in TRANSIENT_ERROR_NAMES
+
+
+class Provider:
+    """
+    Base provider: one pooled client, retried calls, uniform results.
+
+    Subclasses implement _make_client() and _request(task), the latter
+    returning {'text', 'input_tokens', 'output_tokens'}.
+
+    Providers with a batch API also implement submit_batch(), batch_done()
+    and batch_results(); batch_capable marks those classes. Providers whose
+    API returns several samples per request implement _request_n(task, n)
+    and set native_n_capable. Every provider implements
+    _stream(task, max_tokens, usage) for query_stream().
+    """
+
+    batch_capable = False
+    native_n_capable = False
+
+    def __init__(self, name: str, config: Dict):
+        """
+        Args:
+            name: Model name used as the results key (e.g. 'claude')
+            config: Model config from config/sinkhole_models.json
+        """
+        self.name = name
+        self.config = config
+        self.max_retries = config.get('max_retries', 4)
+        self.backoff_base = config.get('backoff_base', 0.5)
+        self.backoff_max = config.get('backoff_max', 20.0)
+        self._client = None
+
+    @property
+    def api_key(self) -> Optional[str]:
+        return os.environ.get(self.config['api_key_env'])
+
+    @property
+    def base_url(self) -> Optional[str]:
+        env = self.config.get('base_url_env')
+        return (os.environ.get(env) if env else None) or self.config.get('base_url')
+
+    @property
+    def client(self):
+        """SDK client, created once and shared by every call (connection pooling)."""
+        if self._client is None:
+            self._client = self._make_client()
+        return self._client
+
+    def query(self, task: str) -> Dict:
+        """
+        Send one task, retrying transient errors with exponential backoff
+        and full jitter.
+
+        Returns:
+            Result dict: status ('ok' or 'error'), answer (None on failure),
+            correct (None, to be graded), error, error_class, latency_s
+            (successful attempt only), input_tokens, output_tokens, attempts
+        """
+        return self._with_retries(lambda: [self._request(task)])[0]
+
+    @property
+    def supports_native_n(self) -> bool:
+        """True when the API can return several samples per request and the config opts in."""
+        return self.native_n_capable and self.config.get('native_n', False)
+
+    def query_n(self, task: str, n: int) -> List[Dict]:
+        """
+        Draw n samples in a single request using the API's own n parameter.
+
+        Usage is reported once per request, so token counts sit on the
+        first sample and are None on the rest.
+
+        Returns:
+            n result dicts shaped like query()'s
+        """
+        return self._with_retries(lambda: self._request_n(task, n), n)
+
+    def query_stream(self, task: str, checker: Optional[Dict] = None,
+                     token_budget: Optional[int] = None) -> Dict:
+        """
+        Stream one task, feeding the text to the task's checker as it
+        arrives and cancelling the stream as soon as the verdict is settled
+        (see sinkhole_grading.settled_verdict).
+
+        Args:
+            task: Task prompt
+            checker: Optional sinkhole_grading spec for the task
+            token_budget: Optional per-task output cap; requests use
+                min(max_tokens, token_budget)
+
+        Returns:
+            Result dict shaped like query()'s. When the stream was cut short
+            by a settled verdict it also has stopped_early=True, correct and
+            graded_by='checker'; output_tokens is then only known if the
+            provider reported it before the cut. ttft_s is the time to the
+            first text chunk.
+        """
+        max_tokens = self.config['max_tokens']
+        if token_budget:
+            max_tokens = min(max_tokens, token_budget)
+        return self._with_retries(lambda: [self._consume_stream(task, checker, max_tokens)])[0]
+
+    def _consume_stream(self, task: str, checker: Optional[Dict], max_tokens: int) -> Dict:
+        usage = {}
+        chunks = []
+        verdict = None
+        ttft = None
+        start = time.perf_counter()
+        stream = self._stream(task, max_tokens, usage)
+        try:
+            for chunk in stream:
+                if ttft is None:
+                    ttft = round(time.perf_counter() - start, 3)
+                chunks.append(chunk)
+                if checker is not None:
+                    verdict = settled_verdict(checker, ''.join(chunks))
+                    if verdict is not None:
+                        break
+        finally:
+            stream.close()  # closes the HTTP stream when we stop early
+
+        response = {'text': ''.join(chunks), 'ttft_s': ttft, **usage}
+        if verdict is not None:
+            response.update(correct=verdict, graded_by='checker', stopped_early=True)
+        return response
+
+    def _with_retries(self, request: Callable[[], List[Dict]], n: int = 1) -> List[Dict]:
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                responses = request()
+            except Exception as e:
+                if attempt <= self.max_retries and is_transient(e):
+                    delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                    time.sleep(random.uniform(0, delay))
+                    continue
+                return [{
+                    'status': 'error',
+                    'answer': None,
+                    'correct': None,
+                    'error': str(e),
+                    'error_class': type(e).__name__,
+                    'latency_s': round(time.perf_counter() - start, 3),
+                    'input_tokens': None,
+                    'output_tokens': None,
+                    'attempts': attempt
+                } for _ in range(n)]
+
+            latency = round(time.perf_counter() - start, 3)
+            return [{
+                'status': 'ok',
+                'answer': response['text'],
+                'correct': None,
+                'latency_s': latency,
+                'input_tokens': response.get('input_tokens'),
+                'output_tokens': response.get('output_tokens'),
+                'attempts': attempt,
+                **{k: v for k, v in response.items()
+                   if k not in ('text', 'input_tokens', 'output_tokens')}
+            } for response in responses]
+
+    @property
+    def supports_batch(self) -> bool:
+        """True when the provider has a batch API and the config opts in."""
+        return self.batch_capable and self.config.get('batch', False)
+
+    def submit_batch(self, items: List[Tuple[str, str]]) -> str:
+        """
+        Submit (custom_id, task) items as one provider batch job.
+
+        Returns:
+            Provider batch id
+        """
+        raise NotImplementedError
+
+    def batch_done(self, batch_id: str) -> bool:
+        """True once the batch has finished (successfully or not)."""
+        raise NotImplementedError
+
+    def batch_results(self, batch_id: str) -> Dict[str, Dict]:
+        """
+        Fetch a finished batch.
+
+        Returns:
+            Mapping of custom_id to a result dict shaped like query()'s
+        """
+        raise NotImplementedError
+
+    def _ok(self, text: str, input_tokens=None, output_tokens=None) -> Dict:
+        return {
+            'status': 'ok',
+            'answer': text,
+            'correct': None,
+            'latency_s': None,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+            'attempts': 1
+        }
+
+    def _error(self, message: str, error_class: str) -> Dict:
+        return {
+            'status': 'error',
+            'answer': None,
+            'correct': None,
+            'error': message,
+            'error_class': error_class,
+            'latency_s': None,
+            'input_tokens': None,
+            'output_tokens': None,
+            'attempts': 1
+        }
+
+    def _make_client(self):
+        raise NotImplementedError
+
+    def _request(self, task: str) -> Dict:
+        raise NotImplementedError
+
+    def _request_n(self, task: str, n: int) -> List[Dict]:
+        raise NotImplementedError
+
+    def _stream(self, task: str, max_tokens: int, usage: Dict) -> Iterator[str]:
+        """Yield text chunks; fill usage with input/output_tokens as reported."""
+        raise NotImplementedError
+
+
+class AnthropicProvider(Provider):
+    """Claude via the Anthropic Messages API (and Message Batches API)."""
+
+    batch_capable = True
+
+    def _make_client(self):
+        import anthropic
+        # SDK-level retries off: query() owns the retry policy
+        return anthropic.Anthropic(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+
+    def _params(self, task: str, max_tokens: Optional[int] = None) -> Dict:
+        params = {
+            'model': self.config['model'],
+            'max_tokens': max_tokens or self.config['max_tokens'],
+            'messages': [{'role': 'user', 'content': task}],
+        }
+        if self.config.get('temperature') is not None:
+            params['temperature'] = self.config['temperature']
+        return params
+
+    def _request(self, task: str) -> Dict:
+        message = self.client.messages.create(**self._params(task))
+        return {
+            'text': message.content[0].text,
+            'input_tokens': message.usage.input_tokens,
+            'output_tokens': message.usage.output_tokens
+        }
+
+    def _stream(self, task: str, max_tokens: int, usage: Dict) -> Iterator[str]:
+        stream = self.client.messages.create(stream=True, **self._params(task, max_tokens))
+        try:
+            for event in stream:
+                if event.type == 'message_start':
+                    usage['input_tokens'] = event.message.usage.input_tokens
+                elif event.type == 'content_block_delta' and event.delta.type == 'text_delta':
+                    yield event.delta.text
+                elif event.type == 'message_delta':
+                    usage['output_tokens'] = event.usage.output_tokens
+        finally:
+            stream.close()
+
+    def submit_batch(self, items: List[Tuple[str, str]]) -> str:
+        batch = self.client.messages.batches.create(requests=[
+            {'custom_id': custom_id, 'params': self._params(task)}
+            for custom_id, task in items
+        ])
+        return batch.id
+
+    def batch_done(self, batch_id: str) -> bool:
+        return self.client.messages.batches.retrieve(batch_id).processing_status == 'ended'
+
+    def batch_results(self, batch_id: str) -> Dict[str, Dict]:
+        results = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            outcome = entry.result
+            if outcome.type == 'succeeded':
+                message = outcome.message
+                results[entry.custom_id] = self._ok(
+                    message.content[0].text,
+                    message.usage.input_tokens,
+                    message.usage.output_tokens
+                )
+            else:
+                # errored entries wrap the API error; canceled/expired have none
+                error = getattr(getattr(outcome, 'error', None), 'error', None)
+                results[entry.custom_id] = self._error(
+                    getattr(error, 'message', None) or outcome.type,
+                    f"batch_{outcome.type}"
+                )
+        return results
+
+
+class OpenAIProvider(Provider):
+    """
+    OpenAI Chat Completions (and Batch API), and OpenAI-compatible APIs such
+    as xAI's Grok. Batch mode is only used when the model config sets "batch".
+    """
+
+    batch_capable = True
+    native_n_capable = True
+
+    def _make_client(self):
+        import openai
+        return openai.OpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+
+    def _params(self, task: str, max_tokens: Optional[int] = None) -> Dict:
+        params = {
+            'model': self.config['model'],
+            'max_tokens': max_tokens or self.config['max_tokens'],
+            'messages': [{'role': 'user', 'content': task}],
+        }
+        if self.config.get('temperature') is not None:
+            params['temperature'] = self.config['temperature']
+        return params
+
+    def _request(self, task: str) -> Dict:
+        response = self.client.chat.completions.create(**self._params(task))
+        usage = response.usage
+        return {
+            'text': response.choices[0].message.content,
+            'input_tokens': usage.prompt_tokens if usage else None,
+            'output_tokens': usage.completion_tokens if usage else None
+        }
+
+    def _request_n(self, task: str, n: int) -> List[Dict]:
+        response = self.client.chat.completions.create(n=n, **self._params(task))
+        usage = response.usage
+        samples = [{'text': choice.message.content} for choice in response.choices]
+        if samples and usage:
+            samples[0].update(input_tokens=usage.prompt_tokens, output_tokens=usage.completion_tokens)
+        return samples
+
+    def _stream(self, task: str, max_tokens: int, usage: Dict) -> Iterator[str]:
+        params = self._params(task, max_tokens)
+        # Usage arrives in a final chunk, only if asked for (OpenAI-compatible
+        # APIs may not accept the option, so it defaults to the openai provider)
+        if self.config.get('stream_usage', self.config['provider'] == 'openai'):
+            params['stream_options'] = {'include_usage': True}
+        stream = self.client.chat.completions.create(stream=True, **params)
+        try:
+            for chunk in stream:
+                if chunk.usage:
+                    usage['input_tokens'] = chunk.usage.prompt_tokens
+                    usage['output_tokens'] = chunk.usage.completion_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+
+    def submit_batch(self, items: List[Tuple[str, str]]) -> str:
+        lines = [
+            json.dumps({
+                'custom_id': custom_id,
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': self._params(task)
+            })
+            for custom_id, task in items
+        ]
+        payload = io.BytesIO(('\n'.join(lines) + '\n').encode('utf-8'))
+        input_file = self.client.files.create(file=('sinkholes.jsonl', payload), purpose='batch')
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        return batch.id
+
+    def batch_done(self, batch_id: str) -> bool:
+        status = self.client.batches.retrieve(batch_id).status
+        return status in ('completed', 'failed', 'expired', 'cancelled')
+
+    def batch_results(self, batch_id: str) -> Dict[str, Dict]:
+        batch = self.client.batches.retrieve(batch_id)
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+                body = response.get('body') or {}
+                if response.get('status_code') == 200 and body.get('choices'):
+                    usage = body.get('usage') or {}
+                    results[record['custom_id']] = self._ok(
+                        body['choices'][0]['message']['content'],
+                        usage.get('prompt_tokens'),
+                        usage.get('completion_tokens')
+                    )
+                else:
+                    error = record.get('error') or body.get('error') or response
+                    results[record['custom_id']] = self._error(str(error), 'batch_errored')
+        return results
+
+
+class GeminiProvider(Provider):
+    """Gemini via google-generativeai."""
+
+    def _make_client(self):
+        from google import generativeai as genai
+        genai.configure(api_key=self.api_key)
+        return genai.GenerativeModel(self.config['model'])
+
+    def _generation_config(self, max_tokens: Optional[int] = None) -> Dict:
+        generation_config = {'max_output_tokens': max_tokens or self.config['max_tokens']}
+        if self.config.get('temperature') is not None:
+            generation_config['temperature'] = self.config['temperature']
+        return generation_config
+
+    def _request(self, task: str) -> Dict:
+        response = self.client.generate_content(task, generation_config=self._generation_config())
+        usage = getattr(response, 'usage_metadata', None)
+        return {
+            'text': response.text,
+            'input_tokens': getattr(usage, 'prompt_token_count', None),
+            'output_tokens': getattr(usage, 'candidates_token_count', None)
+        }
+
+    def _stream(self, task: str, max_tokens: int, usage: Dict) -> Iterator[str]:
+        response = self.client.generate_content(
+            task, generation_config=self._generation_config(max_tokens), stream=True
+        )
+        try:
+            for chunk in response:
+                metadata = getattr(chunk, 'usage_metadata', None)
+                if metadata is not None:
+                    usage['input_tokens'] = getattr(metadata, 'prompt_token_count', None)
+                    usage['output_tokens'] = getattr(metadata, 'candidates_token_count', None)
+                if chunk.parts:
+                    yield chunk.text
+        finally:
+            # GenerateContentResponse has no close(); cancel the underlying
+            # gRPC call (or close the REST iterator) so the connection is released
+            stream = getattr(response, '_iterator', None)
+            release = getattr(stream, 'cancel', None) or getattr(stream, 'close', None)
+            if release is not None:
+                release()
+
+
+class ReplicateProvider(Provider):
+    """Llama and other open models via Replicate."""
+
+    def _make_client(self):
+        import replicate
+        return replicate.Client(api_token=self.api_key)
+
+    def _input(self, task: str, max_tokens: Optional[int] = None) -> Dict:
+        params = {'prompt': task, 'max_tokens': max_tokens or self.config['max_tokens']}
+        if self.config.get('temperature') is not None:
+            params['temperature'] = self.config['temperature']
+        return params
+
+    def _request(self, task: str) -> Dict:
+        output = self.client.run(self.config['model'], input=self._input(task))
+        # Replicate does not report token usage for streamed text output
+        return {'text': ''.join(output)}
+
+    def _stream(self, task: str, max_tokens: int, usage: Dict) -> Iterator[str]:
+        for event in self.client.stream(self.config['model'], input=self._input(task, max_tokens)):
+            if event.event == 'output':
+                yield event.data
+
+
+PROVIDER_TYPES = {
+    'anthropic': AnthropicProvider,
+    'openai': OpenAIProvider,
+    'xai': OpenAIProvider,
+    'google': GeminiProvider,
+    'replicate': ReplicateProvider,
+}
+
+
+def load_model_configs(path: str = 'config/sinkhole_models.json') -> Dict[str, Dict]:
+    """Load every model config (enabled or not)."""
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_providers(configs: Dict[str, Dict]) -> Dict[str, Provider]:
+    """
+    Instantiate providers for enabled models whose API key is set.
+
+    Returns:
+        Mapping of model name to Provider
+    """
+    providers = {}
+    for name, config in configs.items():
+        if not config.get('enabled', True):
+            continue
+        if not os.environ.get(config['api_key_env']):
+            print(f"⚠️  {name} ({config['model']}): no {config['api_key_env']}, skipping")
+            continue
+        providers[name] = PROVIDER_TYPES[config['provider']](name, config)
+        print(f"✓ {name} ({config['model']})")
+    return providers
@@ -0,0 +1,294 @@
+"""
+Concurrent Sinkhole Runner
+Queries every enabled model on every sinkhole concurrently, with per-provider
+concurrency limits and token-bucket rate limiting instead of fixed sleeps,
+or submits them as provider batch jobs (BatchSinkholeRunner)
+
+With samples=n each (sinkhole, model) pair is answered n times and the
+samples are folded into one result (combine_samples) for pass-rate grading.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def combine_samples(samples: List[Dict]) -> Dict:
+    """
+    Fold n sample results for one (sinkhole, model) pair into one result.
+
+    The top-level fields are those of the first successful sample (so the
+    cache, checkpoint and evaluation store keep seeing one answer), token
+    counts are totals over all samples, and every sample is kept under
+    'samples' for grading (see sinkhole_grading.grade_responses).
+    """
+    ok = [s for s in samples if s['status'] == 'ok']
+    result = dict(ok[0] if ok else samples[0])
+
+    for field in ('input_tokens', 'output_tokens'):
+        counts = [s[field] for s in samples if s.get(field) is not None]
+        result[field] = sum(counts) if counts else None
+    result['samples'] = samples
+    return result
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests per second, bursts up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size (defaults to max(1, rate))
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available, then take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class AsyncSinkholeRunner:
+    """
+    Run (sinkhole, model) queries concurrently across providers.
+
+    Each provider is described by a dict:
+        {
+            'call': callable(task) -> result,   # blocking, e.g. Provider.query
+            'concurrency': 4,                   # max in-flight requests
+            'rate': 2.0,                        # requests per second
+            'sample': callable(task, n) -> [result, ...],  # optional, see below
+        }
+
+    `call` returns the result dict stored under sinkhole['results'][model]
+    (see sinkhole_providers.Provider.query).
+
+    With samples > 1, providers with a 'sample' hook (Provider.query_n) draw
+    all n samples in one request; the rest get n concurrent `call`s, each
+    counted against the provider's concurrency and rate limits.
+
+    Blocking SDK calls run on a dedicated thread pool sized to the sum of
+    provider concurrency limits, so one slow provider never starves another.
+    To exercise the runner against a local stand-in server, point the SDK
+    clients at it (e.g. ANTHROPIC_BASE_URL, OPENAI_BASE_URL, XAI_BASE_URL).
+    """
+
+    def __init__(self, providers: Dict[str, Dict],
+                 on_result: Optional[Callable[[str, str, Dict], None]] = None,
+                 samples: int = 1):
+        """
+        Args:
+            providers: Mapping of model name to provider config (see above)
+            on_result: Optional callback(sinkhole_id, model, result) invoked
+                as each result arrives
+            samples: Answers to draw per (sinkhole, model) pair
+        """
+        self.providers = providers
+        self.on_result = on_result
+        self.samples = samples
+
+    def run(self, sinkholes: Dict[str, Dict],
+            pairs: Optional[List[Tuple[str, str]]] = None) -> Dict[str, Dict]:
+        """
+        Query models and store answers in sinkhole['results'][model].
+
+        Args:
+            sinkholes: Mapping of sinkhole id to sinkhole record
+            pairs: Optional explicit (sinkhole_id, model) pairs to run;
+                defaults to every sinkhole against every provider
+
+        Returns:
+            The same sinkholes mapping, with results filled in
+        """
+        if pairs is None:
+            pairs = [(sid, model) for sid in sinkholes for model in self.providers]
+        if pairs:
+            asyncio.run(self._run(sinkholes, pairs))
+        return sinkholes
+
+    async def _run(self, sinkholes: Dict[str, Dict], pairs: List[Tuple[str, str]]) -> None:
+        workers = sum(p.get('concurrency', 1) for p in self.providers.values())
+        semaphores = {
+            name: asyncio.Semaphore(p.get('concurrency', 1))
+            for name, p in self.providers.items()
+        }
+        buckets = {
+            name: TokenBucket(p.get('rate', 1.0))
+            for name, p in self.providers.items()
+        }
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            loop = asyncio.get_running_loop()
+
+            async def request(model: str, call: Callable, *args):
+                async with semaphores[model]:
+                    await buckets[model].acquire()
+                    return await loop.run_in_executor(executor, call, *args)
+
+            async def query(sid: str, model: str) -> None:
+                provider = self.providers[model]
+                task = sinkholes[sid]['task']
+                if self.samples == 1:
+                    result = await request(model, provider['call'], task)
+                elif 'sample' in provider:
+                    result = combine_samples(
+                        await request(model, provider['sample'], task, self.samples)
+                    )
+                else:
+                    result = combine_samples(list(await asyncio.gather(
+                        *(request(model, provider['call'], task) for _ in range(self.samples))
+                    )))
+
+                sinkholes[sid].setdefault('results', {})[model] = result
+                if self.on_result is not None:
+                    self.on_result(sid, model, result)
+
+            await asyncio.gather(*(query(sid, model) for sid, model in pairs))
+
+
+class BatchSinkholeRunner:
+    """
+    Submit pending (sinkhole, model) queries as provider batch jobs.
+
+    Providers use the same dicts as AsyncSinkholeRunner, plus optional batch
+    hooks (see sinkhole_providers.Provider):
+        {
+            'call': ..., 'concurrency': ..., 'rate': ...,
+            'submit': callable(items) -> batch_id,   # items: [(custom_id, task)]
+            'done': callable(batch_id) -> bool,
+            'results': callable(batch_id) -> {custom_id: result},
+        }
+
+    Models without 'submit' (or whose submission fails) fall back to the
+    concurrent path, which runs while the batches are processing. Every
+    result is stored and reported exactly as AsyncSinkholeRunner does.
+    With samples > 1 each pair is submitted n times (custom ids
+    '<sinkhole id>-s<i>') and the samples are combined on merge.
+    Batch jobs can be exercised against a local stand-in server the same way,
+    through the SDK base-URL variables.
+    """
+
+    def __init__(self, providers: Dict[str, Dict],
+                 on_result: Optional[Callable[[str, str, Dict], None]] = None,
+                 poll_interval: float = 30.0, timeout: Optional[float] = None,
+                 samples: int = 1):
+        """
+        Args:
+            providers: Mapping of model name to provider config (see above)
+            on_result: Optional callback(sinkhole_id, model, result)
+            poll_interval: Seconds between batch status checks
+            timeout: Give up waiting after this many seconds (None: wait
+                as long as the provider's completion window)
+            samples: Answers to draw per (sinkhole, model) pair
+        """
+        self.providers = providers
+        self.on_result = on_result
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.samples = samples
+
+    def _custom_ids(self, sid: str) -> List[str]:
+        if self.samples == 1:
+            return [sid]
+        return [f"{sid}-s{i}" for i in range(self.samples)]
+
+    def run(self, sinkholes: Dict[str, Dict],
+            pairs: Optional[List[Tuple[str, str]]] = None) -> Dict[str, Dict]:
+        """
+        Query models and store answers in sinkhole['results'][model].
+
+        Args:
+            sinkholes: Mapping of sinkhole id to sinkhole record
+            pairs: Optional explicit (sinkhole_id, model) pairs to run;
+                defaults to every sinkhole against every provider
+
+        Returns:
+            The same sinkholes mapping, with results filled in
+        """
+        if pairs is None:
+            pairs = [(sid, model) for sid in sinkholes for model in self.providers]
+
+        by_model = {}
+        for sid, model in pairs:
+            by_model.setdefault(model, []).append(sid)
+
+        # One batch per model, keyed by sinkhole id
+        batches = {}
+        fallback = []
+        for model, sids in by_model.items():
+            provider = self.providers[model]
+            if 'submit' not in provider:
+                fallback.extend((sid, model) for sid in sids)
+                continue
+            try:
+                batch_id = provider['submit']([
+                    (custom_id, sinkholes[sid]['task'])
+                    for sid in sids for custom_id in self._custom_ids(sid)
+                ])
+            except Exception as e:
+                print(f"⚠️  {model}: batch submission failed ({type(e).__name__}: {e}), "
+                      f"falling back to concurrent requests")
+                fallback.extend((sid, model) for sid in sids)
+                continue
+            print(f"✓ {model}: submitted batch {batch_id} ({len(sids) * self.samples} requests)")
+            batches[model] = (batch_id, sids)
+
+        # Unbatched models run concurrently while the batches process
+        if fallback:
+            AsyncSinkholeRunner(self.providers, on_result=self.on_result,
+                                samples=self.samples).run(sinkholes, fallback)
+
+        start = time.monotonic()
+        while batches:
+            for model in list(batches):
+                batch_id, sids = batches[model]
+                if not self.providers[model]['done'](batch_id):
+                    continue
+                self._merge(sinkholes, model, sids, self.providers[model]['results'](batch_id))
+                del batches[model]
+            if not batches:
+                break
+            if self.timeout is not None and time.monotonic() - start > self.timeout:
+                pending = ', '.join(f"{m}={b}" for m, (b, _) in batches.items())
+                raise TimeoutError(f"Batches still running after {self.timeout}s: {pending}")
+            time.sleep(self.poll_interval)
+
+        return sinkholes
+
+    def _merge(self, sinkholes: Dict[str, Dict], model: str, sids: List[str],
+               results: Dict[str, Dict]) -> None:
+        for sid in sids:
+            samples = [results.get(custom_id) or self._missing() for custom_id in self._custom_ids(sid)]
+            result = samples[0] if self.samples == 1 else combine_samples(samples)
+            sinkholes[sid].setdefault('results', {})[model] = result
+            if self.on_result is not None:
+                self.on_result(sid, model, result)
+
+    @staticmethod
+    def _missing() -> Dict:
+        return {
+            'status': 'error',
+            'answer': None,
+            'correct': None,
+            'error': 'missing from batch output',
+            'error_class': 'BatchResultMissing',
+            'latency_s': None,
+            'input_tokens': None,
+            'output_tokens': None,
+            'attempts': 1
+        }
@@ -0,0 +1,286 @@
+"""
+Sinkhole Similarity Index
+Hashed TF-IDF vectors of task text, cached on disk, with nearest-neighbour
+lookups for near-duplicate flagging and similarity-aware placement
+
+Usage:
+    index = SimilarityIndex()                      # loads the cache if present
+    index.add([(sid, task), ...])                  # vectorizes new/changed tasks only
+    index.duplicates_of([(sid, task), ...])        # near-duplicates already indexed
+    index.anchors(sinkholes)                       # similar sinkhole placed earlier
+    index.save()
+
+Words and word pairs are hashed into a fixed feature space, so a task's
+term-frequency vector never depends on the rest of the corpus and is
+computed once; only the document frequencies (IDF) are shared, and those
+are applied at query time. Adding tasks therefore only vectorizes the new
+ones. Stopwords are dropped before hashing, and terms found in more than
+max_df of the indexed tasks are dropped at query time, so rows only overlap
+on words that say something about the task.
+
+Neighbours come from sparse matrix products against the indexed rows, a
+chunk of queries at a time; anchors only compare sinkholes within a
+category. Templated tasks still share most of their terms, so memory is
+bounded by the chunk size rather than by sparsity.
+
+CLI:
+    python scripts/sinkhole_similarity.py duplicates [--threshold 0.9]
+"""
+
+import os
+import re
+import zlib
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from sinkhole_db import task_hash
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+STOPWORDS = frozenset('''
+    a about after all also am an and any are as at be been before being but by
+    can could did do does doing each for from had has have having he her here
+    hers him his how i if in into is it it's its just me more most my no nor
+    not now of off on once only or other our out over own same she should so
+    some such than that the their them then there these they this those to too
+    under until up very was we were what when where which while who whom why
+    will with would you your
+'''.split())
+
+# Bump when task_features changes, so caches built by older versions are rebuilt
+FEATURES_VERSION = 2
+
+# Queries (or anchor rows) per sparse product
+CHUNK_SIZE = 1024
+
+
+def task_features(task: str, n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed word and word-pair counts, stopwords dropped: (feature indices, log-scaled tf)."""
+    words = [w for w in TOKEN_PATTERN.findall(task.lower()) if w not in STOPWORDS]
+    terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    counts: Dict[int, int] = {}
+    for term in terms:
+        feature = zlib.crc32(term.encode('utf-8')) % n_features
+        counts[feature] = counts.get(feature, 0) + 1
+    indices = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+    tf = 1.0 + np.log(np.array([counts[i] for i in indices], dtype=np.float64))
+    return indices, tf
+
+
+class SimilarityIndex:
+    """Persistent hashed TF-IDF vectors of sinkhole tasks."""
+
+    def __init__(self, path: str = 'data/sinkhole_data/task_vectors.npz',
+                 n_features: int = 2 ** 18, max_df: float = 0.5):
+        """
+        Args:
+            path: Cache file (created on first save)
+            n_features: Size of the hashed feature space (fixed per cache)
+            max_df: Terms in more than this share of the indexed tasks are
+                ignored (once at least 20 tasks are indexed)
+        """
+        self.path = path
+        self.n_features = n_features
+        self.max_df = max_df
+        self._rows: Dict[str, Tuple[str, np.ndarray, np.ndarray]] = {}  # sid -> (hash, indices, tf)
+        self._df = np.zeros(n_features, dtype=np.int64)
+        self._matrix = None  # (ids, normalized tf-idf rows), rebuilt after changes
+        self._dirty = False
+
+        if os.path.exists(path):
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _load(self) -> None:
+        with np.load(self.path) as data:
+            arrays = {name: data[name] for name in data.files}
+        if int(arrays.get('version', 1)) != FEATURES_VERSION:
+            return  # built with older features: every task is re-vectorized on add()
+        self.n_features = int(arrays['n_features'])
+        self._df = np.zeros(self.n_features, dtype=np.int64)
+        offsets = arrays['offsets']
+        for i, (sid, digest) in enumerate(zip(arrays['ids'], arrays['hashes'])):
+            indices = arrays['indices'][offsets[i]:offsets[i + 1]]
+            self._rows[str(sid)] = (str(digest), indices, arrays['tf'][offsets[i]:offsets[i + 1]])
+            self._df[indices] += 1
+
+    def save(self) -> None:
+        """Write the cache (only if it changed since loading)."""
+        if not self._dirty:
+            return
+        ids = list(self._rows)
+        rows = [self._rows[sid] for sid in ids]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(indices) for _, indices, _ in rows])
+
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                version=np.array(FEATURES_VERSION),
+                n_features=np.array(self.n_features),
+                ids=np.array(ids, dtype=str),
+                hashes=np.array([digest for digest, _, _ in rows], dtype=str),
+                offsets=offsets,
+                indices=np.concatenate([r[1] for r in rows]) if rows else np.zeros(0, dtype=np.int64),
+                tf=np.concatenate([r[2] for r in rows]) if rows else np.zeros(0)
+            )
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def add(self, tasks: Iterable[Tuple[str, str]]) -> int:
+        """
+        Index (sinkhole id, task text) pairs; unchanged tasks are skipped.
+
+        Returns:
+            Number of tasks vectorized
+        """
+        added = 0
+        for sid, task in tasks:
+            digest = task_hash(task)
+            previous = self._rows.get(sid)
+            if previous is not None:
+                if previous[0] == digest:
+                    continue
+                self._df[previous[1]] -= 1
+            indices, tf = task_features(task, self.n_features)
+            self._rows[sid] = (digest, indices, tf)
+            self._df[indices] += 1
+            added += 1
+
+        if added:
+            self._matrix = None
+            self._dirty = True
+        return added
+
+    def _vectors(self, rows: List[Tuple[np.ndarray, np.ndarray]]) -> sparse.csr_matrix:
+        """L2-normalized tf-idf rows under the current document frequencies."""
+        n = len(self._rows)
+        idf = np.log((1.0 + n) / (1.0 + self._df)) + 1.0
+        if n >= 20:
+            idf[self._df > self.max_df * n] = 0.0
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(indices) for indices, _ in rows])
+        indices = np.concatenate([r[0] for r in rows]) if rows else np.zeros(0, dtype=np.int64)
+        values = np.concatenate([r[1] for r in rows]) if rows else np.zeros(0)
+        matrix = sparse.csr_matrix((values * idf[indices], indices, indptr),
+                                   shape=(len(rows), self.n_features))
+        matrix.eliminate_zeros()
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return sparse.csr_matrix(sparse.diags(1.0 / norms) @ matrix)
+
+    def _indexed(self) -> Tuple[List[str], sparse.csr_matrix]:
+        if self._matrix is None:
+            ids = list(self._rows)
+            self._matrix = (ids, self._vectors([self._rows[sid][1:] for sid in ids]))
+        return self._matrix
+
+    def neighbours(self, tasks: List[str], k: int = 5,
+                   threshold: float = 0.0) -> List[List[Tuple[str, float]]]:
+        """
+        Most similar indexed sinkholes for each task (cosine similarity).
+
+        Returns:
+            Per task, up to k (sinkhole id, similarity) pairs at or above
+            threshold, most similar first
+        """
+        ids, matrix = self._indexed()
+        if not ids or not tasks:
+            return [[] for _ in tasks]
+
+        results = []
+        for chunk in range(0, len(tasks), CHUNK_SIZE):
+            queries = self._vectors([task_features(task, self.n_features)
+                                     for task in tasks[chunk:chunk + CHUNK_SIZE]])
+            similarity = (queries @ matrix.T).tocsr()
+            for row in range(queries.shape[0]):
+                start, end = similarity.indptr[row], similarity.indptr[row + 1]
+                columns, scores = similarity.indices[start:end], similarity.data[start:end]
+                keep = scores >= threshold
+                columns, scores = columns[keep], scores[keep]
+                top = np.argsort(-scores, kind='stable')[:k]
+                results.append([(ids[columns[i]], round(float(scores[i]), 4)) for i in top])
+        return results
+
+    def duplicates_of(self, tasks: List[Tuple[str, str]],
+                      threshold: float = 0.9) -> Dict[str, List[Tuple[str, float]]]:
+        """
+        Indexed sinkholes at least `threshold` similar to each new (id, task),
+        excluding the task itself. Only tasks with a match are returned.
+        """
+        found = {}
+        matches = self.neighbours([task for _, task in tasks], k=6, threshold=threshold)
+        for (sid, _), near in zip(tasks, matches):
+            near = [(other, score) for other, score in near if other != sid][:5]
+            if near:
+                found[sid] = near
+        return found
+
+    def anchors(self, sinkholes: List[Dict], threshold: float = 0.5) -> Dict[str, str]:
+        """
+        For each sinkhole, the first sinkhole by id of the same category that
+        sorts before it (so it is placed first) and is at least `threshold`
+        similar. Taking the first rather than the most similar keeps anchors
+        from flipping between near-ties as IDF shifts with every new task.
+        Sinkholes must already be indexed.
+
+        Returns:
+            {sinkhole id: anchor sinkhole id}
+        """
+        ids, matrix = self._indexed()
+        row_of = {sid: i for i, sid in enumerate(ids)}
+        by_category: Dict[str, List[str]] = {}
+        for sid, category in sorted((s['id'], s['category']) for s in sinkholes):
+            if sid in row_of:
+                by_category.setdefault(category, []).append(sid)
+
+        anchors = {}
+        for members in by_category.values():
+            rows = matrix[[row_of[sid] for sid in members]]
+            for chunk in range(0, len(members), CHUNK_SIZE):
+                end = min(chunk + CHUNK_SIZE, len(members))
+                # Each row only needs the rows before it
+                similarity = (rows[chunk:end] @ rows[:end].T).tocsr()
+                for i in range(chunk, end):
+                    start, stop = similarity.indptr[i - chunk], similarity.indptr[i - chunk + 1]
+                    columns = similarity.indices[start:stop]
+                    earlier = columns[(columns < i) & (similarity.data[start:stop] >= threshold)]
+                    if len(earlier):
+                        anchors[members[i]] = members[earlier.min()]
+        return anchors
+
+
+if __name__ == '__main__':
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate sinkhole tasks")
+    parser.add_argument('command', choices=['duplicates'])
+    parser.add_argument('--sinkholes', default='data/sinkhole_data/negatives.json')
+    parser.add_argument('--index', default='data/sinkhole_data/task_vectors.npz')
+    parser.add_argument('--threshold', type=float, default=0.9)
+    args = parser.parse_args()
+
+    with open(args.sinkholes) as f:
+        sinkholes = json.load(f)
+    index = SimilarityIndex(args.index)
+    vectorized = index.add((sid, s['task']) for sid, s in sinkholes.items())
+    index.save()
+    print(f"✓ Indexed {len(index)} tasks ({vectorized} vectorized)")
+
+    found = index.duplicates_of([(sid, s['task']) for sid, s in sinkholes.items()], args.threshold)
+    reported = set()
+    for sid, near in found.items():
+        for other, score in near:
+            pair = tuple(sorted((sid, other)))
+            if pair in reported:
+                continue
+            reported.add(pair)
+            print(f"⚠️  {pair[0]} ~ {pair[1]} ({score:.2f})")
+    print(f"{len(reported)} near-duplicate pairs at >= {args.threshold}")
@@ -1,251 +1,272 @@
+import argparse
 import json
-import anthropic
-import openai
-from google import generativeai as genai
-import replicate  # For Llama via Replicate
 import os
 import time
 from pathlib import Path
 from dotenv import load_dotenv
+from sinkhole_cache import ResponseCache
+from sinkhole_checkpoint import ResultCheckpoint
+from sinkhole_evaluations import EvaluationStore
+from sinkhole_grading import grade_responses
+from sinkhole_metrics import ProviderMetrics
+from sinkhole_providers import build_providers, load_model_configs
+from sinkhole_runner import AsyncSinkholeRunner, BatchSinkholeRunner
 
 load_dotenv()
 
-def test_claude(task, client):
-    """Test with Claude"""
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-20250514",  # ✓ This is correct
-            max_tokens=200,
-            messages=[{"role": "user", "content": task}]
-        )
-        return message.content[0].text
-    except Exception as e:
-        return f"Error: {str(e)}"
+# Model ids, generation params, runner limits and on/off switches
+MODELS_CONFIG_PATH = 'config/sinkhole_models.json'
 
-def test_gpt4(task, client):
-    """Test with GPT-4"""
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # FIXED: was "gpt-4"
-            messages=[{"role": "user", "content": task}],
-            max_tokens=200
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error: {str(e)}"
+RESPONSES_PATH = 'data/sinkhole_data/negatives_with_responses.json'
 
-def test_gemini(task, model):
-    """Test with Gemini"""
-    try:
-        # Add generation config to avoid beta API
-        generation_config = {
-            "temperature": 0.7,
-            "max_output_tokens": 200,
-        }
-        response = model.generate_content(
-            task,
-            generation_config=generation_config
-        )
-        return response.text
-    except Exception as e:
-        return f"Error: {str(e)}"
+# Per-provider latency / token / retry histograms for the last run
+METRICS_PATH = 'data/sinkhole_data/negatives_with_responses_metrics.json'
 
-def test_llama(task):
-    """Test with Llama via Replicate"""
-    try:
-        output = replicate.run(
-            "meta/meta-llama-3.1-405b-instruct", 
-            input={
-                "prompt": task,
-                "max_tokens": 200,
-            }
-        )
-        return "".join(output)
-    except Exception as e:
-        return f"Error: {str(e)}"
 
-def test_grok(task, client):
-    """Test with Grok (xAI) - uses OpenAI-compatible API"""
-    try:
-        response = client.chat.completions.create(
-            model="grok-2-latest",  # FIXED: was "grok-beta"
-            messages=[{"role": "user", "content": task}],
-            max_tokens=200
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-def test_all_models():
-    """Test all sinkholes against all models"""
+def test_all_models(refresh=False, resume=False, batch=False, poll_interval=30.0, samples=1,
+                    stream=False, token_budget=None):
+    """
+    Test all sinkholes against all models
+    
+    Models come from config/sinkhole_models.json (enabled and with an API key).
+    Answers are served from the response cache where possible; only cache
+    misses are sent to the providers. Pass refresh=True to re-query everything.
+    
+    Every result is appended to a checkpoint as it completes. Pass resume=True
+    to pick up an interrupted run and skip (task, model) pairs already done.
+    Failed calls are stored with status 'error' and retried on the next run.
+    
+    Answers are auto-graded by each task's checker; only answers without a
+    checker, or with an ambiguous verdict, are left for manual review.
+    
+    Pass batch=True to send the pending queries as provider batch jobs
+    (models with "batch": true in the config); other models fall back to
+    concurrent requests.
+    
+    Pass samples=n to draw n answers per (task, model) and store each
+    model's pass rate with a 95% confidence interval. Sampled runs skip the
+    response cache, which holds a single answer per task.
+    
+    Pass stream=True to stream answers through each task's checker and
+    stop as soon as the verdict is settled. token_budget caps the output
+    tokens per task (a sinkhole's own 'token_budget' field takes precedence).
+    Answers cut short by a settled verdict are graded but not cached;
+    answers under a token budget are cached under the budgeted max_tokens.
+    
+    Every request's latency, time to first token (streamed), tokens,
+    attempts and error class are aggregated per provider and written to
+    METRICS_PATH next to the responses.
+    """
     
     # Load sinkholes
     with open('data/sinkhole_data/negatives.json') as f:
         sinkholes = json.load(f)
     
+    model_configs = load_model_configs(MODELS_CONFIG_PATH)
+    
+    # Seed a new cache from earlier responses; once it exists it is the record
+    # of what was queried with which max_tokens, so it is not re-seeded
+    cache = ResponseCache()
+    if not os.path.exists(cache.path) and os.path.exists(RESPONSES_PATH):
+        with open(RESPONSES_PATH) as f:
+            imported = cache.seed_from_responses(json.load(f), model_configs)
+        if imported:
+            print(f"✓ Imported {imported} answers from {RESPONSES_PATH} into the cache")
+    
     # Initialize clients
     print("Initializing API clients...")
+    providers = build_providers(model_configs)
     
-    # Claude
-    claude_client = None
-    if os.environ.get("ANTHROPIC_API_KEY"):
-        claude_client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
-        print("✓ Claude (claude-sonnet-4-20250514)")
-    else:
-        print("⚠️  Claude (no API key)")
+    checkpoint = ResultCheckpoint()
+    completed = checkpoint.load(sinkholes) if resume else {}
+    if completed:
+        print(f"✓ Resuming: {len(completed)} results already in {checkpoint.path}")
     
-    # OpenAI (GPT-4)
-    openai_client = None
-    if os.environ.get("OPENAI_API_KEY"):
-        openai_client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-        print("✓ GPT-4 (gpt-4o-mini)")
-    else:
-        print("⚠️  GPT-4 (no API key)")
-    
-    # Gemini
-    gemini_model = None
-    if os.environ.get("GOOGLE_API_KEY"):
-        genai.configure(api_key=os.environ.get("GOOGLE_API_KEY"))
-        gemini_model = genai.GenerativeModel('gemini-1.5-pro-002')
-        print("✓ Gemini (gemini-1.5-flash-latest)")
-    else:
-        print("⚠️  Gemini (no API key)")
+    def cache_config(model, sid):
+        """Model config with the max_tokens the task is actually queried with."""
+        config = providers[model].config
+        budget = sinkholes[sid].get('token_budget', token_budget) if stream else None
+        if budget and budget < config['max_tokens']:
+            config = {**config, 'max_tokens': budget}
+        return config
     
-    # Llama via Replicate
-    if os.environ.get("REPLICATE_API_TOKEN"):
-        print("✓ Llama (meta/llama-3.3-70b-instruct)")
-    else:
-        print("⚠️  Llama (no API key)")
-    
-    # Grok (xAI)
-    grok_client = None
-    if os.environ.get("XAI_API_KEY"):
-        grok_client = openai.OpenAI(
-            api_key=os.environ.get("XAI_API_KEY"),
-            base_url="https://api.x.ai/v1"
-        )
-        print("✓ Grok (grok-2-latest)")
-    else:
-        print("⚠️  Grok (no API key)")
+    # Fill checkpointed results and cache hits, collect misses
+    pending = []
+    for sid, sinkhole in sinkholes.items():
+        sinkhole.setdefault('results', {})
+        for model, provider in providers.items():
+            previous = completed.get((sid, model))
+            if previous is not None and previous.get('status', 'ok') == 'ok':
+                sinkhole['results'][model] = previous
+                continue
+            answer = None
+            if not refresh and samples == 1:
+                answer = cache.get(cache_config(model, sid), sinkhole['task'])
+            if answer is None:
+                pending.append((sid, model))
+            else:
+                sinkhole['results'][model] = {'status': 'ok', 'answer': answer, 'correct': None}
     
     print("\n" + "="*70)
-    print(f"TESTING {len(sinkholes)} SINKHOLES ACROSS MULTIPLE MODELS")
+    print(f"TESTING {len(sinkholes)} SINKHOLES ACROSS {len(providers)} MODELS"
+          + (f" ({samples} SAMPLES EACH)" if samples > 1 else ""))
+    print(f"  {len(pending)} queries to send, "
+          f"{len(sinkholes) * len(providers) - len(pending)} served from cache")
     print("="*70 + "\n")
     
     start_time = time.time()
+    metrics = ProviderMetrics(prices={name: p.config['pricing'] for name, p in providers.items()
+                                      if p.config.get('pricing')})
+    metrics.start()
+    total = len(pending)
+    done = 0
+    failed = 0
     
-    for i, (sid, sinkhole) in enumerate(sinkholes.items(), 1):
-        task = sinkhole['task']
-        print(f"[{i}/{len(sinkholes)}] {task[:60]}...")
-        
-        if 'results' not in sinkhole:
-            sinkhole['results'] = {}
-        
-        # Test Claude
-        if claude_client:
-            print("  Claude...", end=" ", flush=True)
-            answer = test_claude(task, claude_client)
-            sinkhole['results']['claude'] = {'answer': answer, 'correct': None}
-            print("✓")
-            time.sleep(0.5)
-        
-        # Test GPT-4
-        openai_client = False    
-        if openai_client:
-            print("  GPT-4...", end=" ", flush=True)
-            answer = test_gpt4(task, openai_client)
-            sinkhole['results']['gpt4'] = {'answer': answer, 'correct': None}
-            print("✓")
-            time.sleep(0.5)
-        
-        # Test Gemini
-        gemini_model = False    
-        if gemini_model:
-            print("  Gemini...", end=" ", flush=True)
-            answer = test_gemini(task, gemini_model)
-            sinkhole['results']['gemini'] = {'answer': answer, 'correct': None}
-            print("✓")
-            time.sleep(0.5)
-        
-        # Test Llama
-        if False:
-        # if os.environ.get("REPLICATE_API_TOKEN"):
-            print("  Llama...", end=" ", flush=True)
-            answer = test_llama(task)
-            sinkhole['results']['llama'] = {'answer': answer, 'correct': None}
-            print("✓")
-            time.sleep(1)  # Replicate needs more time
-        
-        # Test Grok
-        if grok_client:
-            print("  Grok...", end=" ", flush=True)
-            answer = test_grok(task, grok_client)
-            sinkhole['results']['grok'] = {'answer': answer, 'correct': None}
-            print("✓")
-            time.sleep(0.5)
-        
-        print()
+    def report(sid, model, result):
+        nonlocal done, failed
+        done += 1
+        checkpoint.append(sid, model, sinkholes[sid]['task'], result)
+        metrics.record(model, result)
+        if result['status'] == 'ok':
+            if samples == 1 and not result.get('stopped_early'):
+                cache.put(cache_config(model, sid), sinkholes[sid]['task'], result['answer'])
+            latency = result.get('latency_s')
+            timing = f" ({latency:.1f}s)" if latency is not None else ""
+            early = " [stopped early]" if result.get('stopped_early') else ""
+            print(f"[{done}/{total}] {sid} {model} ✓{timing}{early}")
+        else:
+            failed += 1
+            print(f"[{done}/{total}] {sid} {model} ✗ {result['error_class']}: {result['error']}")
+    
+    by_task = {s['task']: s for s in sinkholes.values()}
+    
+    def streaming(provider):
+        def call(task):
+            sinkhole = by_task[task]
+            return provider.query_stream(task, sinkhole.get('checker'),
+                                         sinkhole.get('token_budget', token_budget))
+        return call
+    
+    runner_providers = {}
+    for name, provider in providers.items():
+        runner_providers[name] = {
+            'call': streaming(provider) if stream else provider.query,
+            'concurrency': provider.config.get('concurrency', 1),
+            'rate': provider.config.get('rate', 1.0)
+        }
+        if provider.supports_native_n and not stream:
+            runner_providers[name]['sample'] = provider.query_n
+        if batch and provider.supports_batch:
+            runner_providers[name].update({
+                'submit': provider.submit_batch,
+                'done': provider.batch_done,
+                'results': provider.batch_results
+            })
     
+    if batch:
+        runner = BatchSinkholeRunner(runner_providers, on_result=report,
+                                     poll_interval=poll_interval, samples=samples)
+    else:
+        runner = AsyncSinkholeRunner(runner_providers, on_result=report, samples=samples)
+    
+    checkpoint.open(resume=resume)
+    try:
+        runner.run(sinkholes, pairs=pending)
+    finally:
+        checkpoint.close()
+        cache.save()
+    
+    metrics.stop()
     elapsed = time.time() - start_time
     print(f"✓ Done in {elapsed:.1f} seconds!")
+    if total:
+        Path(METRICS_PATH).parent.mkdir(parents=True, exist_ok=True)
+        metrics.write_report(METRICS_PATH)
+        print(f"✓ Request metrics written to {METRICS_PATH}:")
+        metrics.print_summary()
+    if stream:
+        stopped = sum(1 for s in sinkholes.values() for r in s['results'].values()
+                      for a in r.get('samples', [r]) if a.get('stopped_early'))
+        print(f"✓ {stopped} streamed answers stopped early on a settled verdict")
+    if failed:
+        print(f"⚠️  {failed} calls failed (recorded as errors, not answers)")
+    
+    # Auto-grade answers that have a checker
+    counts = grade_responses(sinkholes)
+    print(f"✓ Auto-graded: {counts['correct']} correct, {counts['incorrect']} incorrect, "
+          f"{counts['ambiguous'] + counts['unchecked']} left for manual review")
+    if samples > 1:
+        for model in providers:
+            rates = [s['results'][model]['pass_rate'] for s in sinkholes.values()
+                     if s['results'].get(model, {}).get('pass_rate') is not None]
+            if rates:
+                print(f"  {model}: mean pass rate {sum(rates) / len(rates):.0%} "
+                      f"over {len(rates)} auto-graded sinkholes")
     
     # Save results
-    output_path = 'data/sinkhole_data/negatives_with_responses.json'
+    output_path = RESPONSES_PATH
     with open(output_path, 'w') as f:
         json.dump(sinkholes, f, indent=2)
     
     print(f"✓ Saved to {output_path}")
     
-    # Create evaluation template
+    # Record answers in the evaluation store and render the markdown view
     create_evaluation_template(sinkholes)
 
 
 def create_evaluation_template(sinkholes):
-    """Create markdown file for evaluation"""
+    """
+    Merge answers into the evaluation store and render markdown for review
     
-    lines = []
-    lines.append("# Sinkhole Evaluation - All Models\n\n")
+    The store (data/sinkhole_data/evaluations.json) is the source of truth;
+    verdicts already in it are kept while the answer is unchanged.
+    Auto-graded answers come pre-ticked; the rest are left blank for review.
+    Verdicts ticked by hand in the existing markdown are kept, and only
+    sections whose answers or verdicts changed are regenerated.
+    """
     
-    for sid, sinkhole in sinkholes.items():
-        lines.append(f"## {sid}\n\n")
-        lines.append(f"**Task:** {sinkhole['task']}\n\n")
-        lines.append(f"**Category:** {sinkhole['category']}\n\n")
-        
-        if 'correct_answer' in sinkhole:
-            lines.append(f"**Expected Answer:** {sinkhole['correct_answer']}\n\n")
-        
-        if 'results' in sinkhole:
-            for model, result in sorted(sinkhole['results'].items()):
-                lines.append(f"### {model.upper()}\n")
-                lines.append(f"```\n{result['answer']}\n```\n")
-                lines.append(f"**Correct?** [ ] Yes  [ ] No\n\n")
-        
-        lines.append("---\n\n")
-    
-    with open('data/sinkhole_evaluation.md', 'w') as f:
-        f.writelines(lines)
-    
-    print("✓ Created evaluation template: data/sinkhole_evaluation.md")
+    store = EvaluationStore()
+    changed = store.update_from_responses(sinkholes)
+    
+    counts = store.render_markdown('data/sinkhole_evaluation.md')
+    store.save()
+    print(f"✓ Updated evaluation store: {store.path} ({changed} new answers, "
+          f"{counts['harvested']} hand-ticked verdicts kept)")
+    print(f"✓ Updated evaluation template: data/sinkhole_evaluation.md "
+          f"({counts['rendered']} sections rendered, {counts['kept']} unchanged)")
 
 
 if __name__ == '__main__':
-    # Check for at least one API key
-    has_any_key = any([
-        os.environ.get("ANTHROPIC_API_KEY"),
-        os.environ.get("OPENAI_API_KEY"),
-        os.environ.get("GOOGLE_API_KEY"),
-        os.environ.get("REPLICATE_API_TOKEN"),
-        os.environ.get("XAI_API_KEY")
-    ])
+    parser = argparse.ArgumentParser(description="Query models on every sinkhole task")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Ignore the response cache and re-query every (task, model) pair")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted run from its checkpoint")
+    parser.add_argument('--batch', action='store_true',
+                        help="Submit pending queries as provider batch jobs where supported")
+    parser.add_argument('--poll-interval', type=float, default=30.0,
+                        help="Seconds between batch status checks (default: 30)")
+    parser.add_argument('--samples', type=int, default=1,
+                        help="Answers per (task, model); >1 records pass rates with "
+                             "confidence intervals (default: 1)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Stream answers and stop once the task's checker has a settled verdict")
+    parser.add_argument('--token-budget', type=int, default=None,
+                        help="Max output tokens per task (a sinkhole's 'token_budget' overrides it)")
+    args = parser.parse_args()
+    
+    # Check for at least one API key among the enabled models
+    enabled = {name: c for name, c in load_model_configs(MODELS_CONFIG_PATH).items()
+               if c.get('enabled', True)}
+    has_any_key = any(os.environ.get(c['api_key_env']) for c in enabled.values())
     
     if not has_any_key:
         print("❌ No API keys found!")
-        print("\nSet at least one of:")
-        print("  export ANTHROPIC_API_KEY='...'")
-        print("  export OPENAI_API_KEY='...'")
-        print("  export GOOGLE_API_KEY='...'")
-        print("  export REPLICATE_API_TOKEN='...'")
-        print("  export XAI_API_KEY='...'")
+        print(f"\nSet at least one of (enabled in {MODELS_CONFIG_PATH}):")
+        for c in enabled.values():
+            print(f"  export {c['api_key_env']}='...'")
         exit(1)
     
-    test_all_models()
\ No newline at end of file
+    test_all_models(refresh=args.refresh, resume=args.resume,
+                    batch=args.batch, poll_interval=args.poll_interval, samples=args.samples,
+                    stream=args.stream, token_budget=args.token_budget)
\ No newline at end of file